@@ -11,33 +11,59 @@ os.environ['OBJ_DETECT_MYSQL_HOST'] = 'localhost'
 os.environ['OBJ_DETECT_MYSQL_DB'] = 'obj_detect_dev_db'
 os.environ['OBJ_DETECT_ENV'] = 'development'
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, current_app, request, jsonify, send_file, g
 from flask_cors import CORS
 from flask_restful import Api, Resource, reqparse
 from flasgger import Swagger, swag_from
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
+from sqlalchemy import select
 from config import config, allowed_file
 
 # Import new MySQL database functions
 from storage.database_functions import (
-    init_database, get_object_type_by_name, save_prediction_result,
-    update_correction, get_all_object_types, get_output_by_id,
-    delete_output, count_outputs, get_all_outputs, get_outputs_with_relationships,
-    get_all_results
+    init_database, get_object_type_id, get_object_type_names,
+    get_cached_object_types, save_prediction_result,
+    save_prediction_results, save_prediction_results_bulk, update_correction, get_all_object_types, get_output_by_id,
+    delete_output, delete_outputs, count_outputs, get_all_outputs, get_outputs_with_relationships,
+    get_all_results, get_results_after_cursor, get_result_stats, get_accuracy_trends
 )
 
 # Import MySQL models
+from storage import database
 from storage.object_types import ObjectType
 from storage.inputs import Input
 from storage.outputs import Output
 
 from performance_monitor import get_performance_monitor
+from job_queue import JobQueue, QueueFullError
+from pipeline_loader import PipelineLoader
+from metrics import (
+    PROMETHEUS_CONTENT_TYPE, db_query_latency, http_request_latency, http_requests,
+    instrument_database_queries, render_metrics, render_sampled, segments_per_image, stage_latency
+)
 from performance_metrics import calculate_f1_metrics, calculate_legacy_accuracy, get_performance_badge_info
 
+class UploadRequest(Request):
+    """Request whose body size cap depends on the endpoint
+    Batch uploads carry many images, so they are capped by
+    COUNT_BATCH_MAX_CONTENT_LENGTH instead of MAX_CONTENT_LENGTH.
+    """
+    
+    @property
+    def max_content_length(self):
+        """Body size limit for this request's endpoint"""
+        if current_app and self.url_rule is not None and self.url_rule.rule == '/api/count/batch':
+            return current_app.config['COUNT_BATCH_MAX_CONTENT_LENGTH']
+        return super().max_content_length
+
+
 # Create Flask app
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app, origins=["http://localhost:3000", "http://localhost:3001", "http://localhost:5173"])  # Enable CORS for frontend integration
 
 # Load configuration
@@ -83,21 +109,215 @@ swagger_template = {
 
 swagger = Swagger(app, config=swagger_config, template=swagger_template)
 
+# Size the connection pool from config
+database.configure(
+    pool_size=app.config['DB_POOL_SIZE'],
+    max_overflow=app.config['DB_MAX_OVERFLOW'],
+    pool_recycle=app.config['DB_POOL_RECYCLE'],
+    pool_timeout=app.config['DB_POOL_TIMEOUT']
+)
+
 # Initialize MySQL database
 init_database()
 
-# Initialize the AI pipeline with error handling
-pipeline = None
-pipeline_error = None
+# Load the object type registry so counting requests never query object_types
+get_object_type_names()
+
 
-try:
+@app.teardown_appcontext
+def remove_database_session(exception=None):
+    """Release the request's database session back to the pool"""
+    database.remove()
+
+
+# Time every database statement for /metrics
+instrument_database_queries()
+
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started for the latency histogram"""
+    g.request_start_time = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the request and record its latency, labelled by route pattern"""
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    http_requests.inc((endpoint, request.method, str(response.status_code)))
+    start_time = g.get('request_start_time')
+    if start_time is not None:
+        http_request_latency.observe((endpoint, request.method), time.perf_counter() - start_time)
+    return response
+
+def create_pipeline():
+    """Import and build the AI pipeline (loads SAM, ResNet-50 and DistilBERT)"""
     from models.pipeline import ObjectCountingPipeline
-    pipeline = ObjectCountingPipeline()
-    print("✅ AI Pipeline initialized successfully!")
-except Exception as e:
-    pipeline_error = str(e)
-    print(f"❌ Failed to initialize AI pipeline: {e}")
-    print("💡 Make sure all dependencies are installed. See INSTALL_STEPS.md")
+    return ObjectCountingPipeline()
+
+
+# The AI pipeline is built on first use, or in the background when preloading,
+# so model-free endpoints are served immediately after startup
+pipeline_loader = PipelineLoader(create_pipeline, warm_up=app.config['PIPELINE_WARMUP'])
+if app.config['PIPELINE_PRELOAD']:
+    pipeline_loader.start_background()
+
+
+def run_count_job(image_source, unique_filename, object_type_name, description, confidence_threshold):
+    """Run the counting pipeline on a saved upload and store the prediction
+    Called by queue workers and, for synchronous requests, by request threads;
+    the pipeline serializes access to each model itself.
+    Args:
+        image_source: uploaded file object or path of the saved image
+        unique_filename: stored filename of the image in UPLOAD_FOLDER
+        object_type_name: object type to count
+        description: optional description of the input
+        confidence_threshold: optional confidence threshold override
+    Return: response dict for /api/count
+    Raises the pipeline or database error after deleting the saved upload
+    """
+    try:
+        pipeline, pipeline_error = pipeline_loader.get()
+        if pipeline is None:
+            raise RuntimeError(f"AI pipeline not available: {pipeline_error}")
+        result = pipeline.count_objects(image_source, object_type_name, confidence_threshold)
+        
+        # Extract confidence metrics for database storage
+        avg_confidence = result["confidence_metrics"]["average_confidence"]
+        
+        # Save result to MySQL database (store relative path)
+        output_record = save_prediction_result(
+            image_path=unique_filename,  # Store just the filename, not full path
+            object_type_name=object_type_name,
+            predicted_count=result["count"],
+            description=description,
+            pred_confidence=avg_confidence  # Use actual average confidence
+        )
+    except Exception:
+        # Nothing references the upload unless the prediction was saved
+        remove_upload_files([unique_filename])
+        raise
+    
+    return {
+        "success": True,
+        "result_id": output_record.id,
+        "object_type": object_type_name,
+        "predicted_count": result["count"],
+        "total_segments": result["total_segments"],
+        "filtered_segments": result["filtered_segments"],
+        "processing_time": result["processing_time"],
+        "stage_timings": result["stage_timings"],
+        "image_path": f"uploads/{unique_filename}",  # Return path for frontend use
+        "created_at": output_record.created_at.isoformat(),
+        "confidence_metrics": result["confidence_metrics"],
+        "quality_assessment": result["quality_assessment"],
+        "confidence_threshold_used": result["confidence_threshold_used"],
+        "segmentation_scale": result["segmentation_scale"]
+    }
+
+
+def resolve_object_types(form):
+    """Resolve the object types requested in a counting form
+    Reads object_types (repeated or comma-separated, "all" for every
+    registered type) or falls back to object_type.
+    Args:
+        form: request form data
+    Return: tuple (object_types, error) where error is a (body, status) response or None
+    """
+    requested_types = []
+    for value in form.getlist('object_types') or [form.get('object_type', '')]:
+        requested_types.extend(name.strip() for name in value.split(',') if name.strip())
+    requested_types = list(dict.fromkeys(requested_types))
+    
+    if not requested_types:
+        return None, ({"error": "No object type specified"}, 400)
+    
+    # Resolve "all" and verify every requested type exists
+    available_types = get_object_type_names()
+    if 'all' in requested_types:
+        object_types = available_types
+    else:
+        invalid_types = [name for name in requested_types if name not in available_types]
+        if invalid_types:
+            return None, ({
+                "error": f"Invalid object type: {', '.join(invalid_types)}",
+                "available_types": available_types
+            }, 400)
+        object_types = requested_types
+    
+    if not object_types:
+        return None, ({"error": "No object types are registered"}, 400)
+    
+    return object_types, None
+
+
+def parse_date_range(args):
+    """Parse the start_date/end_date query parameters of a stats request
+    Dates are YYYY-MM-DD (end_date inclusive) or ISO 8601 datetimes.
+    Args:
+        args: request query arguments
+    Return: tuple (start, end) datetimes, either may be None
+    Raises ValueError for unparseable dates
+    """
+    bounds = []
+    for name in ('start_date', 'end_date'):
+        value = (args.get(name) or '').strip()
+        if not value:
+            bounds.append(None)
+            continue
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name} '{value}', expected YYYY-MM-DD or an ISO 8601 datetime")
+        # A bare end date covers the whole day
+        if name == 'end_date' and len(value) == 10:
+            parsed += timedelta(days=1)
+        bounds.append(parsed)
+    
+    start, end = bounds
+    if start and end and start >= end:
+        raise ValueError("start_date must be before end_date")
+    return start, end
+
+
+# Bounded worker pool for asynchronous /api/count requests
+job_queue = JobQueue(
+    run_count_job,
+    workers=app.config['COUNT_QUEUE_WORKERS'],
+    max_size=app.config['COUNT_QUEUE_MAX_SIZE'],
+    teardown=database.remove,
+    name='counting'
+)
+
+
+def remove_upload_files(image_paths):
+    """Delete uploaded images of deleted results from the upload folder
+    Args:
+        image_paths: stored filenames relative to UPLOAD_FOLDER
+    Return: dict with removed and failed filenames
+    """
+    upload_folder = os.path.abspath(app.config['UPLOAD_FOLDER'])
+    removed, failed = [], []
+    for image_path in image_paths:
+        file_path = os.path.abspath(os.path.join(upload_folder, image_path))
+        # Never follow stored paths outside the uploads directory
+        if not file_path.startswith(upload_folder + os.sep):
+            failed.append(image_path)
+            continue
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                removed.append(image_path)
+        except OSError as e:
+            print(f"⚠️  Warning: Could not delete image file {image_path}: {e}")
+            failed.append(image_path)
+    if removed:
+        print(f"🗑️  Deleted {len(removed)} image files")
+    return {"removed": removed, "failed": failed}
+
+
+# Background worker deleting upload files after bulk deletes commit (jobs are never polled)
+file_cleanup_queue = JobQueue(remove_upload_files, workers=1, max_size=64, max_finished=0, name='file-cleanup')
 
 
 # ============================================================================
@@ -118,7 +338,17 @@ class HealthResource(Resource):
                         'message': {'type': 'string'},
                         'database': {'type': 'string'},
                         'object_types': {'type': 'integer'},
-                        'pipeline_available': {'type': 'boolean'}
+                        'pipeline_available': {'type': 'boolean'},
+                        'pipeline': {
+                            'type': 'object',
+                            'properties': {
+                                'state': {'type': 'string', 'enum': ['not_loaded', 'loading', 'ready', 'failed']},
+                                'ready': {'type': 'boolean'},
+                                'error': {'type': 'string'},
+                                'started_at': {'type': 'string'},
+                                'load_time': {'type': 'number'}
+                            }
+                        }
                     }
                 }
             }
@@ -134,17 +364,86 @@ class HealthResource(Resource):
                 "message": "Object Counting API is running (MySQL)",
                 "database": "connected",
                 "object_types": object_types_count,
-                "pipeline_available": pipeline is not None
+                "pipeline_available": pipeline_loader.ready,
+                "pipeline": pipeline_loader.status()
             }, 200
         except Exception as e:
             return {
                 "status": "degraded",
                 "message": "API running but database issue",
                 "error": str(e),
-                "pipeline_available": pipeline is not None
+                "pipeline_available": pipeline_loader.ready,
+                "pipeline": pipeline_loader.status()
             }, 503
 
 
+class LivenessResource(Resource):
+    """Liveness probe: the process is up and serving requests"""
+    
+    @swag_from({
+        'responses': {
+            200: {
+                'description': 'Process is alive',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'status': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    })
+    def get(self):
+        """Answer without touching the database or the models"""
+        return {"status": "alive"}, 200
+
+
+class ReadinessResource(Resource):
+    """Readiness probe: the database is reachable and the models are loaded and warm"""
+    
+    @swag_from({
+        'responses': {
+            200: {
+                'description': 'Ready to serve counting requests',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'ready': {'type': 'boolean'},
+                        'database': {'type': 'string'},
+                        'pipeline': {
+                            'type': 'object',
+                            'properties': {
+                                'state': {'type': 'string'},
+                                'load_time': {'type': 'number'},
+                                'model_load_times': {'type': 'object'},
+                                'warm_up': {'type': 'object'},
+                                'warm_up_error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            },
+            503: {'description': 'Not ready yet (models loading or warming up) or unavailable'}
+        }
+    })
+    def get(self):
+        """Report readiness, starting the model load if nothing has triggered it yet"""
+        pipeline_loader.start_background()
+        
+        try:
+            database.execute(select(1))
+            database_status = "connected"
+        except Exception as e:
+            database_status = f"error: {e}"
+        
+        ready = pipeline_loader.ready and database_status == "connected"
+        return {
+            "ready": ready,
+            "database": database_status,
+            "pipeline": pipeline_loader.status(details=True)
+        }, 200 if ready else 503
+
+
 class InitDatabaseResource(Resource):
     """Initialize database with default object types"""
     
@@ -225,6 +524,7 @@ class TestPipelineResource(Resource):
                         'total_segments': {'type': 'integer'},
                         'filtered_segments': {'type': 'integer'},
                         'processing_time': {'type': 'number'},
+                        'stage_timings': {'type': 'object', 'description': 'Seconds spent in each pipeline stage'},
                         'confidence_metrics': {
                             'type': 'object',
                             'properties': {
@@ -245,7 +545,8 @@ class TestPipelineResource(Resource):
                                 'recommendations': {'type': 'array', 'items': {'type': 'string'}}
                             }
                         },
-                        'confidence_threshold_used': {'type': 'number'}
+                        'confidence_threshold_used': {'type': 'number'},
+                        'segmentation_scale': {'type': 'number'}
                     }
                 }
             },
@@ -256,7 +557,8 @@ class TestPipelineResource(Resource):
     def post(self):
         """Test the AI pipeline with an image"""
         
-        # Check if pipeline is available
+        # Get the pipeline, loading the models on first use
+        pipeline, pipeline_error = pipeline_loader.get()
         if pipeline is None:
             return {
                 "error": "AI pipeline not available", 
@@ -294,9 +596,11 @@ class TestPipelineResource(Resource):
                 "total_segments": result["total_segments"],
                 "filtered_segments": result["filtered_segments"],
                 "processing_time": result["processing_time"],
+                "stage_timings": result["stage_timings"],
                 "confidence_metrics": result["confidence_metrics"],
                 "quality_assessment": result["quality_assessment"],
-                "confidence_threshold_used": result["confidence_threshold_used"]
+                "confidence_threshold_used": result["confidence_threshold_used"],
+                "segmentation_scale": result["segmentation_scale"]
             }, 200
             
         except Exception as e:
@@ -335,6 +639,13 @@ class CountObjectsResource(Resource):
                 'type': 'number',
                 'required': False,
                 'description': 'Confidence threshold for filtering segments (0.0-1.0)'
+            },
+            {
+                'name': 'async',
+                'in': 'formData',
+                'type': 'boolean',
+                'required': False,
+                'description': 'Queue the request and return a job id immediately (poll /api/jobs/{job_id})'
             }
         ],
         'responses': {
@@ -349,23 +660,27 @@ class CountObjectsResource(Resource):
                         'predicted_count': {'type': 'integer'},
                         'total_segments': {'type': 'integer'},
                         'processing_time': {'type': 'number'},
+                        'stage_timings': {'type': 'object', 'description': 'Seconds spent in each pipeline stage'},
                         'image_path': {'type': 'string'},
                         'created_at': {'type': 'string'}
                     }
                 }
             },
+            202: {'description': 'Counting job queued (async requests)'},
             400: {'description': 'Bad request'},
+            429: {'description': 'Job queue is full, retry later'},
             500: {'description': 'Server error'}
         }
     })
     def post(self):
         """Upload image and get object count prediction stored in MySQL database"""
         
-        # Check if pipeline is available
-        if pipeline is None:
+        # Fail fast if the models could not be loaded; otherwise asynchronous
+        # requests are queued without waiting for the load to finish
+        if pipeline_loader.state == PipelineLoader.FAILED:
             return {
                 "error": "AI pipeline not available", 
-                "details": pipeline_error,
+                "details": pipeline_loader.error,
                 "solution": "Install dependencies and restart server"
             }, 500
         
@@ -398,10 +713,9 @@ class CountObjectsResource(Resource):
                     "allowed_types": list(app.config['ALLOWED_EXTENSIONS'])
                 }, 400
             
-            # Verify object type exists
-            object_type = get_object_type_by_name(object_type_name)
-            if not object_type:
-                available_types = [ot.name for ot in get_all_object_types()]
+            # Verify object type exists (in-memory registry, no SELECT)
+            if not get_object_type_id(object_type_name):
+                available_types = get_object_type_names()
                 return {
                     "error": f"Invalid object type: {object_type_name}",
                     "available_types": available_types
@@ -416,44 +730,89 @@ class CountObjectsResource(Resource):
             os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
             image_file.save(image_path)
             
+            # Queue the work and return immediately when running asynchronously
+            if request.form.get('async', request.args.get('async', '')).lower() in ('1', 'true', 'yes'):
+                try:
+                    job_id = job_queue.submit(
+                        image_source=image_path,
+                        unique_filename=unique_filename,
+                        object_type_name=object_type_name,
+                        description=description,
+                        confidence_threshold=confidence_threshold
+                    )
+                except QueueFullError as e:
+                    os.remove(image_path)
+                    return {"error": str(e), "retry_after": 5}, 429, {"Retry-After": "5"}
+                
+                return {
+                    "success": True,
+                    "job_id": job_id,
+                    "status": "queued",
+                    "status_url": f"/api/jobs/{job_id}",
+                    "image_path": f"uploads/{unique_filename}"
+                }, 202
+            
+            # Get the pipeline, loading the models on first use
+            pipeline, pipeline_error = pipeline_loader.get()
+            if pipeline is None:
+                os.remove(image_path)
+                return {
+                    "error": "AI pipeline not available", 
+                    "details": pipeline_error,
+                    "solution": "Install dependencies and restart server"
+                }, 500
+            
             # Process image with AI pipeline
             image_file.seek(0)  # Reset file pointer for pipeline processing
-            result = pipeline.count_objects(image_file, object_type_name, confidence_threshold)
-            
-            # Extract confidence metrics for database storage
-            avg_confidence = result["confidence_metrics"]["average_confidence"]
-            quality_score = result["quality_assessment"]["quality_score"]
-            
-            # Save result to MySQL database (store relative path)
-            output_record = save_prediction_result(
-                image_path=unique_filename,  # Store just the filename, not full path
-                object_type_name=object_type_name,
-                predicted_count=result["count"],
-                description=description,
-                pred_confidence=avg_confidence  # Use actual average confidence
-            )
-            
-            return {
-                "success": True,
-                "result_id": output_record.id,
-                "object_type": object_type_name,
-                "predicted_count": result["count"],
-                "total_segments": result["total_segments"],
-                "filtered_segments": result["filtered_segments"],
-                "processing_time": result["processing_time"],
-                "image_path": f"uploads/{unique_filename}",  # Return path for frontend use
-                "created_at": output_record.created_at.isoformat(),
-                "confidence_metrics": result["confidence_metrics"],
-                "quality_assessment": result["quality_assessment"],
-                "confidence_threshold_used": result["confidence_threshold_used"]
-            }, 200
+            return run_count_job(image_file, unique_filename, object_type_name,
+                                 description, confidence_threshold), 200
             
         except Exception as e:
             return {"error": str(e)}, 500
 
 
+class JobStatusResource(Resource):
+    """Get the status and result of an asynchronous counting job"""
+    
+    @swag_from({
+        'parameters': [
+            {
+                'name': 'job_id',
+                'in': 'path',
+                'type': 'string',
+                'required': True,
+                'description': 'Job ID returned by POST /api/count with async=true'
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Job status',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'job_id': {'type': 'string'},
+                        'status': {'type': 'string', 'enum': ['queued', 'running', 'completed', 'failed']},
+                        'submitted_at': {'type': 'string'},
+                        'started_at': {'type': 'string'},
+                        'finished_at': {'type': 'string'},
+                        'result': {'type': 'object'},
+                        'error': {'type': 'string'}
+                    }
+                }
+            },
+            404: {'description': 'Job not found or expired'}
+        }
+    })
+    def get(self, job_id):
+        """Poll an asynchronous counting job"""
+        job = job_queue.get(job_id)
+        if not job:
+            return {"error": "Job not found"}, 404
+        return job, 200
+
+
 class CountAllObjectsResource(Resource):
-    """API endpoint for single object type detection and counting"""
+    """API endpoint for counting one or more object types in a single pipeline run"""
     
     @swag_from({
         'parameters': [
@@ -468,8 +827,15 @@ class CountAllObjectsResource(Resource):
                 'name': 'object_type',
                 'in': 'formData',
                 'type': 'string',
-                'required': True,
-                'description': 'Object type to detect and count'
+                'required': False,
+                'description': 'Object type to detect and count (use object_types for several)'
+            },
+            {
+                'name': 'object_types',
+                'in': 'formData',
+                'type': 'string',
+                'required': False,
+                'description': 'Comma-separated object types to count, or "all" for every registered type'
             },
             {
                 'name': 'description',
@@ -477,11 +843,18 @@ class CountAllObjectsResource(Resource):
                 'type': 'string',
                 'required': False,
                 'description': 'Optional description'
+            },
+            {
+                'name': 'confidence_threshold',
+                'in': 'formData',
+                'type': 'number',
+                'required': False,
+                'description': 'Confidence threshold for filtering segments (0.0-1.0)'
             }
         ],
         'responses': {
             200: {
-                'description': 'Single object detection successful',
+                'description': 'Object detection successful',
                 'schema': {
                     'type': 'object',
                     'properties': {
@@ -489,8 +862,20 @@ class CountAllObjectsResource(Resource):
                         'result_id': {'type': 'string'},
                         'object_type': {'type': 'string'},
                         'predicted_count': {'type': 'integer'},
+                        'results': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'result_id': {'type': 'string'},
+                                    'object_type': {'type': 'string'},
+                                    'predicted_count': {'type': 'integer'}
+                                }
+                            }
+                        },
                         'total_segments': {'type': 'integer'},
                         'processing_time': {'type': 'number'},
+                        'stage_timings': {'type': 'object', 'description': 'Seconds spent in each pipeline stage'},
                         'image_path': {'type': 'string'},
                         'created_at': {'type': 'string'}
                     }
@@ -518,9 +903,10 @@ class CountAllObjectsResource(Resource):
         }
     })
     def post(self):
-        """Upload image and get multi-object detection and counting"""
+        """Upload image and count one or more object types with a single pipeline run"""
         
-        # Check if pipeline is available
+        # Get the pipeline, loading the models on first use
+        pipeline, pipeline_error = pipeline_loader.get()
         if pipeline is None:
             return {
                 "error": "AI pipeline not available", 
@@ -534,7 +920,6 @@ class CountAllObjectsResource(Resource):
                 return {"error": "No image file provided"}, 400
             
             image_file = request.files['image']
-            object_type = request.form.get('object_type', '')
             description = request.form.get('description', '')
             
             # Get confidence threshold (optional)
@@ -548,15 +933,17 @@ class CountAllObjectsResource(Resource):
             if image_file.filename == '':
                 return {"error": "No image file selected"}, 400
             
-            if not object_type:
-                return {"error": "No object type specified"}, 400
-            
             if not allowed_file(image_file.filename):
                 return {
                     "error": "Invalid file type", 
                     "allowed_types": list(app.config['ALLOWED_EXTENSIONS'])
                 }, 400
             
+            # Collect requested object types from object_types (list or comma-separated) or object_type
+            object_types, error = resolve_object_types(request.form)
+            if error:
+                return error
+            
             # Save uploaded image
             filename = secure_filename(image_file.filename)
             unique_filename = f"{uuid.uuid4()}_{filename}"
@@ -566,55 +953,292 @@ class CountAllObjectsResource(Resource):
             os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
             image_file.save(image_path)
             
-            # Process only the specified object type
-            print(f"🎯 Processing image for object type: {object_type}")
+            print(f"🎯 Processing image for object types: {', '.join(object_types)}")
             
-            # Process image for the specified object type only
+            # Run the pipeline once and read every requested count from the same result
             try:
-                result = pipeline.count_objects(image_file, object_type, confidence_threshold)
-                
-                detected_objects = [{
-                    "type": object_type,
-                    "count": result["count"]
-                }]
-                total_objects = result["count"]
-                total_segments = result["total_segments"]
-                filtered_segments = result["filtered_segments"]
-                processing_time = result["processing_time"]
-                confidence_metrics = result["confidence_metrics"]
-                quality_assessment = result["quality_assessment"]
-                
-                print(f"✅ Detected {result['count']} {object_type} objects in {result['processing_time']:.2f}s")
-                
+                result = pipeline.count_all_objects(image_file, confidence_threshold)
             except Exception as e:
-                print(f"❌ Error detecting {object_type}: {e}")
-                return {"error": f"Failed to detect {object_type}: {str(e)}"}, 500
+                print(f"❌ Error detecting {', '.join(object_types)}: {e}")
+                return {"error": f"Failed to detect objects: {str(e)}"}, 500
             
-            # Save the detection result
-            output_record = save_prediction_result(
+            detected_counts = {obj["type"]: obj["count"] for obj in result["objects"]}
+            predicted_counts = {name: detected_counts.get(name, 0) for name in object_types}
+            confidence_metrics = result["confidence_metrics"]
+            
+            print(f"✅ Counted {predicted_counts} in {result['processing_time']:.2f}s")
+            
+            # Save one output per object type in a single transaction
+            default_description = f"Object detection: {', '.join(object_types)}" if len(object_types) > 1 \
+                else f"Single object detection: {object_types[0]}"
+            output_records = save_prediction_results(
                 image_path=unique_filename,
-                object_type_name=object_type,
-                predicted_count=total_objects,
-                description=description or f"Single object detection: {object_type}",
+                predicted_counts=predicted_counts,
+                description=description or default_description,
                 pred_confidence=confidence_metrics["average_confidence"]
             )
             
-            return {
+            response = {
                 "success": True,
-                "result_id": output_record.id,
-                "object_type": object_type,
-                "predicted_count": total_objects,
-                "total_segments": total_segments,
-                "filtered_segments": filtered_segments,
-                "processing_time": processing_time,
+                "results": [
+                    {
+                        "result_id": output_record.id,
+                        "object_type": object_type,
+                        "predicted_count": predicted_counts[object_type]
+                    } for object_type, output_record in zip(object_types, output_records)
+                ],
+                "total_segments": result["total_segments"],
+                "filtered_segments": result["filtered_segments"],
+                "processing_time": result["processing_time"],
+                "stage_timings": result["stage_timings"],
                 "image_path": f"uploads/{unique_filename}",
-                "created_at": output_record.created_at.isoformat(),
+                "created_at": output_records[0].created_at.isoformat(),
                 "confidence_metrics": confidence_metrics,
-                "quality_assessment": quality_assessment,
-                "confidence_threshold_used": result["confidence_threshold_used"]
+                "quality_assessment": result["quality_assessment"],
+                "confidence_threshold_used": result["confidence_threshold_used"],
+                "segmentation_scale": result["segmentation_scale"]
+            }
+            
+            # Keep the single-type response shape for existing clients
+            if len(object_types) == 1:
+                response.update({
+                    "result_id": output_records[0].id,
+                    "object_type": object_types[0],
+                    "predicted_count": predicted_counts[object_types[0]]
+                })
+            
+            return response, 200
+            
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+
+class BatchCountResource(Resource):
+    """API endpoint for counting object types in many images with one pipelined run"""
+    
+    @swag_from({
+        'parameters': [
+            {
+                'name': 'images',
+                'in': 'formData',
+                'type': 'file',
+                'required': True,
+                'description': 'Image files to analyze (repeat the field for each image)'
+            },
+            {
+                'name': 'object_types',
+                'in': 'formData',
+                'type': 'string',
+                'required': False,
+                'description': 'Comma-separated object types to count, or "all" for every registered type'
+            },
+            {
+                'name': 'object_type',
+                'in': 'formData',
+                'type': 'string',
+                'required': False,
+                'description': 'Single object type to count (use object_types for several)'
+            },
+            {
+                'name': 'description',
+                'in': 'formData',
+                'type': 'string',
+                'required': False,
+                'description': 'Optional description stored with every image'
+            },
+            {
+                'name': 'confidence_threshold',
+                'in': 'formData',
+                'type': 'number',
+                'required': False,
+                'description': 'Confidence threshold for filtering segments (0.0-1.0)'
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Batch counting successful',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'success': {'type': 'boolean'},
+                        'total_images': {'type': 'integer'},
+                        'processing_time': {'type': 'number'},
+                        'images': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'filename': {'type': 'string'},
+                                    'image_path': {'type': 'string'},
+                                    'results': {'type': 'array', 'items': {'type': 'object'}},
+                                    'total_segments': {'type': 'integer'},
+                                    'filtered_segments': {'type': 'integer'},
+                                    'stage_timings': {'type': 'object', 'description': 'Seconds spent in each pipeline stage'},
+                                    'cache_hit': {'type': 'boolean'}
+                                }
+                            }
+                        },
+                        'failed_images': {
+                            'type': 'array',
+                            'description': 'Images that could not be decoded; they are not stored',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'filename': {'type': 'string'},
+                                    'error': {'type': 'string'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            400: {'description': 'Bad request - missing parameters, invalid file type, too many images '
+                                 '(more than COUNT_BATCH_MAX_IMAGES, default 500) or no decodable image'},
+            413: {'description': 'Request body larger than COUNT_BATCH_MAX_CONTENT_LENGTH (default 512MB)'},
+            500: {'description': 'Server error'}
+        }
+    })
+    def post(self):
+        """Upload many images and count object types in all of them"""
+        
+        # Get the pipeline, loading the models on first use
+        pipeline, pipeline_error = pipeline_loader.get()
+        if pipeline is None:
+            return {
+                "error": "AI pipeline not available", 
+                "details": pipeline_error,
+                "solution": "Install dependencies and restart server"
+            }, 500
+        
+        unique_filenames = []
+        saved_paths = []
+        persisted = False
+        try:
+            # Validate request
+            image_files = [f for f in request.files.getlist('images') + request.files.getlist('image')
+                           if f.filename != '']
+            if not image_files:
+                return {"error": "No image files provided"}, 400
+            
+            max_images = app.config['COUNT_BATCH_MAX_IMAGES']
+            if len(image_files) > max_images:
+                return {"error": f"Too many images: {len(image_files)} (maximum {max_images})"}, 400
+            
+            invalid_files = [f.filename for f in image_files if not allowed_file(f.filename)]
+            if invalid_files:
+                return {
+                    "error": f"Invalid file type: {', '.join(invalid_files)}",
+                    "allowed_types": list(app.config['ALLOWED_EXTENSIONS'])
+                }, 400
+            
+            object_types, error = resolve_object_types(request.form)
+            if error:
+                return error
+            
+            description = request.form.get('description', '')
+            
+            # Get confidence threshold (optional)
+            confidence_threshold = request.form.get('confidence_threshold')
+            if confidence_threshold:
+                try:
+                    confidence_threshold = float(confidence_threshold)
+                except ValueError:
+                    confidence_threshold = None
+            
+            # Save uploaded images
+            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+            for image_file in image_files:
+                unique_filename = f"{uuid.uuid4()}_{secure_filename(image_file.filename)}"
+                image_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+                image_file.save(image_path)
+                unique_filenames.append(unique_filename)
+                saved_paths.append(image_path)
+            
+            print(f"🎯 Processing batch of {len(saved_paths)} images for object types: {', '.join(object_types)}")
+            start_time = time.time()
+            
+            # Decode, SAM, ResNet and label mapping overlap across the whole batch
+            try:
+                results = pipeline.count_all_objects_batch(saved_paths, confidence_threshold)
+            except Exception as e:
+                print(f"❌ Error processing batch: {e}")
+                remove_upload_files(unique_filenames)
+                return {"error": f"Failed to detect objects: {str(e)}"}, 500
+            
+            # Images that could not be decoded are reported, not stored
+            failed_images = []
+            counted = []
+            for image_file, unique_filename, result in zip(image_files, unique_filenames, results):
+                if "error" in result:
+                    failed_images.append({"filename": image_file.filename, "error": result["error"]})
+                    remove_upload_files([unique_filename])
+                else:
+                    counted.append((image_file, unique_filename, result))
+            
+            if not counted:
+                return {
+                    "error": "None of the images could be decoded",
+                    "failed_images": failed_images
+                }, 400
+            
+            # Save every prediction with one bulk insert
+            default_description = f"Batch object detection: {', '.join(object_types)}"
+            predictions = []
+            for _, unique_filename, result in counted:
+                detected_counts = {obj["type"]: obj["count"] for obj in result["objects"]}
+                predictions.append({
+                    'image_path': unique_filename,
+                    'predicted_counts': {name: detected_counts.get(name, 0) for name in object_types},
+                    'description': description or default_description,
+                    'pred_confidence': result["confidence_metrics"]["average_confidence"]
+                })
+            output_records = save_prediction_results_bulk(predictions)
+            persisted = True
+            
+            processing_time = time.time() - start_time
+            print(f"✅ Counted {len(counted)} images in {processing_time:.2f}s"
+                  + (f" ({len(failed_images)} could not be decoded)" if failed_images else ""))
+            
+            images = []
+            for (image_file, _, result), prediction, records in zip(counted, predictions, output_records):
+                images.append({
+                    "filename": image_file.filename,
+                    "image_path": f"uploads/{prediction['image_path']}",
+                    "results": [
+                        {
+                            "result_id": output_row['id'],
+                            "object_type": output_row['object_type'],
+                            "predicted_count": output_row['predicted_count']
+                        } for output_row in records
+                    ],
+                    "total_segments": result["total_segments"],
+                    "filtered_segments": result["filtered_segments"],
+                    "created_at": records[0]['created_at'].isoformat(),
+                    "confidence_metrics": result["confidence_metrics"],
+                    "quality_assessment": result["quality_assessment"],
+                    "segmentation_scale": result["segmentation_scale"],
+                    "stage_timings": result["stage_timings"],
+                    "cache_hit": result["cache_hit"]
+                })
+            
+            return {
+                "success": True,
+                "object_types": object_types,
+                "total_images": len(images),
+                "processing_time": round(processing_time, 2),
+                "confidence_threshold_used": confidence_threshold or pipeline.CONFIDENCE_THRESHOLD,
+                "images": images,
+                "failed_images": failed_images
             }, 200
             
+        except RequestEntityTooLarge:
+            limit_mb = app.config['COUNT_BATCH_MAX_CONTENT_LENGTH'] // (1024 * 1024)
+            return {"error": f"Request too large (maximum {limit_mb}MB per batch)"}, 413
         except Exception as e:
+            # Nothing references the uploads unless the results were committed
+            print(f"❌ Error in batch counting: {e}")
+            if not persisted:
+                remove_upload_files(unique_filenames)
             return {"error": str(e)}, 500
 
 
@@ -730,15 +1354,15 @@ class ObjectTypesResource(Resource):
     def get(self):
         """Get all available object types"""
         try:
-            object_types = get_all_object_types()
+            object_types = get_cached_object_types()
             return {
                 "object_types": [
                     {
-                        'id': obj_type.id,
-                        'name': obj_type.name,
-                        'description': obj_type.description,
-                        'created_at': obj_type.created_at.isoformat(),
-                        'updated_at': obj_type.updated_at.isoformat()
+                        'id': obj_type['id'],
+                        'name': obj_type['name'],
+                        'description': obj_type['description'],
+                        'created_at': obj_type['created_at'].isoformat(),
+                        'updated_at': obj_type['updated_at'].isoformat()
                     } for obj_type in object_types
                 ]
             }, 200
@@ -771,6 +1395,13 @@ class ResultsListResource(Resource):
                 'type': 'string',
                 'required': False,
                 'description': 'Filter by object type name'
+            },
+            {
+                'name': 'cursor',
+                'in': 'query',
+                'type': 'string',
+                'required': False,
+                'description': 'Keyset pagination: pass an empty value for the first page, then next_cursor (page is ignored)'
             }
         ],
         'responses': {
@@ -803,12 +1434,15 @@ class ResultsListResource(Resource):
                                 'page': {'type': 'integer'},
                                 'per_page': {'type': 'integer'},
                                 'total': {'type': 'integer'},
-                                'pages': {'type': 'integer'}
+                                'pages': {'type': 'integer'},
+                                'next_cursor': {'type': 'string'},
+                                'has_more': {'type': 'boolean'}
                             }
                         }
                     }
                 }
             },
+            400: {'description': 'Invalid cursor'},
             500: {
                 'description': 'Server error',
                 'schema': {
@@ -827,6 +1461,7 @@ class ResultsListResource(Resource):
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 10, type=int)
             object_type_filter = request.args.get('object_type')
+            cursor = request.args.get('cursor')
             
             # Validate parameters
             if page < 1:
@@ -834,6 +1469,20 @@ class ResultsListResource(Resource):
             if per_page < 1 or per_page > 100:
                 per_page = 10
             
+            # Keyset pagination when a cursor parameter is present (even empty)
+            if cursor is not None:
+                print(f"🔍 API Request - Cursor: {cursor or 'first page'}, Per Page: {per_page}, Filter: {object_type_filter}")
+                try:
+                    result_data = get_results_after_cursor(cursor, per_page, object_type_filter)
+                except ValueError as e:
+                    return {"error": str(e)}, 400
+                
+                return {
+                    "success": True,
+                    "results": result_data['results'],
+                    "pagination": result_data['pagination']
+                }, 200
+            
             print(f"🔍 API Request - Page: {page}, Per Page: {per_page}, Filter: {object_type_filter}")
             
             # Get results from database
@@ -854,6 +1503,285 @@ class ResultsListResource(Resource):
             return {"error": str(e)}, 500
 
 
+class StatsResource(Resource):
+    """Get aggregated prediction and accuracy statistics"""
+    
+    @swag_from({
+        'parameters': [
+            {
+                'name': 'start_date',
+                'in': 'query',
+                'type': 'string',
+                'required': False,
+                'description': 'Only results created on or after this date (YYYY-MM-DD or ISO datetime)'
+            },
+            {
+                'name': 'end_date',
+                'in': 'query',
+                'type': 'string',
+                'required': False,
+                'description': 'Only results created on or before this date (YYYY-MM-DD, inclusive, or ISO datetime)'
+            },
+            {
+                'name': 'object_type',
+                'in': 'query',
+                'type': 'string',
+                'required': False,
+                'description': 'Restrict statistics to one object type'
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Statistics computed successfully',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'success': {'type': 'boolean'},
+                        'totals': {
+                            'type': 'object',
+                            'properties': {
+                                'total_predictions': {'type': 'integer'},
+                                'corrected_predictions': {'type': 'integer'},
+                                'correction_rate': {'type': 'number'},
+                                'avg_confidence': {'type': 'number'},
+                                'total_predicted_count': {'type': 'integer'},
+                                'mean_absolute_error': {'type': 'number'},
+                                'exact_matches': {'type': 'integer'},
+                                'true_positives': {'type': 'integer'},
+                                'false_positives': {'type': 'integer'},
+                                'false_negatives': {'type': 'integer'},
+                                'precision': {'type': 'number'},
+                                'recall': {'type': 'number'},
+                                'f1_score': {'type': 'number'},
+                                'avg_f1_score': {'type': 'number'},
+                                'excellent_count': {'type': 'integer'},
+                                'good_count': {'type': 'integer'},
+                                'needs_review_count': {'type': 'integer'}
+                            }
+                        },
+                        'by_object_type': {
+                            'type': 'array',
+                            'items': {'type': 'object'}
+                        },
+                        'filters': {'type': 'object'}
+                    }
+                }
+            },
+            400: {'description': 'Invalid date range'},
+            500: {'description': 'Server error'}
+        }
+    })
+    def get(self):
+        """Get per-object-type and overall statistics computed in the database"""
+        try:
+            try:
+                start_date, end_date = parse_date_range(request.args)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+            object_type_filter = request.args.get('object_type')
+            
+            stats = get_result_stats(start_date, end_date, object_type_filter)
+            
+            return {
+                "success": True,
+                "totals": stats['totals'],
+                "by_object_type": stats['by_object_type'],
+                "filters": {
+                    "start_date": start_date.isoformat() if start_date else None,
+                    "end_date": end_date.isoformat() if end_date else None,
+                    "object_type": object_type_filter
+                }
+            }, 200
+            
+        except Exception as e:
+            print(f"❌ Error computing stats: {e}")
+            return {"error": str(e)}, 500
+
+
+class StatsTrendsResource(Resource):
+    """Get daily accuracy trends from the daily rollup"""
+    
+    @swag_from({
+        'parameters': [
+            {
+                'name': 'start_date',
+                'in': 'query',
+                'type': 'string',
+                'required': False,
+                'description': 'First day included (YYYY-MM-DD)'
+            },
+            {
+                'name': 'end_date',
+                'in': 'query',
+                'type': 'string',
+                'required': False,
+                'description': 'Last day included (YYYY-MM-DD)'
+            },
+            {
+                'name': 'object_type',
+                'in': 'query',
+                'type': 'string',
+                'required': False,
+                'description': 'Restrict trends to one object type'
+            },
+            {
+                'name': 'by_object_type',
+                'in': 'query',
+                'type': 'boolean',
+                'required': False,
+                'description': 'Return one entry per day and object type instead of per day'
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Trends computed successfully',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'success': {'type': 'boolean'},
+                        'trends': {
+                            'type': 'array',
+                            'items': {
+                                'type': 'object',
+                                'properties': {
+                                    'day': {'type': 'string'},
+                                    'object_type': {'type': 'string'},
+                                    'total_predictions': {'type': 'integer'},
+                                    'corrected_predictions': {'type': 'integer'},
+                                    'mean_absolute_error': {'type': 'number'},
+                                    'precision': {'type': 'number'},
+                                    'recall': {'type': 'number'},
+                                    'f1_score': {'type': 'number'},
+                                    'avg_f1_score': {'type': 'number'}
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            400: {'description': 'Invalid date range'},
+            500: {'description': 'Server error'}
+        }
+    })
+    def get(self):
+        """Get per-day statistics without scanning the outputs table"""
+        try:
+            try:
+                start_date, end_date = parse_date_range(request.args)
+            except ValueError as e:
+                return {"error": str(e)}, 400
+            object_type_filter = request.args.get('object_type')
+            by_object_type = request.args.get('by_object_type', '').lower() in ('1', 'true', 'yes')
+            
+            trends = get_accuracy_trends(start_date, end_date, object_type_filter, by_object_type)
+            
+            return {
+                "success": True,
+                "trends": trends
+            }, 200
+            
+        except Exception as e:
+            print(f"❌ Error computing trends: {e}")
+            return {"error": str(e)}, 500
+
+
+class StageLatencyResource(Resource):
+    """Latency distribution of each counting pipeline stage in this process"""
+    
+    @swag_from({
+        'parameters': [
+            {
+                'name': 'reset',
+                'in': 'query',
+                'type': 'boolean',
+                'required': False,
+                'description': 'Clear the histogram after reading it'
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Per-stage count, mean and estimated percentiles in seconds',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'success': {'type': 'boolean'},
+                        'stages': {
+                            'type': 'object',
+                            'additionalProperties': {
+                                'type': 'object',
+                                'properties': {
+                                    'count': {'type': 'integer'},
+                                    'mean': {'type': 'number'},
+                                    'p50': {'type': 'number'},
+                                    'p95': {'type': 'number'},
+                                    'p99': {'type': 'number'}
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    })
+    def get(self):
+        """Summarize the stage latency histogram"""
+        stages = stage_latency.summary()
+        if request.args.get('reset', '').lower() in ('1', 'true', 'yes'):
+            stage_latency.reset()
+        
+        return {
+            "success": True,
+            "stages": stages
+        }, 200
+
+
+class MetricsResource(Resource):
+    """Prometheus metrics: requests, pipeline stages, caches, database and queues"""
+    
+    @swag_from({
+        'produces': ['text/plain'],
+        'responses': {
+            200: {'description': 'Metrics in the Prometheus text exposition format (version 0.0.4)'}
+        }
+    })
+    def get(self):
+        """Render every metric; model caches are reported once the pipeline is loaded"""
+        blocks = [
+            http_requests.render(),
+            http_request_latency.render(),
+            stage_latency.render(),
+            segments_per_image.render(),
+            db_query_latency.render(),
+            render_sampled('pipeline_ready', 'Whether the AI pipeline is loaded and warmed up',
+                           {(): int(pipeline_loader.ready)})
+        ]
+        
+        pipeline = pipeline_loader.pipeline
+        if pipeline is not None:
+            caches = pipeline.cache_stats()
+            blocks += [
+                render_sampled('pipeline_cache_hits_total', 'Pipeline cache hits',
+                               {name: stats['hits'] for name, stats in caches.items()}, ('cache',), 'counter'),
+                render_sampled('pipeline_cache_misses_total', 'Pipeline cache misses',
+                               {name: stats['misses'] for name, stats in caches.items()}, ('cache',), 'counter'),
+                render_sampled('pipeline_cache_hit_ratio', 'Pipeline cache hits per lookup',
+                               {name: stats['hit_rate'] for name, stats in caches.items()}, ('cache',)),
+                render_sampled('pipeline_cache_entries', 'Entries held by each pipeline cache',
+                               {name: stats['size'] for name, stats in caches.items()}, ('cache',))
+            ]
+        
+        queues = {queue.name: queue.stats() for queue in (job_queue, file_cleanup_queue)}
+        blocks += [
+            render_sampled('job_queue_depth', 'Jobs waiting or running in each background queue',
+                           {(name, state): stats[state] for name, stats in queues.items()
+                            for state in ('queued', 'running')}, ('queue', 'state')),
+            render_sampled('job_queue_capacity', 'Jobs each background queue accepts before rejecting',
+                           {name: stats['max_size'] for name, stats in queues.items()}, ('queue',))
+        ]
+        
+        return app.response_class(render_metrics(*blocks), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 class ResultDetailsResource(Resource):
     """Get detailed information for a specific result"""
     
@@ -910,7 +1838,7 @@ class ResultDetailsResource(Resource):
                 return {"error": "Result not found"}, 404
             
             # Get related data
-            object_type = get_object_type_by_name(output.object_type.name) if output.object_type else None
+            object_type = output.object_type
             
             # Calculate F1 Score if feedback exists
             f1_metrics = None
@@ -1010,21 +1938,120 @@ class DeleteResultResource(Resource):
             return {"error": str(e)}, 500
 
 
+class BulkDeleteResultsResource(Resource):
+    """Delete many results and their associated data in one transaction"""
+    
+    @swag_from({
+        'parameters': [
+            {
+                'name': 'body',
+                'in': 'body',
+                'required': True,
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'result_ids': {
+                            'type': 'array',
+                            'items': {'type': 'string'},
+                            'description': 'UUIDs of the results to delete'
+                        }
+                    },
+                    'required': ['result_ids']
+                }
+            }
+        ],
+        'responses': {
+            200: {
+                'description': 'Results deleted',
+                'schema': {
+                    'type': 'object',
+                    'properties': {
+                        'success': {'type': 'boolean'},
+                        'deleted_count': {'type': 'integer'},
+                        'deleted_result_ids': {'type': 'array', 'items': {'type': 'string'}},
+                        'deleted_outputs': {'type': 'integer'},
+                        'deleted_inputs': {'type': 'integer', 'description': 'Images removed because none of their results remain'},
+                        'failed_count': {'type': 'integer'},
+                        'failures': {'type': 'array', 'items': {'type': 'object'}},
+                        'files_queued': {'type': 'integer'},
+                        'message': {'type': 'string'}
+                    }
+                }
+            },
+            400: {'description': 'Invalid request body'},
+            500: {'description': 'Server error'}
+        }
+    })
+    def delete(self):
+        """Delete results with set-based DELETEs and remove their images in the background"""
+        try:
+            data = request.get_json(silent=True)
+            if not data:
+                return {"error": "No data provided"}, 400
+            
+            result_ids = data.get('result_ids', [])
+            if not isinstance(result_ids, list):
+                return {"error": "result_ids must be a list"}, 400
+            if not result_ids:
+                return {"error": "No result IDs provided"}, 400
+            if not all(isinstance(result_id, str) and result_id for result_id in result_ids):
+                return {"error": "All result IDs must be strings"}, 400
+            
+            deleted = delete_outputs(result_ids)
+            
+            # Files go after the commit, off the request thread
+            if deleted['image_paths']:
+                try:
+                    file_cleanup_queue.submit(image_paths=deleted['image_paths'])
+                except QueueFullError:
+                    remove_upload_files(deleted['image_paths'])
+            
+            failures = [{"id": result_id, "reason": "Result not found"} for result_id in deleted['missing_ids']]
+            message = f"Successfully deleted {len(deleted['deleted_result_ids'])} results"
+            if failures:
+                message += f", {len(failures)} failures"
+            
+            return {
+                "success": True,
+                "deleted_count": len(deleted['deleted_result_ids']),
+                "deleted_result_ids": deleted['deleted_result_ids'],
+                "deleted_outputs": deleted['deleted_outputs'],
+                "deleted_inputs": deleted['deleted_inputs'],
+                "failed_count": len(failures),
+                "failures": failures,
+                "files_queued": len(deleted['image_paths']),
+                "message": message
+            }, 200
+            
+        except Exception as e:
+            print(f"❌ Error in bulk deletion: {e}")
+            return {"error": str(e)}, 500
+
+
 # ============================================================================
 # API ROUTES
 # ============================================================================
 
 # Add API resources
 api.add_resource(HealthResource, '/health')
+api.add_resource(LivenessResource, '/health/live')
+api.add_resource(ReadinessResource, '/health/ready')
 api.add_resource(InitDatabaseResource, '/api/init-db')
 api.add_resource(TestPipelineResource, '/test-pipeline')
 api.add_resource(CountObjectsResource, '/api/count')
 api.add_resource(CountAllObjectsResource, '/api/count-all')
+api.add_resource(BatchCountResource, '/api/count/batch')
+api.add_resource(JobStatusResource, '/api/jobs/<string:job_id>')
 api.add_resource(CorrectPredictionResource, '/api/correct')
 api.add_resource(ObjectTypesResource, '/api/object-types')
 api.add_resource(ResultsListResource, '/api/results')
+api.add_resource(StatsResource, '/api/stats')
+api.add_resource(StatsTrendsResource, '/api/stats/trends')
+api.add_resource(StageLatencyResource, '/api/metrics/stages')
+api.add_resource(MetricsResource, '/metrics')
 api.add_resource(ResultDetailsResource, '/api/results/<string:result_id>')
 api.add_resource(DeleteResultResource, '/api/results/<string:result_id>/delete')
+api.add_resource(BulkDeleteResultsResource, '/api/results/bulk-delete')
 
 
 # ============================================================================
@@ -1088,14 +2115,23 @@ if __name__ == '__main__':
     print("Starting Object Counting API (Restructured with MySQL)...")
     print("Available endpoints:")
     print("  GET  /health - Health check")
+    print("  GET  /health/live - Liveness probe")
+    print("  GET  /health/ready - Readiness probe (models loaded and warmed up)")
     print("  POST /test-pipeline - Test the AI pipeline")
     print("  POST /api/count - Count objects in image")
-    print("  POST /api/count-all - Count specific object type in image")
+    print("  POST /api/count-all - Count one or more object types in image")
+    print("  POST /api/count/batch - Count object types in many images")
+    print("  GET  /api/jobs/<id> - Poll an asynchronous counting job")
     print("  PUT  /api/correct - Correct prediction")
     print("  GET  /api/object-types - Get available object types")
     print("  GET  /api/results - Get all results with pagination")
+    print("  GET  /api/stats - Aggregated accuracy statistics")
+    print("  GET  /api/stats/trends - Daily accuracy trends")
+    print("  GET  /api/metrics/stages - Per-stage pipeline latency")
+    print("  GET  /metrics - Prometheus metrics")
     print("  GET  /api/results/<id> - Get result details")
     print("  DELETE /api/results/<id>/delete - Delete result")
+    print("  DELETE /api/results/bulk-delete - Delete several results")
     print("  GET  /docs - Swagger API documentation")
     print("  GET  /uploads/<filename> - Serve uploaded images")
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""Results Backfill Script
+Loads historical predictions from a CSV file into the database with
+save_prediction_results_bulk, one executemany batch per chunk of images.
+
+CSV columns (header required):
+    image_path, object_type, predicted_count   required
+    corrected_count, pred_confidence,
+    created_at (ISO 8601), description          optional
+Rows sharing an image_path become outputs of the same input.
+"""
+import argparse
+import csv
+import sys
+import time
+from datetime import datetime
+
+from storage.database_functions import init_database, save_prediction_results_bulk
+
+
+def read_predictions(path):
+    """Group CSV rows into save_prediction_results_bulk predictions"""
+    predictions = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                prediction = predictions.setdefault(row['image_path'], {
+                    'image_path': row['image_path'],
+                    'description': row.get('description') or '',
+                    'predicted_counts': {},
+                    'corrected_counts': {}
+                })
+                object_type = row['object_type']
+                prediction['predicted_counts'][object_type] = int(row['predicted_count'])
+                if row.get('corrected_count'):
+                    prediction['corrected_counts'][object_type] = int(row['corrected_count'])
+                if row.get('pred_confidence'):
+                    prediction['pred_confidence'] = float(row['pred_confidence'])
+                if row.get('created_at'):
+                    prediction['created_at'] = datetime.fromisoformat(row['created_at'])
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"{path}:{line_number}: invalid row ({e})")
+    return list(predictions.values())
+
+
+def main():
+    """Backfill results from a CSV file"""
+    parser = argparse.ArgumentParser(description='Backfill historical prediction results')
+    parser.add_argument('csv_file', help='CSV file with one row per (image, object type)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Images inserted per transaction (default: 1000)')
+    args = parser.parse_args()
+
+    init_database()
+    predictions = read_predictions(args.csv_file)
+    print(f"📥 Backfilling {len(predictions)} images from {args.csv_file}...")
+
+    start_time = time.time()
+    saved_outputs = 0
+    for start in range(0, len(predictions), args.batch_size):
+        saved = save_prediction_results_bulk(predictions[start:start + args.batch_size])
+        saved_outputs += sum(len(outputs) for outputs in saved)
+
+    print(f"✅ Backfilled {saved_outputs} results in {time.time() - start_time:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
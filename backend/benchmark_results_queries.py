@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+"""Results Query Benchmark
+Seeds a throwaway SQLite database with a large outputs table, measures the
+result listing queries without the listing indexes, applies the schema
+migrations and measures them again.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+# The storage package connects on import, so point it at a scratch database first
+_db_dir = tempfile.mkdtemp(prefix='obj_detect_bench_')
+os.environ['OBJ_DETECT_ENV'] = 'test'
+os.environ['OBJ_DETECT_MYSQL_DB'] = os.path.join(_db_dir, 'bench.sqlite')
+
+from sqlalchemy import delete, insert, text  # noqa: E402
+
+from storage import database  # noqa: E402
+from storage.database_functions import (  # noqa: E402
+    encode_results_cursor, get_all_results, get_results_after_cursor, init_database
+)
+from storage.inputs import Input  # noqa: E402
+from storage.migrations import MIGRATIONS, run_migrations, schema_migrations  # noqa: E402
+from storage.object_types import ObjectType  # noqa: E402
+from storage.outputs import Output  # noqa: E402
+
+
+def seed(rows, chunk_size=10000):
+    """Insert rows inputs with one output each, spread over a year"""
+    type_ids = [object_type.id for object_type in database.get_all(ObjectType)]
+    engine = database.get_engine()
+    start = datetime.now() - timedelta(days=365)
+    rng = random.Random(0)
+
+    with engine.begin() as connection:
+        for offset in range(0, rows, chunk_size):
+            inputs, outputs = [], []
+            for i in range(offset, min(offset + chunk_size, rows)):
+                created_at = start + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+                input_id = str(uuid.uuid4())
+                inputs.append({
+                    'id': input_id, 'created_at': created_at, 'updated_at': created_at,
+                    'image_path': f"bench_{i}.jpg", 'description': ''
+                })
+                outputs.append({
+                    'id': str(uuid.uuid4()), 'created_at': created_at, 'updated_at': created_at,
+                    'predicted_count': rng.randrange(20), 'corrected_count': None,
+                    'pred_confidence': rng.random(), 'object_type_id': rng.choice(type_ids),
+                    'input_id': input_id
+                })
+            connection.execute(insert(Input), inputs)
+            connection.execute(insert(Output), outputs)
+
+
+def drop_listing_indexes():
+    """Make the database look like one created before migration 0001"""
+    with database.get_engine().begin() as connection:
+        for index in Output.__table__.indexes:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        connection.execute(delete(schema_migrations))
+
+
+def time_query(func, repeats):
+    """Return the best wall time of several runs in milliseconds"""
+    best = float('inf')
+    for _ in range(repeats):
+        database.close()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure(rows, per_page, repeats):
+    """Time the listing queries the API issues"""
+    deep_page = max(2, rows // per_page // 2)
+
+    # Cursor pointing at the same depth as the deep OFFSET page
+    last_row = get_all_results(deep_page - 1, per_page)['results'][-1]
+    cursor = encode_results_cursor(datetime.fromisoformat(last_row['created_at']), last_row['id'])
+
+    queries = {
+        'first page': lambda: get_all_results(1, per_page),
+        f'page {deep_page} (OFFSET)': lambda: get_all_results(deep_page, per_page),
+        'first page, filtered': lambda: get_all_results(1, per_page, 'car'),
+        'deep page, filtered': lambda: get_all_results(deep_page // 15 or 1, per_page, 'car'),
+        f'page {deep_page} (cursor)': lambda: get_results_after_cursor(cursor, per_page),
+        'first page (cursor), filtered': lambda: get_results_after_cursor('', per_page, 'car'),
+    }
+    return {name: time_query(func, repeats) for name, func in queries.items()}
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark result listing queries before and after migrations')
+    parser.add_argument('--rows', type=int, default=200000, help='Outputs to seed')
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    init_database()
+
+    print(f"🌱 Seeding {args.rows} outputs into {os.environ['OBJ_DETECT_MYSQL_DB']}...")
+    start_time = time.time()
+    seed(args.rows)
+    print(f"   seeded in {time.time() - start_time:.1f}s")
+
+    drop_listing_indexes()
+    before = measure(args.rows, args.per_page, args.repeats)
+
+    print(f"🏗️  Applying {len(MIGRATIONS)} migration(s)...")
+    run_migrations(database.get_engine())
+    with database.get_engine().begin() as connection:
+        connection.execute(text("ANALYZE"))
+    after = measure(args.rows, args.per_page, args.repeats)
+
+    print(f"\n   {'query':<30}{'before (ms)':>12}{'after (ms)':>12}{'speedup':>9}")
+    for name in before:
+        print(f"   {name:<30}{before[name]:>12.1f}{after[name]:>12.1f}{before[name] / after[name]:>8.1f}x")
+
+    database.close()
+    os.remove(os.environ['OBJ_DETECT_MYSQL_DB'])
+    os.rmdir(_db_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""Segment Extraction Benchmark
+Compares the original mask selection, panoptic painting and per-label
+full-image segment extraction with the heap selection and window-based
+helpers in models/segmentation.py on synthetic SAM masks, and checks that
+both paths produce identical segments.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import torch
+import torchvision.transforms as tf
+from PIL import Image
+
+from models.segmentation import (
+    build_panoptic_map, extract_segments, mask_window, select_top_masks
+)
+
+
+def make_synthetic_masks(height, width, count, rng):
+    """Create SAM-like mask records with elliptical segmentations"""
+    yy, xx = np.ogrid[:height, :width]
+    masks = []
+    for _ in range(count):
+        ry = rng.integers(height // 20, height // 4)
+        rx = rng.integers(width // 20, width // 4)
+        cy = rng.integers(ry, height - ry)
+        cx = rng.integers(rx, width - rx)
+        segmentation = ((yy - cy) / ry) ** 2 + ((xx - cx) / rx) ** 2 <= 1.0
+        rows = np.flatnonzero(segmentation.any(axis=1))
+        cols = np.flatnonzero(segmentation.any(axis=0))
+        masks.append({
+            'segmentation': segmentation,
+            'area': int(segmentation.sum()),
+            # SAM stores XYWH boxes where x + w is the last column
+            'bbox': [int(cols[0]), int(rows[0]), int(cols[-1] - cols[0]), int(rows[-1] - rows[0])]
+        })
+    return masks
+
+
+def legacy_build_panoptic_map(masks, top_n, height, width):
+    """Original full sort and full-image painting from segment_image"""
+    masks_sorted = sorted(masks, key=lambda x: x['area'], reverse=True)
+    panoptic_map = np.zeros((height, width), dtype=np.int32)
+    for idx, mask_data in enumerate(masks_sorted[:top_n]):
+        panoptic_map[mask_data['segmentation']] = idx + 1
+    return panoptic_map
+
+
+def legacy_get_mask_box(tensor):
+    """Original bounding box helper from ObjectCountingPipeline"""
+    non_zero_indices = torch.nonzero(tensor, as_tuple=True)[0]
+    if non_zero_indices.shape[0] == 0:
+        return None, None
+    return non_zero_indices[:1].item(), non_zero_indices[-1:].item()
+
+
+def legacy_extract_segments(image, panoptic_map):
+    """Original segment extraction from ObjectCountingPipeline.segment_image"""
+    predicted_panoptic_map = torch.from_numpy(panoptic_map)
+    img_tensor = tf.Compose([tf.PILToTensor()])(image)
+
+    segments = []
+    for label in predicted_panoptic_map.unique():
+        if label == 0:
+            continue
+
+        y_start, y_end = legacy_get_mask_box(predicted_panoptic_map == label)
+        x_start, x_end = legacy_get_mask_box((predicted_panoptic_map == label).T)
+        if y_start is None or x_start is None:
+            continue
+
+        cropped_tensor = img_tensor[:, y_start:y_end+1, x_start:x_end+1]
+        cropped_mask = predicted_panoptic_map[y_start:y_end+1, x_start:x_end+1] == label
+
+        segment = cropped_tensor * cropped_mask.unsqueeze(0)
+        segment[:, ~cropped_mask] = 188
+        segments.append(segment)
+
+    return segments
+
+
+def time_call(func, repeats):
+    """Return the best wall time of several runs and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark segment extraction')
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--masks', type=int, default=50,
+                        help='Masks returned by the synthetic SAM run')
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    image_array = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    image = Image.fromarray(image_array)
+    masks = make_synthetic_masks(args.height, args.width, args.masks, rng)
+
+    print(f"📐 Image {args.width}x{args.height}, {args.masks} masks, top {args.top_n}")
+
+    def legacy():
+        panoptic_map = legacy_build_panoptic_map(masks, args.top_n, args.height, args.width)
+        return legacy_extract_segments(image, panoptic_map)
+
+    legacy_time, legacy_segments = time_call(legacy, args.repeats)
+
+    def windowed():
+        top_masks = select_top_masks(masks, args.top_n)
+        windows = [mask_window(m, args.height, args.width) for m in top_masks]
+        panoptic_map = build_panoptic_map(top_masks, windows, args.height, args.width)
+        return extract_segments(image_array, panoptic_map, windows)
+
+    windowed_time, windowed_segments = time_call(windowed, args.repeats)
+
+    identical = (len(legacy_segments) == len(windowed_segments) and
+                 all(torch.equal(a, b) for a, b in zip(legacy_segments, windowed_segments)))
+
+    print(f"   legacy path:         {legacy_time * 1000:8.1f} ms")
+    print(f"   windowed path:       {windowed_time * 1000:8.1f} ms")
+    print(f"   speedup:             {legacy_time / windowed_time:8.1f}x")
+    print(f"   identical segments:  {identical}")
+
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""Label Table Build Script
+Runs the zero-shot classifier once over every ImageNet class of the ResNet-50
+model and writes the precomputed ImageNet-to-category lookup table used by
+the pipeline's "table" label mapping mode
+(OBJ_DETECT_LABEL_MAPPING_MODE=table).
+"""
+import argparse
+import sys
+import time
+
+import torch
+from transformers import AutoConfig, pipeline
+
+from models.label_mapping import CANDIDATE_LABELS, ZERO_SHOT_MODEL, LabelMappingTable
+
+
+def main():
+    """Build and save the label mapping table"""
+    parser = argparse.ArgumentParser(description='Build the ImageNet-to-category lookup table')
+    parser.add_argument('--output', default='label_table.npz',
+                        help='Destination .npz file (default: label_table.npz)')
+    parser.add_argument('--classification-model', default='microsoft/resnet-50',
+                        help='Model whose id2label classes are mapped')
+    parser.add_argument('--batch-size', type=int, default=32,
+                        help='Class names per zero-shot forward pass')
+    args = parser.parse_args()
+
+    print("🏗️  Building label mapping table...")
+    start_time = time.time()
+
+    id2label = AutoConfig.from_pretrained(args.classification_model).id2label
+    device_id = 0 if torch.cuda.is_available() else -1
+    label_classifier = pipeline(
+        "zero-shot-classification",
+        model=ZERO_SHOT_MODEL,
+        device=device_id
+    )
+
+    print(f"📋 Mapping {len(id2label)} classes onto {len(CANDIDATE_LABELS)} categories...")
+    table = LabelMappingTable.build(label_classifier, id2label, CANDIDATE_LABELS, args.batch_size)
+    table.save(args.output)
+
+    print(f"✅ Label mapping table written to {args.output} in {time.time() - start_time:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,11 +16,31 @@ class Config:
     OBJ_DETECT_MYSQL_DB = os.environ.get('OBJ_DETECT_MYSQL_DB', 'obj_detect_dev_db')
     OBJ_DETECT_ENV = os.environ.get('OBJ_DETECT_ENV', 'development')
     
+    # Database connection pool (sessions are scoped to each request)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 3600))  # Seconds, below MySQL wait_timeout
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    
     # File upload settings
     UPLOAD_FOLDER = 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
     
+    # Asynchronous counting queue (POST /api/count with async=true)
+    COUNT_QUEUE_WORKERS = int(os.environ.get('COUNT_QUEUE_WORKERS', 1))
+    COUNT_QUEUE_MAX_SIZE = int(os.environ.get('COUNT_QUEUE_MAX_SIZE', 16))
+    
+    # Multi-image uploads (POST /api/count/batch) have their own request size cap,
+    # since MAX_CONTENT_LENGTH would stop a batch long before COUNT_BATCH_MAX_IMAGES
+    COUNT_BATCH_MAX_IMAGES = int(os.environ.get('COUNT_BATCH_MAX_IMAGES', 500))
+    COUNT_BATCH_MAX_CONTENT_LENGTH = int(os.environ.get('COUNT_BATCH_MAX_CONTENT_LENGTH', 512 * 1024 * 1024))
+    
+    # Build the AI pipeline in a background thread at startup instead of on the first counting request
+    PIPELINE_PRELOAD = os.environ.get('PIPELINE_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+    # Run a synthetic image through every model before reporting ready
+    PIPELINE_WARMUP = os.environ.get('PIPELINE_WARMUP', 'true').lower() in ('1', 'true', 'yes')
+    
     # API settings
     API_TITLE = 'Object Counting API'
     API_VERSION = 'v1'
@@ -42,6 +62,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     OBJ_DETECT_ENV = 'test'
+    PIPELINE_PRELOAD = False
     OBJ_DETECT_MYSQL_USER = os.environ.get('OBJ_DETECT_MYSQL_USER', 'obj_detect_test')
     OBJ_DETECT_MYSQL_PWD = os.environ.get('OBJ_DETECT_MYSQL_PWD', 'obj_detect_test_pwd')
     OBJ_DETECT_MYSQL_HOST = os.environ.get('OBJ_DETECT_MYSQL_HOST', 'localhost')
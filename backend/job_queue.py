@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""Job Queue - Module
+Bounded in-process queues and worker pools for background jobs
+(asynchronous counting requests, upload file cleanup)
+"""
+import queue
+import threading
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job"""
+
+
+class JobQueue:
+    """Runs background jobs on a fixed pool of worker threads
+    Jobs are handed to `handler(**payload)`, whose return value becomes the
+    job result. Workers bound how many jobs run at once, but request threads
+    may call the same code synchronously, so shared state the handler uses
+    must protect itself (the AI pipeline serializes each model with a lock).
+    Attrs:
+        max_size: queued jobs allowed before submit() raises QueueFullError
+        workers: number of worker threads
+        max_finished: finished jobs kept for polling before the oldest are dropped
+        name: queue name used in logs, metrics and worker thread names
+    """
+
+    def __init__(self, handler, workers=1, max_size=16, max_finished=1000, teardown=None, name='jobs'):
+        """Initializes the queue (workers start on the first submission)
+        Args:
+            teardown: optional callable run by the worker after every job,
+                e.g. to release the thread's database session
+            name: queue name, e.g. 'counting'
+        """
+        self.handler = handler
+        self.teardown = teardown
+        self.workers = workers
+        self.max_size = max_size
+        self.max_finished = max_finished
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_size)
+        self._jobs = OrderedDict()
+        self._finished = deque()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads if they are not running yet"""
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"{self.name}-worker-{index}")
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, **payload):
+        """Queue a job
+        Args:
+            payload: keyword arguments passed to the handler
+        Return: job id
+        Raises: QueueFullError if max_size jobs are already waiting
+        """
+        self.start()
+
+        job_id = str(uuid.uuid4())
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'submitted_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+
+        with self._lock:
+            try:
+                self._queue.put_nowait((job_id, payload))
+            except queue.Full:
+                raise QueueFullError(f"Job queue is full ({self.max_size} jobs waiting)")
+            self._jobs[job_id] = job
+
+        return job_id
+
+    def get(self, job_id):
+        """Get a snapshot of a job's state
+        Args:
+            job_id: id returned by submit()
+        Return: dict copy of the job, or None if unknown or expired
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        """Get queue depth and worker information"""
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job['status'] == 'running')
+            return {
+                'queued': self._queue.qsize(),
+                'running': running,
+                'workers': self.workers,
+                'max_size': self.max_size
+            }
+
+    def _worker(self):
+        """Worker loop: run queued jobs one at a time"""
+        while True:
+            job_id, payload = self._queue.get()
+            self._update(job_id, status='running', started_at=datetime.now().isoformat())
+
+            try:
+                result = self.handler(**payload)
+                self._update(job_id, status='completed', result=result)
+            except Exception as e:
+                print(f"❌ {self.name} job {job_id} failed: {e}")
+                self._update(job_id, status='failed', error=str(e))
+            finally:
+                if self.teardown:
+                    try:
+                        self.teardown()
+                    except Exception as e:
+                        print(f"⚠️  Job teardown failed: {e}")
+                self._update(job_id, finished_at=datetime.now().isoformat())
+                self._retire(job_id)
+                self._queue.task_done()
+
+    def _update(self, job_id, **fields):
+        """Update fields of a tracked job"""
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _retire(self, job_id):
+        """Remember a finished job and drop the oldest beyond max_finished"""
+        with self._lock:
+            self._finished.append(job_id)
+            while len(self._finished) > self.max_finished:
+                self._jobs.pop(self._finished.popleft(), None)
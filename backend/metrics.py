@@ -0,0 +1,316 @@
+#!/usr/bin/python3
+"""Metrics - Module
+In-process counters and histograms, rendered in the Prometheus text format.
+Every thread records into its own shard, so counting or observing a value
+never takes a lock; shards are only summed when a metric is read, and the
+shards of finished threads are folded into one retired total.
+"""
+import bisect
+import math
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds in seconds, from sub-millisecond stages up to full SAM runs on CPU
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# Upper bounds for segments per image (the pipeline keeps at most TOP_N masks)
+SEGMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Statement kinds DB query latency is labelled with; anything else is 'other'
+QUERY_KINDS = ('select', 'insert', 'update', 'delete')
+
+
+def _format_value(value):
+    """Format a sample value or bucket bound for the text format"""
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _format_labels(label_names, label, extra=None):
+    """Format a label set as {name="value",...}
+    Args:
+        label_names: names of the metric's labels
+        label: one value, or a tuple with one value per label name
+        extra: optional (name, value) pair appended last, e.g. the le bound
+    """
+    values = label if isinstance(label, tuple) else (label,)
+    pairs = list(zip(label_names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class _ThreadShardedMetric:
+    """Base for metrics that keep one label -> series dict per thread
+    Attrs:
+        name: metric name
+        description: what is measured
+        label_names: names of the labels series are keyed by
+    """
+
+    def __init__(self, name, description, label_names):
+        """Initializes an empty metric"""
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        """Get the calling thread's shard, registering it on first use"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._fold_finished_threads()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _fold_finished_threads(self):
+        """Merge shards of finished threads into the retired total (lock held)
+        Servers that start a thread per request would otherwise keep one
+        shard per request forever.
+        """
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+
+    @staticmethod
+    def _merge(totals, shard):
+        """Add every series of a shard to totals"""
+        for label, series in list(shard.items()):
+            values = list(series)
+            total = totals.setdefault(label, [0] * len(values))
+            for index, value in enumerate(values):
+                total[index] += value
+
+    def _totals(self):
+        """Sum the retired total and every live shard: label -> series"""
+        with self._lock:
+            self._fold_finished_threads()
+            shards = [shard for _, shard in self._shards]
+            totals = {label: list(series) for label, series in self._retired.items()}
+
+        for shard in shards:
+            self._merge(totals, shard)
+        return totals
+
+    def reset(self):
+        """Drop every observation"""
+        with self._lock:
+            self._retired.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+
+class Counter(_ThreadShardedMetric):
+    """Monotonic count per label, e.g. requests per endpoint"""
+
+    def __init__(self, name, description, label_names=()):
+        """Initializes a counter at zero"""
+        super().__init__(name, description, label_names)
+
+    def inc(self, label=(), amount=1):
+        """Add to a series
+        Args:
+            label: one label value, or a tuple with one value per label name
+            amount: non-negative amount to add
+        """
+        shard = self._shard()
+        series = shard.get(label)
+        if series is None:
+            series = shard[label] = [0]
+        series[0] += amount
+
+    def snapshot(self):
+        """Sum every thread's shard
+        Return: dict label -> count
+        """
+        return {label: series[0] for label, series in self._totals().items()}
+
+    def render(self):
+        """Lines of the metric in the Prometheus text format"""
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} counter']
+        for label, value in sorted(self.snapshot().items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, label)} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_ThreadShardedMetric):
+    """Bucketed distribution of observations per label
+    Attrs:
+        buckets: sorted bucket upper bounds; an implicit +Inf bucket follows
+    """
+
+    def __init__(self, name, description, buckets=DEFAULT_LATENCY_BUCKETS, label_names=('label',)):
+        """Initializes an empty histogram"""
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, label, value):
+        """Record one observation
+        Args:
+            label: series label, e.g. a stage name
+            value: observed value (seconds for latency histograms)
+        """
+        shard = self._shard()
+        series = shard.get(label)
+        if series is None:
+            series = shard[label] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def observe_many(self, values):
+        """Record one observation per label from a dict of label -> value"""
+        for label, value in values.items():
+            self.observe(label, value)
+
+    def snapshot(self):
+        """Sum every thread's shard
+        Return: dict label -> {'counts': per-bucket counts (last is +Inf), 'count', 'sum'}
+        """
+        return {
+            label: {'counts': total[:-1], 'count': sum(total[:-1]), 'sum': total[-1]}
+            for label, total in self._totals().items()
+        }
+
+    def quantile(self, counts, q):
+        """Estimate a quantile from bucket counts by linear interpolation
+        Args:
+            counts: per-bucket counts from snapshot()
+            q: quantile between 0 and 1
+        Return: estimated value, or None without observations
+        """
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def summary(self):
+        """Per-label count, mean and estimated p50/p95/p99, for JSON responses"""
+        summary = {}
+        for label, series in sorted(self.snapshot().items()):
+            count = series['count']
+            summary[label] = {
+                'count': count,
+                'mean': series['sum'] / count if count else None,
+                'p50': self.quantile(series['counts'], 0.5),
+                'p95': self.quantile(series['counts'], 0.95),
+                'p99': self.quantile(series['counts'], 0.99)
+            }
+        return summary
+
+    def render(self):
+        """Lines of the metric in the Prometheus text format (cumulative buckets)"""
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+        for label, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series['counts']):
+                cumulative += count
+                labels = _format_labels(self.label_names, label, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.label_names, label)
+            lines.append(f'{self.name}_sum{labels} {_format_value(series["sum"])}')
+            lines.append(f'{self.name}_count{labels} {series["count"]}')
+        return lines
+
+
+def render_sampled(name, description, values, label_names=(), metric_type='gauge'):
+    """Lines of a metric whose values are read from elsewhere at scrape time
+    Args:
+        name: metric name
+        description: what is measured
+        values: dict label -> current value (label () when there are no labels)
+        label_names: names of the labels
+        metric_type: 'gauge', or 'counter' for totals kept by another component
+    """
+    lines = [f'# HELP {name} {description}', f'# TYPE {name} {metric_type}']
+    for label, value in sorted(values.items()):
+        lines.append(f'{name}{_format_labels(label_names, label)} {_format_value(value)}')
+    return lines
+
+
+def render_metrics(*blocks):
+    """Join metric line blocks into one text format exposition"""
+    return '\n'.join(line for block in blocks for line in block) + '\n'
+
+
+# Seconds spent per image in each counting pipeline stage
+stage_latency = Histogram('pipeline_stage_seconds', 'Time spent per image in each counting pipeline stage',
+                          label_names=('stage',))
+
+# Segments SAM produced per image, and how many survived confidence filtering
+segments_per_image = Histogram('pipeline_segments_per_image', 'Segments per analyzed image',
+                               buckets=SEGMENT_BUCKETS, label_names=('kind',))
+
+# HTTP requests, labelled by route pattern so ids do not create new series
+http_requests = Counter('http_requests_total', 'HTTP requests handled',
+                        label_names=('endpoint', 'method', 'status'))
+http_request_latency = Histogram('http_request_duration_seconds', 'HTTP request latency',
+                                 label_names=('endpoint', 'method'))
+
+# Time spent in the database driver per statement
+db_query_latency = Histogram('db_query_duration_seconds', 'Database statement execution time',
+                             label_names=('statement',))
+
+
+def _query_kind(statement):
+    """Lower-case leading keyword of a SQL statement, or 'other'"""
+    keyword = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ''
+    return keyword if keyword in QUERY_KINDS else 'other'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Remember when the statement was sent to the driver"""
+    conn.info['query_start_time'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Record how long the driver took to execute the statement"""
+    start_time = conn.info.pop('query_start_time', None)
+    if start_time is not None:
+        db_query_latency.observe(_query_kind(statement), time.perf_counter() - start_time)
+
+
+def instrument_database_queries(engine=Engine):
+    """Time every statement executed through an engine into db_query_latency
+    Args:
+        engine: SQLAlchemy engine, or the Engine class (default) to cover all
+            engines, including ones created later by Engine.configure
+    """
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
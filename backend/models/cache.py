@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""Cache - Module
+Thread-safe bounded LRU cache used by the counting pipeline
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Least-recently-used cache with a size bound and hit/miss counters
+    Attrs:
+        max_size: maximum number of entries kept before evicting the oldest
+        hits: number of lookups that found an entry
+        misses: number of lookups that did not
+    """
+
+    def __init__(self, max_size=1024):
+        """Initializes the cache
+        Args:
+            max_size (int): maximum number of entries to keep
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Look up a key and mark it as recently used
+        Args:
+            key: cache key
+            default: value returned when the key is missing
+        Return: cached value or default
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store a value, evicting the least recently used entries if full
+        Args:
+            key: cache key
+            value: value to store
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def items(self):
+        """Return a snapshot of (key, value) pairs, oldest first"""
+        with self._lock:
+            return list(self._data.items())
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Get cache size and hit/miss statistics
+        Return: dict with size, max_size, hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
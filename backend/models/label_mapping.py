@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+"""Label Mapping - Module
+Helpers for mapping ImageNet class names onto the pipeline's categories
+without running the zero-shot classifier on every request
+"""
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from models.cache import LRUCache
+
+
+# Categories the pipeline maps ImageNet predictions onto
+CANDIDATE_LABELS = [
+    "person", "car", "bus", "bicycle", "motorcycle",
+    "dog", "cat", "bird", "tree", "building",
+    "road", "sky"
+]
+
+# Zero-shot NLI model used for runtime mapping and for building the table
+ZERO_SHOT_MODEL = "typeform/distilbert-base-uncased-mnli"
+
+
+class LabelMappingCache(LRUCache):
+    """Memoizes zero-shot mapping results
+    Keys are (predicted_class, candidate label set) and values are
+    (best_label, mapping_score) tuples. The cache can be warmed from and
+    persisted to a JSON file so a restart does not rebuild it.
+    Attrs:
+        unsaved: entries added since the last load() or save()
+    """
+
+    def __init__(self, max_size=1024):
+        """Initializes an empty cache"""
+        super().__init__(max_size)
+        self.unsaved = 0
+        self._save_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(predicted_class, candidate_labels):
+        """Build the cache key for a class and a candidate label list
+        The zero-shot scores do not depend on candidate order, so the
+        labels are stored as a sorted tuple.
+        """
+        return (predicted_class, tuple(sorted(candidate_labels)))
+
+    def put(self, key, value):
+        """Store a mapping and count it as not yet persisted"""
+        super().put(key, value)
+        with self._lock:
+            self.unsaved += 1
+
+    def load(self, path):
+        """Warm the cache from a JSON file written by save()
+        Args:
+            path (str): path to the warm file
+        Return: number of entries loaded (0 if the file does not exist)
+        """
+        if not path or not os.path.exists(path):
+            return 0
+
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+
+        for entry in entries:
+            key = self.make_key(entry['predicted_class'], entry['candidate_labels'])
+            self.put(key, (entry['label'], entry['score']))
+
+        with self._lock:
+            self.unsaved = 0
+        return len(entries)
+
+    def save(self, path):
+        """Persist the cache to a JSON file
+        The file is written to a uniquely named temporary file next to its
+        destination and moved into place, so a crash or a concurrent save
+        never leaves a truncated warm file behind.
+        Args:
+            path (str): path to the warm file
+        """
+        with self._save_lock:
+            with self._lock:
+                snapshot = list(self._data.items())
+                pending, self.unsaved = self.unsaved, 0
+            entries = [
+                {
+                    'predicted_class': predicted_class,
+                    'candidate_labels': list(candidate_labels),
+                    'label': label,
+                    'score': score
+                }
+                for (predicted_class, candidate_labels), (label, score) in snapshot
+            ]
+
+            tmp_file = tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=os.path.dirname(path) or '.',
+                prefix=f"{os.path.basename(path)}.", suffix='.tmp', delete=False
+            )
+            try:
+                with tmp_file:
+                    json.dump(entries, tmp_file)
+                os.replace(tmp_file.name, path)
+            except BaseException:
+                os.unlink(tmp_file.name)
+                with self._lock:
+                    self.unsaved += pending
+                raise
+
+
+class LabelMappingTable:
+    """Precomputed ImageNet class -> category lookup table
+    Built once offline by running the zero-shot classifier over every
+    ImageNet class name, then stored as compact arrays so mapping at
+    request time is a vectorized index lookup.
+    Attrs:
+        candidate_labels: category names the table maps onto
+        class_names: ImageNet class names, indexed by class id
+        best_label_index: int16 array, index into candidate_labels per class id
+        best_score: float32 array, zero-shot score of the best label per class id
+    """
+
+    def __init__(self, candidate_labels, class_names, best_label_index, best_score):
+        """Initializes the table from its arrays"""
+        self.candidate_labels = [str(label) for label in candidate_labels]
+        self.class_names = [str(name) for name in class_names]
+        self.best_label_index = np.asarray(best_label_index, dtype=np.int16)
+        self.best_score = np.asarray(best_score, dtype=np.float32)
+        self._label_array = np.array(self.candidate_labels)
+        # ImageNet has a few duplicated names; they map identically
+        self._row_by_name = {}
+        for row, name in enumerate(self.class_names):
+            self._row_by_name.setdefault(name, row)
+
+    @classmethod
+    def build(cls, label_classifier, id2label, candidate_labels, batch_size=32):
+        """Run the zero-shot classifier over every class name
+        Args:
+            label_classifier: transformers zero-shot-classification pipeline
+            id2label (dict): class id -> class name from the ResNet config
+            candidate_labels (list): categories to map onto
+            batch_size (int): sequences per zero-shot forward pass
+        Return: LabelMappingTable
+        """
+        class_names = [id2label[class_id] for class_id in sorted(id2label)]
+        label_index = {label: i for i, label in enumerate(candidate_labels)}
+
+        results = label_classifier(class_names, candidate_labels=list(candidate_labels),
+                                   batch_size=batch_size)
+        if isinstance(results, dict):
+            results = [results]
+
+        best_label_index = [label_index[result['labels'][0]] for result in results]
+        best_score = [result['scores'][0] for result in results]
+
+        return cls(candidate_labels, class_names, best_label_index, best_score)
+
+    @classmethod
+    def load(cls, path):
+        """Load a table written by save()
+        Args:
+            path (str): path to the .npz table
+        Return: LabelMappingTable
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['candidate_labels'], data['class_names'],
+                       data['best_label_index'], data['best_score'])
+
+    def save(self, path):
+        """Write the table as a compressed .npz archive
+        Args:
+            path (str): destination path
+        """
+        np.savez_compressed(
+            path,
+            candidate_labels=np.array(self.candidate_labels),
+            class_names=np.array(self.class_names),
+            best_label_index=self.best_label_index,
+            best_score=self.best_score
+        )
+
+    def matches(self, candidate_labels, id2label):
+        """Check the table was built for these categories and this model
+        Args:
+            candidate_labels (list): categories the pipeline uses
+            id2label (dict): class id -> class name from the ResNet config
+        Return: True if the table can be used as-is
+        """
+        class_names = [id2label[class_id] for class_id in sorted(id2label)]
+        return (sorted(self.candidate_labels) == sorted(candidate_labels)
+                and self.class_names == class_names)
+
+    def lookup(self, class_names):
+        """Map ImageNet class names to categories
+        Args:
+            class_names (list): predicted ImageNet class names
+        Return: tuple (labels list, scores float32 array)
+        """
+        rows = np.fromiter((self._row_by_name[name] for name in class_names),
+                           dtype=np.intp, count=len(class_names))
+        labels = self._label_array[self.best_label_index[rows]]
+        return labels.tolist(), self.best_score[rows]
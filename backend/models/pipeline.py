@@ -1,14 +1,27 @@
 
-from PIL import Image
+from PIL import Image, ImageDraw, UnidentifiedImageError
 from segment_anything import SamAutomaticMaskGenerator, sam_model_registry
 from transformers import AutoImageProcessor, AutoModelForImageClassification, pipeline
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import hashlib
+import io
 import numpy as np
 import os
+import threading
 import time
 import torch
 import torch.nn.functional as F
-import torchvision.transforms as tf
 import urllib.request
+from metrics import segments_per_image, stage_latency
+from models.cache import LRUCache
+from models.label_mapping import (
+    CANDIDATE_LABELS, ZERO_SHOT_MODEL, LabelMappingCache, LabelMappingTable
+)
+from models.segmentation import (
+    build_panoptic_map, extract_segments, mask_window, segmentation_scale, select_top_masks
+)
 # Import performance monitor for stage tracking
 try:
     from performance_monitor import get_performance_monitor
@@ -33,22 +46,52 @@ class ObjectCountingPipeline:
         self.TOP_N = 10  # Number of top segments to process
         self.CONFIDENCE_THRESHOLD = 0.7  # Default confidence threshold for filtering
         self.MIN_SEGMENTS_FOR_QUALITY = 5  # Minimum segments for quality assessment
+        self.CLASSIFICATION_BATCH_SIZE = 16  # Max segments per ResNet-50 forward pass
+        # Longest side of the image copy given to SAM (0 disables downscaling)
+        self.SAM_MAX_SIDE = int(os.environ.get('OBJ_DETECT_SAM_MAX_SIDE', 1024))
+        self.LABEL_CACHE_SIZE = 4096  # Max memoized zero-shot mappings
+        self.RESULT_CACHE_SIZE = 256  # Max cached per-image analyses
+        self.LABEL_CACHE_PATH = os.environ.get('OBJ_DETECT_LABEL_CACHE_PATH')  # Optional warm file
+        # New mappings collected before the warm file is rewritten (the rest are written at exit)
+        self.LABEL_CACHE_SAVE_EVERY = int(os.environ.get('OBJ_DETECT_LABEL_CACHE_SAVE_EVERY', 64))
+        # "zero-shot" runs DistilBERT at request time, "table" uses the precomputed lookup table
+        self.LABEL_MAPPING_MODE = os.environ.get('OBJ_DETECT_LABEL_MAPPING_MODE', 'zero-shot')
+        self.LABEL_TABLE_PATH = os.environ.get('OBJ_DETECT_LABEL_TABLE_PATH', 'label_table.npz')
+        # Batch requests: threads decoding images ahead of SAM, and how far ahead they may run
+        self.DECODE_WORKERS = int(os.environ.get('OBJ_DETECT_DECODE_WORKERS', 4))
+        self.DECODE_PREFETCH = 2 * self.DECODE_WORKERS
         
         # GPU setup with memory management
         self._setup_device()
         
         # Predefined object categories
-        self.candidate_labels = [
-            "person", "car", "bus", "bicycle", "motorcycle",
-            "dog", "cat", "bird", "tree", "building", 
-            "road", "sky"
-        ]
+        self.candidate_labels = list(CANDIDATE_LABELS)
+        
+        # Memoized zero-shot mappings, optionally warmed from disk
+        self.label_cache = LabelMappingCache(self.LABEL_CACHE_SIZE)
+        self.label_table = None
+        self.label_classifier = None
+        
+        # Per-segment labels and confidences keyed by image content
+        self.result_cache = LRUCache(self.RESULT_CACHE_SIZE)
+        self._load_label_cache()
+        if self.LABEL_CACHE_PATH:
+            atexit.register(self.save_label_cache)
+        
+        # One lock per model: request threads, queue workers and warm-up share this
+        # pipeline, and SAM's generator keeps per-image state between calls. Separate
+        # locks let one image's classification overlap the next image's segmentation.
+        self._sam_lock = threading.Lock()
+        self._classifier_lock = threading.Lock()
+        self._label_classifier_lock = threading.Lock()
+        
+        # Seconds spent loading each model, and per-stage warm-up latency once warm_up() ran
+        self.model_load_times = {}
+        self.warm_up_times = None
         
         # Initialize models with error handling
         try:
-            self._setup_sam_model()
-            self._setup_classification_model()
-            self._setup_label_classifier()
+            self._setup_models()
             print("✅ Pipeline initialization complete!")
         except Exception as e:
             print(f"❌ Pipeline initialization failed: {e}")
@@ -56,13 +99,20 @@ class ObjectCountingPipeline:
             if self.device == "cuda":
                 print("🔄 Falling back to CPU...")
                 self.device = "cpu"
-                self._setup_sam_model()
-                self._setup_classification_model()
-                self._setup_label_classifier()
+                self._setup_models()
                 print("✅ Pipeline initialized on CPU!")
             else:
                 raise e
     
+    def _setup_models(self):
+        """Load every model, recording how long each one took"""
+        for name, setup in (("sam", self._setup_sam_model),
+                            ("resnet50", self._setup_classification_model),
+                            ("label_mapping", self._setup_label_mapping)):
+            start_time = time.perf_counter()
+            setup()
+            self.model_load_times[name] = round(time.perf_counter() - start_time, 3)
+    
     def _setup_device(self):
         """Setup device with GPU memory management"""
         if torch.cuda.is_available():
@@ -111,6 +161,28 @@ class ObjectCountingPipeline:
         self.class_model.to(self.device)
         print(f"ResNet-50 model ready on {self.device}!")
     
+    def _setup_label_mapping(self):
+        """Setup label mapping according to LABEL_MAPPING_MODE
+        
+        In "table" mode the precomputed lookup table is loaded and the
+        zero-shot model is never instantiated. If the table is missing or was
+        built for different categories or a different ResNet model, the
+        pipeline falls back to the zero-shot classifier.
+        """
+        if self.LABEL_MAPPING_MODE == "table":
+            try:
+                table = LabelMappingTable.load(self.LABEL_TABLE_PATH)
+                if table.matches(self.candidate_labels, self.class_model.config.id2label):
+                    self.label_table = table
+                    print(f"Label mapping table loaded from {self.LABEL_TABLE_PATH}!")
+                    return
+                print("⚠️  Label mapping table is stale, rebuild it with build_label_table.py")
+            except Exception as e:
+                print(f"⚠️  Could not load label mapping table: {e}")
+            print("🔄 Falling back to zero-shot label mapping...")
+        
+        self._setup_label_classifier()
+    
     def _setup_label_classifier(self):
         """Setup zero-shot label classifier"""
         print("Setting up zero-shot classifier...")
@@ -119,82 +191,156 @@ class ObjectCountingPipeline:
         device_id = 0 if self.device == "cuda" else -1
         self.label_classifier = pipeline(
             "zero-shot-classification", 
-            model="typeform/distilbert-base-uncased-mnli",
+            model=ZERO_SHOT_MODEL,
             device=device_id
         )
         
         print(f"Zero-shot classifier ready on {self.device}!")
     
-    def segment_image(self, image):
-        """
-        Step 1: Segment image using SAM
+    def _load_label_cache(self):
+        """Warm the label mapping cache from LABEL_CACHE_PATH if configured"""
+        if not self.LABEL_CACHE_PATH:
+            return
         
-        Args:
-            image (PIL.Image): Input image
-            
-        Returns:
-            tuple: (segmented_map, segments_list)
-        """
-        height, width = image.size[1], image.size[0]
+        try:
+            loaded = self.label_cache.load(self.LABEL_CACHE_PATH)
+            print(f"Label mapping cache warmed with {loaded} entries")
+        except Exception as e:
+            print(f"⚠️  Could not load label mapping cache: {e}")
+    
+    def save_label_cache(self):
+        """Persist the label mapping cache to LABEL_CACHE_PATH if configured and changed"""
+        if not self.LABEL_CACHE_PATH or not self.label_cache.unsaved:
+            return
         
-        # Generate masks using SAM
-        masks = self.mask_generator.generate(np.array(image))
-        masks_sorted = sorted(masks, key=lambda x: x['area'], reverse=True)
+        try:
+            self.label_cache.save(self.LABEL_CACHE_PATH)
+        except Exception as e:
+            print(f"⚠️  Could not save label mapping cache: {e}")
+    
+    def _synthetic_image(self, width=640, height=480):
+        """Build a deterministic test image with a few distinct shapes for SAM to find"""
+        image = Image.new('RGB', (width, height), (200, 210, 220))
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([40, 60, 260, 300], fill=(180, 40, 40))
+        draw.ellipse([320, 80, 560, 320], fill=(40, 140, 60))
+        draw.polygon([(120, 460), (300, 340), (460, 460)], fill=(30, 60, 170))
+        return image
+    
+    def warm_up(self):
+        """
+        Run a synthetic image through every model once
         
-        # Create panoptic segmentation map
-        predicted_panoptic_map = np.zeros((height, width), dtype=np.int32)
-        for idx, mask_data in enumerate(masks_sorted[:self.TOP_N]):
-            predicted_panoptic_map[mask_data['segmentation']] = idx + 1
+        The first inference pays for lazy allocations in PyTorch and
+        transformers (kernel selection, memory pools, tokenizer setup). Doing
+        it here keeps that cost off the first real request. The result cache
+        is bypassed so nothing from the synthetic image is ever served.
         
-        predicted_panoptic_map = torch.from_numpy(predicted_panoptic_map)
+        Returns:
+            dict: Seconds spent in each stage and in total
+        """
+        print("🔥 Warming up pipeline...")
+        timings = {}
+        total_start = time.perf_counter()
+        
+        start_time = time.perf_counter()
+        image = self._synthetic_image()
+        sam_input, _ = self.prepare_sam_input(image)
+        timings["decode"] = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        _, segments = self.segment_image(image, sam_input)
+        timings["sam"] = time.perf_counter() - start_time
+        
+        # ResNet-50 needs an input even if SAM found nothing in the synthetic image
+        start_time = time.perf_counter()
+        predicted_classes, confidences = self.classify_segments(segments or [image])
+        timings["resnet50"] = time.perf_counter() - start_time
+        
+        # Call the zero-shot model directly: the mapping cache may already hold these classes
+        start_time = time.perf_counter()
+        if self.label_classifier is not None:
+            with self._label_classifier_lock:
+                self.label_classifier(predicted_classes[0], candidate_labels=self.candidate_labels)
+        else:
+            self.map_to_categories(predicted_classes, confidences)
+        timings["label_mapping"] = time.perf_counter() - start_time
         
-        # Extract individual segments
-        transform = tf.Compose([tf.PILToTensor()])
-        img_tensor = transform(image)
+        timings["total"] = time.perf_counter() - total_start
+        self.warm_up_times = {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        print(f"✅ Pipeline warm-up complete in {timings['total']:.1f}s")
+        return self.warm_up_times
+    
+    def prepare_sam_input(self, image):
+        """
+        Downscale an image so its longest side is at most SAM_MAX_SIDE
         
-        segments = []
-        for label in predicted_panoptic_map.unique():
-            if label == 0:  # Skip background
-                continue
-                
-            y_start, y_end = self._get_mask_box(predicted_panoptic_map == label)
-            x_start, x_end = self._get_mask_box((predicted_panoptic_map == label).T)
-            
-            if y_start is None or x_start is None:
-                continue
-            
-            cropped_tensor = img_tensor[:, y_start:y_end+1, x_start:x_end+1]
-            cropped_mask = predicted_panoptic_map[y_start:y_end+1, x_start:x_end+1] == label
-            
-            segment = cropped_tensor * cropped_mask.unsqueeze(0)
-            segment[:, ~cropped_mask] = 188  # Set background to gray
+        Args:
+            image (PIL.Image): Input image
             
-            segments.append(segment)
-        
-        return predicted_panoptic_map, segments
+        Returns:
+            tuple: (sam_input_array, scale)
+        """
+        scale = segmentation_scale(image.size[0], image.size[1], self.SAM_MAX_SIDE)
+        if scale < 1.0:
+            size = (max(1, round(image.size[0] * scale)), max(1, round(image.size[1] * scale)))
+            image = image.resize(size, Image.BILINEAR)
+        return np.array(image), scale
     
-    def _get_mask_box(self, tensor):
+    def segment_image(self, image, sam_input=None, timings=None):
         """
-        Get bounding box of non-zero elements in tensor
+        Step 1: Segment image using SAM
+        
+        SAM runs on a copy downscaled by prepare_sam_input. Mask boxes are
+        mapped back to the original coordinates, so segments are cropped
+        from the full-resolution pixels.
         
         Args:
-            tensor (torch.Tensor): Input tensor
+            image (PIL.Image): Input image
+            sam_input (np.ndarray): Optional copy already prepared by prepare_sam_input
+            timings (dict): Optional dict receiving sam_generate, panoptic_build
+                and crop durations in seconds
             
         Returns:
-            tuple: (first_index, last_index)
+            tuple: (segmented_map, segments_list)
         """
-        non_zero_indices = torch.nonzero(tensor, as_tuple=True)[0]
-        if non_zero_indices.shape[0] == 0:
-            return None, None
+        height, width = image.size[1], image.size[0]
+        
+        # Generate masks using SAM on the downscaled copy
+        if sam_input is None:
+            sam_input, _ = self.prepare_sam_input(image)
+        with self._sam_lock:
+            start_time = time.perf_counter()
+            masks = self.mask_generator.generate(sam_input)
+            generated_time = time.perf_counter()
+        top_masks = select_top_masks(masks, self.TOP_N)
+        # Drop the remaining masks so their full-resolution arrays are freed now
+        del masks
+        
+        # Create panoptic segmentation map, painting each mask only inside its SAM box
+        windows = [mask_window(mask_data, height, width) for mask_data in top_masks]
+        predicted_panoptic_map = build_panoptic_map(top_masks, windows, height, width)
+        panoptic_time = time.perf_counter()
+        
+        # Extract individual segments
+        image_array = np.array(image)
+        segments = extract_segments(image_array, predicted_panoptic_map, windows)
         
-        first_n = non_zero_indices[:1].item()
-        last_n = non_zero_indices[-1:].item()
+        if timings is not None:
+            timings["sam_generate"] = generated_time - start_time
+            timings["panoptic_build"] = panoptic_time - generated_time
+            timings["crop"] = time.perf_counter() - panoptic_time
         
-        return first_n, last_n
+        return torch.from_numpy(predicted_panoptic_map), segments
     
     def classify_segments(self, segments):
         """
-        Step 2: Classify each segment using ResNet-50
+        Step 2: Classify segments using ResNet-50
+        
+        Segments are preprocessed together and sent through the model in
+        batches of at most CLASSIFICATION_BATCH_SIZE. The image processor
+        resizes and center-crops every segment to the same resolution, so a
+        batch stacks into a single pixel_values tensor.
         
         Args:
             segments (list): List of image segments
@@ -205,30 +351,32 @@ class ObjectCountingPipeline:
         predicted_classes = []
         confidence_scores = []
         
-        for segment in segments:
-            inputs = self.image_processor(images=segment, return_tensors="pt")
-            
-            # Move inputs to GPU if available
-            if self.device == "cuda":
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            with torch.no_grad():  # Optimize GPU memory
-                outputs = self.class_model(**inputs)
-                logits = outputs.logits
+        batch_size = max(1, int(self.CLASSIFICATION_BATCH_SIZE))
+        id2label = self.class_model.config.id2label
+        
+        with self._classifier_lock:
+            for start in range(0, len(segments), batch_size):
+                batch = segments[start:start + batch_size]
+                inputs = self.image_processor(images=batch, return_tensors="pt")
                 
-                # Apply softmax to get probabilities
-                probabilities = F.softmax(logits, dim=-1)
-                max_prob, predicted_class_idx = torch.max(probabilities, dim=-1)
+                # Move inputs to GPU if available
+                if self.device == "cuda":
+                    inputs = {k: v.to(self.device) for k, v in inputs.items()}
                 
-                predicted_class = self.class_model.config.id2label[predicted_class_idx.item()]
-                confidence = max_prob.item()
+                with torch.no_grad():  # Optimize GPU memory
+                    outputs = self.class_model(**inputs)
+                    logits = outputs.logits
+                    
+                    # Apply softmax to get probabilities
+                    probabilities = F.softmax(logits, dim=-1)
+                    max_probs, predicted_class_idxs = torch.max(probabilities, dim=-1)
                 
-                predicted_classes.append(predicted_class)
-                confidence_scores.append(confidence)
-        
-        # Clean up GPU memory after classification
-        if self.device == "cuda":
-            torch.cuda.empty_cache()
+                predicted_classes.extend(id2label[idx] for idx in predicted_class_idxs.tolist())
+                confidence_scores.extend(max_probs.tolist())
+            
+            # Clean up GPU memory after classification
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
         
         return predicted_classes, confidence_scores
     
@@ -236,6 +384,10 @@ class ObjectCountingPipeline:
         """
         Step 3: Map ResNet predictions to predefined categories using zero-shot classification
         
+        Each distinct ImageNet class is mapped once per call, and mappings are
+        memoized in label_cache so repeated classes skip the zero-shot model.
+        When a precomputed label table is loaded it is used instead.
+        
         Args:
             predicted_classes (list): ResNet predicted class names
             classification_confidences (list): Confidence scores from classification
@@ -243,13 +395,39 @@ class ObjectCountingPipeline:
         Returns:
             tuple: (mapped_labels, final_confidences)
         """
+        if self.label_table is not None:
+            labels, mapping_scores = self.label_table.lookup(predicted_classes)
+            # Combine classification and mapping confidences
+            final_confidences = (np.asarray(classification_confidences, dtype=np.float64)
+                                 + mapping_scores) / 2
+            return labels, final_confidences.tolist()
+        
+        mappings = {}
+        cache_updated = False
+        
+        for predicted_class in dict.fromkeys(predicted_classes):
+            key = self.label_cache.make_key(predicted_class, self.candidate_labels)
+            mapping = self.label_cache.get(key)
+            
+            if mapping is None:
+                with self._label_classifier_lock:
+                    result = self.label_classifier(predicted_class, candidate_labels=self.candidate_labels)
+                # Most confident label and the confidence of that mapping
+                mapping = (result['labels'][0], result['scores'][0])
+                self.label_cache.put(key, mapping)
+                cache_updated = True
+            
+            mappings[predicted_class] = mapping
+        
+        # Rewriting the warm file on every miss would put disk I/O on each request
+        if cache_updated and self.label_cache.unsaved >= self.LABEL_CACHE_SAVE_EVERY:
+            self.save_label_cache()
+        
         labels = []
         final_confidences = []
         
         for predicted_class, class_confidence in zip(predicted_classes, classification_confidences):
-            result = self.label_classifier(predicted_class, candidate_labels=self.candidate_labels)
-            label = result['labels'][0]  # Get the most confident label
-            mapping_confidence = result['scores'][0]  # Get confidence of mapping
+            label, mapping_confidence = mappings[predicted_class]
             
             # Combine classification and mapping confidences
             combined_confidence = (class_confidence + mapping_confidence) / 2
@@ -379,39 +557,326 @@ class ObjectCountingPipeline:
         
         return recommendations
     
-    def count_objects(self, image_file, target_object_type, confidence_threshold=None):
+    def _read_image_bytes(self, image_file):
         """
-        Main pipeline: Count objects of specified type in image with enhanced confidence processing
+        Read the raw bytes of an uploaded image
+        
+        Args:
+            image_file: File-like object (e.g. Flask upload) or path to an image
+            
+        Returns:
+            bytes: Encoded image data
+        """
+        if isinstance(image_file, (str, os.PathLike)):
+            with open(image_file, 'rb') as f:
+                return f.read()
+        
+        # Uploads may already have been read when saved to disk
+        if hasattr(image_file, 'seek'):
+            image_file.seek(0)
+        return image_file.read()
+    
+    def _analysis_key(self, image_bytes):
+        """
+        Build the result cache key for an image
+        
+        The key combines a hash of the image bytes with the settings that
+        change per-segment results, so reconfiguring the pipeline never
+        serves stale analyses.
+        """
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        mapping_mode = "table" if self.label_table is not None else "zero-shot"
+        return (image_hash, self.TOP_N, self.SAM_MAX_SIDE, mapping_mode, tuple(self.candidate_labels))
+    
+    def cache_stats(self):
+        """
+        Get size and hit/miss statistics for the pipeline caches
+        
+        Returns:
+            dict: Stats for the per-image result cache and the label mapping cache
+        """
+        return {
+            "result_cache": self.result_cache.stats(),
+            "label_cache": self.label_cache.stats()
+        }
+    
+    def _record_image_metrics(self, timings, total_segments, filtered_segments):
+        """
+        Feed one image's stage durations and segment counts into the metrics histograms
+        
+        Args:
+            timings (dict): Stage name -> seconds (decode, sam_generate,
+                panoptic_build, crop, resnet, label_mapping, filtering, aggregation)
+            total_segments (int): Segments classified for the image
+            filtered_segments (int): Segments left after confidence filtering
+            
+        Returns:
+            dict: The timings rounded for the API response
+        """
+        stage_latency.observe_many(timings)
+        segments_per_image.observe('total', total_segments)
+        segments_per_image.observe('filtered', filtered_segments)
+        return {stage: round(seconds, 4) for stage, seconds in timings.items()}
+    
+    def _get_monitor(self):
+        """Get the performance monitor if it is tracking a session"""
+        if not PERFORMANCE_MONITORING:
+            return None
+        try:
+            monitor = get_performance_monitor()
+            return monitor if monitor.is_monitoring else None
+        except Exception:
+            return None
+    
+    def analyze_image(self, image_file, monitor=None):
+        """
+        Run segmentation, classification and label mapping on an image
+        
+        Per-segment labels and raw (unfiltered) confidences are cached by
+        image content, so resubmitting the same image with a different
+        object type or threshold skips the models entirely.
         
         Args:
             image_file: Image file from Flask request
-            target_object_type (str): Type of object to count
-            confidence_threshold (float): Optional confidence threshold override
+            monitor: Optional PerformanceMonitor to report stages to
             
         Returns:
-            dict: Results including count, confidence metrics, and quality assessment
+            dict: labels, confidences, total_segments, segmentation_scale, cache_hit,
+                stage_timings (seconds per stage actually run for this call)
         """
-        start_time = time.time()
+        timings = {}
+        start_time = time.perf_counter()
+        image_bytes = self._read_image_bytes(image_file)
+        cache_key = self._analysis_key(image_bytes)
+        
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            timings["decode"] = time.perf_counter() - start_time
+            return dict(cached, cache_hit=True, stage_timings=timings)
         
         # Load image
-        image = Image.open(image_file).convert('RGB')
+        image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+        sam_input, _ = self.prepare_sam_input(image)
+        timings["decode"] = time.perf_counter() - start_time
         
         # Step 1: Segment image
-        segmentation_map, segments = self.segment_image(image)
-        total_segments = len(segments)
+        if monitor:
+            monitor.update_stage("segmenting")
+        segmentation_map, segments = self.segment_image(image, sam_input, timings)
         
         # Step 2: Classify segments with confidence scores
+        if monitor:
+            monitor.update_stage("classifying")
+        start_time = time.perf_counter()
         predicted_classes, classification_confidences = self.classify_segments(segments)
+        timings["resnet"] = time.perf_counter() - start_time
         
         # Step 3: Map to categories with combined confidence scores
+        if monitor:
+            monitor.update_stage("mapping_categories")
+        start_time = time.perf_counter()
         final_labels, final_confidences = self.map_to_categories(predicted_classes, classification_confidences)
+        timings["label_mapping"] = time.perf_counter() - start_time
+        
+        analysis = {
+            "labels": final_labels,
+            "confidences": final_confidences,
+            "total_segments": len(segments),
+            "segmentation_scale": segmentation_scale(image.size[0], image.size[1], self.SAM_MAX_SIDE)
+        }
+        self.result_cache.put(cache_key, analysis)
         
-        # Step 4: Apply confidence threshold filtering
+        return dict(analysis, cache_hit=False, stage_timings=timings)
+    
+    def _decode_image(self, image_file):
+        """
+        Batch stage: read, hash and decode an image and prepare its SAM input
+        
+        Runs on the decode thread pool. Images already in the result cache
+        are not decoded. An image that cannot be read or decoded is reported
+        in the result instead of raising, so it does not fail the batch.
+        
+        Returns:
+            dict: cache_key, cached analysis (or None), image, sam_input, decode_time,
+                and error (message, or None if the image was decoded)
+        """
+        start_time = time.perf_counter()
+        try:
+            image_bytes = self._read_image_bytes(image_file)
+            cache_key = self._analysis_key(image_bytes)
+            
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return {"cache_key": cache_key, "cached": cached, "error": None,
+                        "decode_time": time.perf_counter() - start_time}
+            
+            image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+            sam_input, _ = self.prepare_sam_input(image)
+        except UnidentifiedImageError:
+            error = "Could not decode image: unrecognized image format"
+        except Exception as e:
+            error = f"Could not decode image: {e}"
+        else:
+            return {"cache_key": cache_key, "cached": None, "image": image, "sam_input": sam_input, "error": None,
+                    "decode_time": time.perf_counter() - start_time}
+        return {"cache_key": None, "cached": None, "error": error, "decode_time": time.perf_counter() - start_time}
+    
+    def _classify_and_map(self, segments):
+        """Batch stage: classify pooled segments and map them to categories
+        
+        Returns:
+            tuple: (labels, confidences, timings) with resnet and label_mapping seconds for the batch
+        """
+        start_time = time.perf_counter()
+        predicted_classes, classification_confidences = self.classify_segments(segments)
+        classified_time = time.perf_counter()
+        labels, confidences = self.map_to_categories(predicted_classes, classification_confidences)
+        timings = {"resnet": classified_time - start_time, "label_mapping": time.perf_counter() - classified_time}
+        return labels, confidences, timings
+    
+    def analyze_images(self, image_files, monitor=None):
+        """
+        Run segmentation, classification and label mapping on many images
+        
+        The stages overlap: a thread pool decodes upcoming images while SAM
+        segments the current one, and segments of consecutive images are
+        pooled into full CLASSIFICATION_BATCH_SIZE batches that ResNet-50 and
+        the label mapping process on their own thread while SAM moves on.
+        Results are cached like analyze_image, and an image repeated within
+        the batch is analyzed once. Images that cannot be decoded are skipped.
+        
+        Args:
+            image_files (list): Image files or paths
+            monitor: Optional PerformanceMonitor to report stages to
+            
+        Returns:
+            list: analyze_image results in input order; an image that could not
+                be decoded gets a dict with only error and stage_timings
+        """
+        analyses = [None] * len(image_files)
+        batch_size = max(1, int(self.CLASSIFICATION_BATCH_SIZE))
+        prefetch = max(1, int(self.DECODE_PREFETCH))
+        
+        timings = [{} for _ in image_files]  # per-image stage durations
+        segmented = {}       # image index -> cache key, segment count and scale
+        first_by_key = {}    # cache key -> index of the first image with that content
+        duplicates = {}      # image index -> index of the identical image analyzed instead
+        pooled = []          # (image index, segment) awaiting classification
+        batches = []         # (segment owners, future of (labels, confidences))
+        
+        decode_pool = ThreadPoolExecutor(max_workers=max(1, self.DECODE_WORKERS))
+        classify_pool = ThreadPoolExecutor(max_workers=1)
+        
+        try:
+            decoding = deque()
+            next_to_decode = 0
+            
+            for index in range(len(image_files)):
+                # Keep a bounded number of images decoding ahead of SAM
+                while next_to_decode < len(image_files) and len(decoding) < prefetch:
+                    decoding.append(decode_pool.submit(self._decode_image, image_files[next_to_decode]))
+                    next_to_decode += 1
+                decoded = decoding.popleft().result()
+                timings[index]["decode"] = decoded["decode_time"]
+                
+                if decoded["error"]:
+                    analyses[index] = {"error": decoded["error"], "stage_timings": timings[index]}
+                    continue
+                if decoded["cached"] is not None:
+                    analyses[index] = dict(decoded["cached"], cache_hit=True, stage_timings=timings[index])
+                    continue
+                if decoded["cache_key"] in first_by_key:
+                    duplicates[index] = first_by_key[decoded["cache_key"]]
+                    continue
+                first_by_key[decoded["cache_key"]] = index
+                
+                # Step 1: Segment image
+                if monitor:
+                    monitor.update_stage("segmenting")
+                image = decoded["image"]
+                _, segments = self.segment_image(image, decoded["sam_input"], timings[index])
+                segmented[index] = {
+                    "cache_key": decoded["cache_key"],
+                    "total_segments": len(segments),
+                    "segmentation_scale": segmentation_scale(image.size[0], image.size[1], self.SAM_MAX_SIDE)
+                }
+                del decoded, image
+                
+                # Steps 2-3: Hand full batches to the classification thread, keep the remainder
+                pooled.extend((index, segment) for segment in segments)
+                full = len(pooled) // batch_size * batch_size
+                if full:
+                    owners, batch = zip(*pooled[:full])
+                    batches.append((owners, classify_pool.submit(self._classify_and_map, list(batch))))
+                    pooled = pooled[full:]
+            
+            if pooled:
+                owners, batch = zip(*pooled)
+                batches.append((owners, classify_pool.submit(self._classify_and_map, list(batch))))
+                pooled = []
+            
+            if monitor:
+                monitor.update_stage("classifying")
+            labels = {index: [] for index in segmented}
+            confidences = {index: [] for index in segmented}
+            for owners, future in batches:
+                batch_labels, batch_confidences, batch_timings = future.result()
+                for owner, label, confidence in zip(owners, batch_labels, batch_confidences):
+                    labels[owner].append(label)
+                    confidences[owner].append(confidence)
+                    # Each segment carries an equal share of its batch's classification time
+                    for stage, seconds in batch_timings.items():
+                        timings[owner][stage] = timings[owner].get(stage, 0.0) + seconds / len(owners)
+        finally:
+            decode_pool.shutdown(wait=True, cancel_futures=True)
+            classify_pool.shutdown(wait=True, cancel_futures=True)
+        
+        for index, info in segmented.items():
+            analysis = {
+                "labels": labels[index],
+                "confidences": confidences[index],
+                "total_segments": info["total_segments"],
+                "segmentation_scale": info["segmentation_scale"]
+            }
+            self.result_cache.put(info["cache_key"], analysis)
+            timings[index].setdefault("resnet", 0.0)
+            timings[index].setdefault("label_mapping", 0.0)
+            analyses[index] = dict(analysis, cache_hit=False, stage_timings=timings[index])
+        
+        for index, first in duplicates.items():
+            analyses[index] = dict(analyses[first], cache_hit=True, stage_timings=timings[index])
+        
+        return analyses
+    
+    def count_objects(self, image_file, target_object_type, confidence_threshold=None):
+        """
+        Main pipeline: Count objects of specified type in image with enhanced confidence processing
+        
+        Args:
+            image_file: Image file from Flask request
+            target_object_type (str): Type of object to count
+            confidence_threshold (float): Optional confidence threshold override
+            
+        Returns:
+            dict: Results including count, confidence metrics, and quality assessment
+        """
+        start_time = time.time()
+        
+        # Steps 1-3: Segment, classify and map (cached by image content)
+        analysis = self.analyze_image(image_file)
+        total_segments = analysis["total_segments"]
+        
+        timings = dict(analysis["stage_timings"])
+        
+        # Step 4: Apply confidence threshold filtering (segment indices stand in for segments)
+        stage_start = time.perf_counter()
         filtered_segments, filtered_labels, filtered_confidences = self.apply_confidence_threshold(
-            segments, final_labels, final_confidences, confidence_threshold
+            list(range(total_segments)), analysis["labels"], analysis["confidences"], confidence_threshold
         )
+        timings["filtering"] = time.perf_counter() - stage_start
         
         # Step 5: Count target objects (using filtered results)
+        stage_start = time.perf_counter()
         target_count = filtered_labels.count(target_object_type)
         
         # Step 6: Calculate confidence aggregation
@@ -423,6 +888,7 @@ class ObjectCountingPipeline:
             total_segments, 
             len(filtered_segments)
         )
+        timings["aggregation"] = time.perf_counter() - stage_start
         
         processing_time = time.time() - start_time
         
@@ -434,7 +900,10 @@ class ObjectCountingPipeline:
             "processing_time": round(processing_time, 2),
             "confidence_metrics": confidence_metrics,
             "quality_assessment": quality_flags,
-            "confidence_threshold_used": confidence_threshold or self.CONFIDENCE_THRESHOLD
+            "confidence_threshold_used": confidence_threshold or self.CONFIDENCE_THRESHOLD,
+            "segmentation_scale": analysis["segmentation_scale"],
+            "cache_hit": analysis["cache_hit"],
+            "stage_timings": self._record_image_metrics(timings, total_segments, len(filtered_segments))
         }
     
     def count_all_objects(self, image_file, confidence_threshold=None):
@@ -451,44 +920,91 @@ class ObjectCountingPipeline:
         start_time = time.time()
         
         # Update performance monitor if available
-        monitor = None
-        if PERFORMANCE_MONITORING:
-            try:
-                monitor = get_performance_monitor()
-                if monitor.is_monitoring:
-                    monitor.update_stage("loading_image")
-            except:
-                pass
+        monitor = self._get_monitor()
+        if monitor:
+            monitor.update_stage("loading_image")
         
-        # Load image
-        image = Image.open(image_file).convert('RGB')
+        # Steps 1-3: Segment, classify and map (cached by image content)
+        analysis = self.analyze_image(image_file, monitor)
         
-        # Step 1: Segment image
-        if monitor and monitor.is_monitoring:
-            monitor.update_stage("segmenting")
-        segmentation_map, segments = self.segment_image(image)
-        total_segments = len(segments)
+        # Steps 4-6: Filter, count and assess
+        result = self._summarize_all_objects(analysis, confidence_threshold, monitor)
         
-        # Step 2: Classify segments with confidence scores
-        if monitor and monitor.is_monitoring:
-            monitor.update_stage("classifying")
-        predicted_classes, classification_confidences = self.classify_segments(segments)
+        # Final stage
+        if monitor:
+            monitor.update_stage("finalizing")
         
-        # Step 3: Map to categories with combined confidence scores
-        if monitor and monitor.is_monitoring:
-            monitor.update_stage("mapping_categories")
-        final_labels, final_confidences = self.map_to_categories(predicted_classes, classification_confidences)
+        processing_time = time.time() - start_time
+        result["processing_time"] = round(processing_time, 2)
+        
+        return result
+    
+    def count_all_objects_batch(self, image_files, confidence_threshold=None):
+        """
+        Detect and count ALL objects in many images with one pipelined run
+        
+        Args:
+            image_files (list): Image files or paths
+            confidence_threshold (float): Optional confidence threshold override
+            
+        Returns:
+            list: count_all_objects results in input order; each
+                processing_time is the image's share of the batch time.
+                Images that could not be decoded get {"error": message}.
+        """
+        start_time = time.time()
         
-        # Step 4: Apply confidence threshold filtering
-        if monitor and monitor.is_monitoring:
+        monitor = self._get_monitor()
+        if monitor:
+            monitor.update_stage("loading_image")
+        
+        # Steps 1-3 for every image, with decode, SAM and classification overlapping
+        analyses = self.analyze_images(image_files, monitor)
+        
+        results = [
+            {"error": analysis["error"]} if "error" in analysis
+            else self._summarize_all_objects(analysis, confidence_threshold, monitor)
+            for analysis in analyses
+        ]
+        
+        if monitor:
+            monitor.update_stage("finalizing")
+        
+        processing_time = (time.time() - start_time) / max(1, len(results))
+        for result in results:
+            if "error" not in result:
+                result["processing_time"] = round(processing_time, 2)
+        
+        return results
+    
+    def _summarize_all_objects(self, analysis, confidence_threshold=None, monitor=None):
+        """
+        Steps 4-6 of count_all_objects: filter, count and assess one analysis
+        
+        Args:
+            analysis (dict): Result of analyze_image
+            confidence_threshold (float): Optional confidence threshold override
+            monitor: Optional PerformanceMonitor to report stages to
+            
+        Returns:
+            dict: count_all_objects result without processing_time
+        """
+        total_segments = analysis["total_segments"]
+        timings = dict(analysis["stage_timings"])
+        
+        # Step 4: Apply confidence threshold filtering (segment indices stand in for segments)
+        if monitor:
             monitor.update_stage("filtering_confidence")
+        stage_start = time.perf_counter()
         filtered_segments, filtered_labels, filtered_confidences = self.apply_confidence_threshold(
-            segments, final_labels, final_confidences, confidence_threshold
+            list(range(total_segments)), analysis["labels"], analysis["confidences"], confidence_threshold
         )
+        timings["filtering"] = time.perf_counter() - stage_start
         
         # Count all object types (using filtered results)
-        if monitor and monitor.is_monitoring:
+        if monitor:
             monitor.update_stage("counting_objects")
+        stage_start = time.perf_counter()
         
         object_counts = {}
         for label in filtered_labels:
@@ -512,12 +1028,7 @@ class ObjectCountingPipeline:
             total_segments, 
             len(filtered_segments)
         )
-        
-        # Final stage
-        if monitor and monitor.is_monitoring:
-            monitor.update_stage("finalizing")
-        
-        processing_time = time.time() - start_time
+        timings["aggregation"] = time.perf_counter() - stage_start
         
         return {
             "objects": objects_list,
@@ -525,11 +1036,10 @@ class ObjectCountingPipeline:
             "total_segments": total_segments,
             "filtered_segments": len(filtered_segments),
             "all_detected_objects": filtered_labels,  # Use filtered results
-            "processing_time": round(processing_time, 2),
             "confidence_metrics": confidence_metrics,
             "quality_assessment": quality_flags,
-            "confidence_threshold_used": confidence_threshold or self.CONFIDENCE_THRESHOLD
+            "confidence_threshold_used": confidence_threshold or self.CONFIDENCE_THRESHOLD,
+            "segmentation_scale": analysis["segmentation_scale"],
+            "cache_hit": analysis["cache_hit"],
+            "stage_timings": self._record_image_metrics(timings, total_segments, len(filtered_segments))
         }
-
-
-
@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+"""Segmentation - Module
+Helpers for turning SAM mask records into cropped image segments
+"""
+import heapq
+
+import numpy as np
+import torch
+
+
+BACKGROUND_VALUE = 188  # Gray fill for pixels outside a segment's mask
+
+
+def segmentation_scale(width, height, max_side):
+    """Get the factor an image is shrunk by before running SAM
+    Args:
+        width (int): image width
+        height (int): image height
+        max_side (int): longest side allowed for SAM input, 0/None disables
+    Return: float scale in (0, 1]
+    """
+    if not max_side or max(width, height) <= max_side:
+        return 1.0
+    return max_side / max(width, height)
+
+
+def mask_window(mask_data, height, width):
+    """Get the region of the image that can contain a mask's pixels
+    Uses the XYWH `bbox` SAM stores on each mask record, padded by one pixel
+    and clipped to the image. Records without a bbox fall back to a single
+    pass over the mask. Masks generated on a downscaled copy of the image
+    are mapped back to full-resolution coordinates.
+    Args:
+        mask_data (dict): SAM mask record
+        height (int): full-resolution image height
+        width (int): full-resolution image width
+    Return: tuple (y_start, y_stop, x_start, x_stop) as slice bounds
+    """
+    segmentation = mask_data['segmentation']
+    scale_y = segmentation.shape[0] / height
+    scale_x = segmentation.shape[1] / width
+
+    bbox = mask_data.get('bbox')
+    if bbox is None:
+        rows = np.flatnonzero(segmentation.any(axis=1))
+        cols = np.flatnonzero(segmentation.any(axis=0))
+        if rows.size == 0:
+            return 0, 0, 0, 0
+        bbox = [cols[0], rows[0], cols[-1] - cols[0], rows[-1] - rows[0]]
+
+    # x + w and y + h are the last column and row covered by the mask
+    x, y, w, h = bbox
+    x_start = max(int(np.floor(x / scale_x)) - 1, 0)
+    y_start = max(int(np.floor(y / scale_y)) - 1, 0)
+    x_stop = min(int(np.ceil((x + w + 1) / scale_x)) + 1, width)
+    y_stop = min(int(np.ceil((y + h + 1) / scale_y)) + 1, height)
+    return y_start, y_stop, x_start, x_stop
+
+
+def _window_mask(segmentation, window, height, width):
+    """Get a mask's pixels inside a full-resolution window
+    Masks from a downscaled image are upsampled with nearest-neighbour
+    lookups for just the window, never for the whole image.
+    """
+    y_start, y_stop, x_start, x_stop = window
+    mask_height, mask_width = segmentation.shape
+    if (mask_height, mask_width) == (height, width):
+        return segmentation[y_start:y_stop, x_start:x_stop]
+
+    rows = (2 * np.arange(y_start, y_stop) + 1) * mask_height // (2 * height)
+    cols = (2 * np.arange(x_start, x_stop) + 1) * mask_width // (2 * width)
+    return segmentation[np.ix_(rows, cols)]
+
+
+def select_top_masks(masks, top_n):
+    """Pick the top_n largest masks by area
+    Uses a partial heap selection instead of sorting every mask. Ties keep
+    SAM's original order, exactly like sorted(..., reverse=True)[:top_n].
+    Args:
+        masks (list): SAM mask records
+        top_n (int): number of masks to keep
+    Return: list of the selected records, largest first
+    """
+    return heapq.nlargest(top_n, masks, key=lambda x: x['area'])
+
+
+def build_panoptic_map(masks, windows, height, width):
+    """Paint masks into a label map, largest first
+    Each mask is painted only inside its window, so smaller masks painted
+    later overwrite larger ones without touching the rest of the image.
+    Masks generated on a downscaled copy are painted at full resolution.
+    Args:
+        masks (list): selected SAM mask records, largest first
+        windows (list): (y_start, y_stop, x_start, x_stop) per mask
+        height (int): image height
+        width (int): image width
+    Return: HxW label map (uint8 when labels fit), 0 is background
+    """
+    dtype = np.uint8 if len(masks) <= np.iinfo(np.uint8).max else np.int32
+    panoptic_map = np.zeros((height, width), dtype=dtype)
+    for idx, (mask_data, window) in enumerate(zip(masks, windows)):
+        y_start, y_stop, x_start, x_stop = window
+        region = panoptic_map[y_start:y_stop, x_start:x_stop]
+        region[_window_mask(mask_data['segmentation'], window, height, width)] = idx + 1
+    return panoptic_map
+
+
+def extract_segments(image_array, panoptic_map, windows):
+    """Crop one gray-backed segment per label of a panoptic map
+    Label i + 1 is searched for only inside windows[i], so the work per
+    segment is proportional to its bounding box instead of the whole image.
+    Labels whose pixels were entirely painted over are skipped, matching
+    iteration over the labels present in the map.
+    Args:
+        image_array (np.ndarray): HxWx3 uint8 image
+        panoptic_map (np.ndarray): HxW label map, 0 is background
+        windows (list): (y_start, y_stop, x_start, x_stop) per label
+    Return: list of 3xhxw uint8 tensors
+    """
+    segments = []
+    for idx, (y_start, y_stop, x_start, x_stop) in enumerate(windows):
+        window_mask = panoptic_map[y_start:y_stop, x_start:x_stop] == idx + 1
+
+        rows = np.flatnonzero(window_mask.any(axis=1))
+        if rows.size == 0:
+            continue
+        cols = np.flatnonzero(window_mask.any(axis=0))
+
+        # Tight bounding box of the label inside its window
+        top, bottom = rows[0], rows[-1] + 1
+        left, right = cols[0], cols[-1] + 1
+
+        cropped_mask = window_mask[top:bottom, left:right]
+        cropped_image = image_array[y_start + top:y_start + bottom,
+                                    x_start + left:x_start + right]
+
+        segment = np.where(cropped_mask[..., None], cropped_image, BACKGROUND_VALUE)
+        segment = np.ascontiguousarray(segment.transpose(2, 0, 1), dtype=np.uint8)
+        segments.append(torch.from_numpy(segment))
+
+    return segments
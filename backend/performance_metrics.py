@@ -2,6 +2,7 @@
 Performance Metrics Utilities for Object Counting AI
 Implements F1 Score, Precision, Recall, and other evaluation metrics
 """
+import numpy as np
 
 def calculate_f1_metrics(predicted_count, corrected_count) -> None:
     """
@@ -189,53 +190,121 @@ def calculate_overall_f1_stats(results) -> None:
     Returns:
         dict: Overall F1 statistics
     """
-    if not results:
-        return {
-            'count': 0,
-            'avg_f1_score': 0,
-            'avg_precision': 0,
-            'avg_recall': 0,
-            'excellent_count': 0,
-            'good_count': 0,
-            'needs_review_count': 0
+    corrected = [r for r in results if r.get('corrected_count') is not None]
+    return calculate_f1_metrics_batch(
+        [r['predicted_count'] for r in corrected],
+        [r['corrected_count'] for r in corrected]
+    )['overall']
+
+def calculate_f1_metrics_batch(predicted_counts, corrected_counts, include_explanations=False) -> None:
+    """
+    Calculate F1 Score, Precision, and Recall for many predictions at once.
+    
+    Vectorized equivalent of calling calculate_f1_metrics on every pair and
+    calculate_overall_f1_stats on the list: all rows are evaluated in a single
+    set of NumPy operations, and explanation strings (the slow part of the
+    scalar version) are only built when asked for.
+    
+    Args:
+        predicted_counts (array-like): AI model's predicted object counts
+        corrected_counts (array-like): User's corrected counts, None/NaN where
+            the prediction was never corrected (those rows are skipped)
+        include_explanations (bool): Also return per-row explanation strings
+        
+    Returns:
+        dict: {
+            'f1_score', 'precision', 'recall': float arrays (0-100),
+            'true_positives', 'false_positives', 'false_negatives': float arrays,
+            'corrected': bool array marking rows with a correction
+                (the metric arrays are NaN elsewhere),
+            'overall': calculate_overall_f1_stats fields plus summed
+                TP/FP/FN and micro-averaged precision/recall/F1 (0-100),
+            'explanations': list of str or None (only with include_explanations)
         }
+    """
+    predicted = np.asarray(predicted_counts, dtype=float)
+    corrected = np.asarray(corrected_counts, dtype=float)
+    if predicted.shape != corrected.shape or predicted.ndim != 1:
+        raise ValueError("predicted_counts and corrected_counts must be 1-D and the same length")
     
-    total_f1 = 0
-    total_precision = 0
-    total_recall = 0
-    excellent_count = 0
-    good_count = 0
-    needs_review_count = 0
-    
-    for result in results:
-        if result.get('corrected_count') is not None:
-            metrics = calculate_f1_metrics(
-                result['predicted_count'], 
-                result['corrected_count']
-            )
-            
-            total_f1 += metrics['f1_score']
-            total_precision += metrics['precision']
-            total_recall += metrics['recall']
-            
-            if metrics['f1_score'] >= 90:
-                excellent_count += 1
-            elif metrics['f1_score'] >= 70:
-                good_count += 1
-            else:
-                needs_review_count += 1
-    
-    count = len([r for r in results if r.get('corrected_count') is not None])
+    mask = ~np.isnan(corrected)
+    pred = predicted[mask]
+    corr = corrected[mask]
     
-    return {
-        'count': count,
-        'avg_f1_score': total_f1 / count if count > 0 else 0,
-        'avg_precision': total_precision / count if count > 0 else 0,
-        'avg_recall': total_recall / count if count > 0 else 0,
-        'excellent_count': excellent_count,
-        'good_count': good_count,
-        'needs_review_count': needs_review_count
+    # Confusion matrix components, as in calculate_f1_metrics
+    tp = np.minimum(pred, corr)
+    fp = np.maximum(pred - corr, 0)
+    fn = np.maximum(corr - pred, 0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # No predictions / no actual objects follow the scalar conventions
+        precision = np.where(pred > 0, tp / pred, (corr == 0).astype(float))
+        recall = np.where(corr > 0, tp / corr, (pred == 0).astype(float))
+        denominator = precision + recall
+        f1 = np.where(denominator > 0, 2 * precision * recall / denominator, 0.0)
+    
+    f1_pct = f1 * 100
+    precision_pct = precision * 100
+    recall_pct = recall * 100
+    
+    def full(values):
+        """Spread corrected-row values over all rows, NaN for the rest"""
+        out = np.full(predicted.shape, np.nan)
+        out[mask] = values
+        return out
+    
+    count = int(mask.sum())
+    excellent_count = int((f1_pct >= 90).sum())
+    good_count = int(((f1_pct >= 70) & (f1_pct < 90)).sum())
+    
+    # Micro averages over the summed counts
+    total_tp, total_fp, total_fn = float(tp.sum()), float(fp.sum()), float(fn.sum())
+    if total_tp + total_fp > 0:
+        micro_precision = total_tp / (total_tp + total_fp)
+    else:
+        micro_precision = 1.0 if total_tp + total_fn == 0 else 0.0
+    if total_tp + total_fn > 0:
+        micro_recall = total_tp / (total_tp + total_fn)
+    else:
+        micro_recall = 1.0 if total_tp + total_fp == 0 else 0.0
+    if micro_precision + micro_recall > 0:
+        micro_f1 = 2 * micro_precision * micro_recall / (micro_precision + micro_recall)
+    else:
+        micro_f1 = 0.0
+    
+    metrics = {
+        'f1_score': full(f1_pct),
+        'precision': full(precision_pct),
+        'recall': full(recall_pct),
+        'true_positives': full(tp),
+        'false_positives': full(fp),
+        'false_negatives': full(fn),
+        'corrected': mask,
+        'overall': {
+            'count': count,
+            'avg_f1_score': float(f1_pct.mean()) if count > 0 else 0,
+            'avg_precision': float(precision_pct.mean()) if count > 0 else 0,
+            'avg_recall': float(recall_pct.mean()) if count > 0 else 0,
+            'excellent_count': excellent_count,
+            'good_count': good_count,
+            'needs_review_count': count - excellent_count - good_count,
+            'true_positives': int(total_tp),
+            'false_positives': int(total_fp),
+            'false_negatives': int(total_fn),
+            'micro_precision': micro_precision * 100 if count > 0 else 0,
+            'micro_recall': micro_recall * 100 if count > 0 else 0,
+            'micro_f1_score': micro_f1 * 100 if count > 0 else 0
+        }
     }
-
-
-
+    
+    if include_explanations:
+        explanations = [None] * len(predicted)
+        for row, index in enumerate(np.flatnonzero(mask)):
+            explanations[index] = generate_performance_explanation(
+                f1_pct[row], precision_pct[row], recall_pct[row],
+                int(pred[row]), int(corr[row]),
+                int(tp[row]), int(fp[row]), int(fn[row])
+            )
+        metrics['explanations'] = explanations
+    
+    return metrics
@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+"""Pipeline Loader - Module
+Lazy, thread-safe construction of the AI counting pipeline. Loading SAM,
+ResNet-50 and DistilBERT takes a long time, so the app starts without them
+and builds the pipeline on the first request that needs it, or earlier in a
+background thread. After building, the pipeline can be warmed up so the
+first real request does not pay for lazy framework allocations.
+"""
+import threading
+import time
+from datetime import datetime
+
+
+class PipelineLoader:
+    """Builds the pipeline once, on demand or in the background
+    Attrs:
+        state: 'not_loaded', 'loading', 'warming_up', 'ready' or 'failed'
+        error: error message if loading failed
+        load_time: seconds spent building the pipeline
+        warm_up_error: error message if warm-up failed (the pipeline is still used)
+    """
+
+    NOT_LOADED = 'not_loaded'
+    LOADING = 'loading'
+    WARMING_UP = 'warming_up'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self, factory, warm_up=False):
+        """Initializes the loader without loading anything
+        Args:
+            factory: callable returning a new pipeline
+            warm_up: call the pipeline's warm_up() before reporting ready
+        """
+        self.factory = factory
+        self.warm_up = warm_up
+        self.state = self.NOT_LOADED
+        self.error = None
+        self.load_time = None
+        self.warm_up_error = None
+        self.started_at = None
+        self._pipeline = None
+        self._lock = threading.Lock()
+        # Held only while starting the background thread; _lock is held for the whole load
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def get(self):
+        """Get the pipeline, loading it first if needed
+        Blocks while another thread is loading it.
+        Return: tuple (pipeline, error) where pipeline is None if loading failed
+        """
+        if self.state not in (self.READY, self.FAILED):
+            self._load()
+        return self._pipeline, self.error
+
+    def _load(self):
+        """Build the pipeline unless another thread already did"""
+        with self._lock:
+            # Check the outcome, not the state: start_background() may have
+            # marked a load that just finished as loading
+            if self._pipeline is not None or self.error is not None:
+                self.state = self.READY if self._pipeline is not None else self.FAILED
+                return
+            self.state = self.LOADING
+            self.started_at = datetime.now()
+            start_time = time.perf_counter()
+            try:
+                pipeline = self.factory()
+                print(f"✅ AI Pipeline initialized successfully in {time.perf_counter() - start_time:.1f}s!")
+            except Exception as e:
+                self.error = str(e)
+                self.state = self.FAILED
+                print(f"❌ Failed to initialize AI pipeline: {e}")
+                print("💡 Make sure all dependencies are installed. See INSTALL_STEPS.md")
+                return
+            finally:
+                self.load_time = time.perf_counter() - start_time
+
+            if self.warm_up and hasattr(pipeline, 'warm_up'):
+                self.state = self.WARMING_UP
+                try:
+                    pipeline.warm_up()
+                except Exception as e:
+                    self.warm_up_error = str(e)
+                    print(f"⚠️  Pipeline warm-up failed: {e}")
+
+            self._pipeline = pipeline
+            self.state = self.READY
+
+    def start_background(self):
+        """Start loading in a daemon thread so the first request does not wait
+        Never waits for a load in progress, so readiness probes can call it.
+        """
+        with self._start_lock:
+            if self._thread is not None or self.state != self.NOT_LOADED:
+                return
+            # Report loading right away, before the thread takes the lock
+            self.state = self.LOADING
+            self._thread = threading.Thread(target=self._load, name='pipeline-loader')
+            self._thread.daemon = True
+            self._thread.start()
+
+    @property
+    def pipeline(self):
+        """The pipeline if it is already built, without triggering a load"""
+        return self._pipeline
+
+    @property
+    def ready(self):
+        """True once the pipeline is built (and warmed up, if enabled)"""
+        return self.state == self.READY
+
+    def status(self, details=False):
+        """Loading state for health checks
+        Args:
+            details: also report per-model load times and warm-up latency
+        Return: dict with state, ready, error, started_at and load_time
+        """
+        status = {
+            'state': self.state,
+            'ready': self.ready,
+            'error': self.error,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'load_time': round(self.load_time, 3) if self.load_time is not None else None
+        }
+        if details:
+            status['model_load_times'] = getattr(self._pipeline, 'model_load_times', None)
+            status['warm_up'] = getattr(self._pipeline, 'warm_up_times', None)
+            status['warm_up_error'] = self.warm_up_error
+        return status
@@ -0,0 +1,30 @@
+#!/usr/bin/python3
+"""Daily Stats Rebuild Script
+Recomputes the daily_output_stats rollup from the outputs table in one
+transaction. The rollup is kept up to date by the storage functions; run
+this after writing outputs by other means (manual SQL, restores) or to
+verify the incremental counters.
+"""
+import sys
+import time
+
+from storage import database
+from storage.daily_stats import rebuild_daily_stats
+from storage.database_functions import init_database
+
+
+def main():
+    """Rebuild the daily stats rollup"""
+    init_database()
+
+    print("🔄 Rebuilding daily output stats...")
+    start_time = time.time()
+    with database.get_engine().begin() as connection:
+        rows = rebuild_daily_stats(connection)
+
+    print(f"✅ Wrote {rows} daily rows in {time.time() - start_time:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+#!/usr/bin/python3
+"""Daily Output Stats - Module
+Rollup of the outputs table: one row per day and object type holding the
+counters accuracy statistics are derived from. Writers update it in the same
+transaction as the outputs they change (see apply_daily_deltas), so trend
+queries read one row per day instead of every output. rebuild_daily_stats
+recomputes the table from outputs.
+"""
+from typing import Optional, List, Dict, Any, Union
+from datetime import datetime
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, String, and_, case, delete, func, literal, select
+from typing import Optional, List, Dict, Any, Union
+from sqlalchemy.dialects import mysql, sqlite
+from .base_model import Base
+from .outputs import Output
+
+
+# Summed counters, in the order get_result_stats and the rollup share
+STAT_COUNTERS = [
+    'predictions', 'corrections', 'confidence_sum', 'predicted_sum', 'absolute_error_sum',
+    'exact_matches', 'true_positives', 'false_positives', 'false_negatives', 'f1_sum',
+    'excellent_count', 'good_count'
+]
+
+
+class DailyOutputStats(Base):
+    """Per-day, per-object-type sums over outputs
+    Args
+        day: date the outputs were created
+        object_type_id: object type of the outputs
+        predictions: number of outputs
+        corrections: number of outputs with a corrected count
+        confidence_sum, predicted_sum: sums of pred_confidence and predicted_count
+        absolute_error_sum, exact_matches: |predicted - corrected| and exact hits
+        true_positives, false_positives, false_negatives: summed confusion counts
+        f1_sum, excellent_count, good_count: per-output F1 (0-1) sum and buckets
+    """
+    __tablename__ = 'daily_output_stats'
+    day = Column(Date(), primary_key=True)
+    object_type_id = Column(String(60), ForeignKey("object_types.id"), primary_key=True)
+    predictions = Column(Integer, nullable=False, default=0)
+    corrections = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float(), nullable=False, default=0)
+    predicted_sum = Column(Integer, nullable=False, default=0)
+    absolute_error_sum = Column(Integer, nullable=False, default=0)
+    exact_matches = Column(Integer, nullable=False, default=0)
+    true_positives = Column(Integer, nullable=False, default=0)
+    false_positives = Column(Integer, nullable=False, default=0)
+    false_negatives = Column(Integer, nullable=False, default=0)
+    f1_sum = Column(Float(), nullable=False, default=0)
+    excellent_count = Column(Integer, nullable=False, default=0)
+    good_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(), nullable=False)
+
+
+def output_counters(predicted_count, corrected_count, pred_confidence) -> None:
+    """Counters one output contributes to its rollup row
+    Uses the same definitions as calculate_f1_metrics: TP = min, FP/FN the
+    over/under count, and F1 = 1 when both counts are zero.
+    Return: dict keyed by STAT_COUNTERS
+    """
+    counters = dict.fromkeys(STAT_COUNTERS, 0)
+    counters['predictions'] = 1
+    counters['confidence_sum'] = pred_confidence or 0
+    counters['predicted_sum'] = predicted_count
+    if corrected_count is not None:
+        true_positives = min(predicted_count, corrected_count)
+        total = predicted_count + corrected_count
+        f1 = 2.0 * true_positives / total if total else 1.0
+        counters.update({
+            'corrections': 1,
+            'absolute_error_sum': abs(predicted_count - corrected_count),
+            'exact_matches': int(predicted_count == corrected_count),
+            'true_positives': true_positives,
+            'false_positives': max(0, predicted_count - corrected_count),
+            'false_negatives': max(0, corrected_count - predicted_count),
+            'f1_sum': f1,
+            'excellent_count': int(f1 >= 0.9),
+            'good_count': int(0.7 <= f1 < 0.9)
+        })
+    return counters
+
+
+def output_delta(created_at, object_type_id, counters, sign=1) -> None:
+    """Build a rollup delta for one output
+    Args:
+        created_at: datetime of the output
+        object_type_id: object type of the output
+        counters: dict from output_counters (or a difference of two)
+        sign: 1 to add the output, -1 to remove it
+    Return: delta dict accepted by apply_daily_deltas
+    """
+    delta = {name: sign * value for name, value in counters.items()}
+    delta.update(day=created_at.date(), object_type_id=object_type_id)
+    return delta
+
+
+def correction_delta(output, corrected_count) -> None:
+    """Rollup delta for changing an output's corrected count"""
+    old = output_counters(output.predicted_count, output.corrected_count, output.pred_confidence)
+    new = output_counters(output.predicted_count, corrected_count, output.pred_confidence)
+    return output_delta(output.created_at, output.object_type_id,
+                        {name: new[name] - old[name] for name in STAT_COUNTERS})
+
+
+def _upsert(dialect_name) -> None:
+    """INSERT that adds to the counters of an existing (day, object type) row"""
+    table = DailyOutputStats.__table__
+    if dialect_name == 'mysql':
+        statement = mysql.insert(table)
+        return statement.on_duplicate_key_update(
+            updated_at=statement.inserted.updated_at,
+            **{name: table.c[name] + statement.inserted[name] for name in STAT_COUNTERS}
+        )
+    if dialect_name == 'sqlite':
+        statement = sqlite.insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=['day', 'object_type_id'],
+            set_=dict(
+                updated_at=statement.excluded.updated_at,
+                **{name: table.c[name] + statement.excluded[name] for name in STAT_COUNTERS}
+            )
+        )
+    raise NotImplementedError(f"Daily stats upsert is not supported on {dialect_name}")
+
+
+def apply_daily_deltas(execute, dialect_name, deltas) -> None:
+    """Add deltas to the rollup with one executemany upsert
+    Deltas for the same day and object type are merged first. Call this in
+    the transaction that writes the outputs so both commit together.
+    Args:
+        execute: callable running a statement with parameters (e.g. database.execute)
+        dialect_name: name of the database dialect ('mysql' or 'sqlite')
+        deltas: iterable of dicts from output_delta
+    """
+    merged = {}
+    for delta in deltas:
+        key = (delta['day'], delta['object_type_id'])
+        row = merged.get(key)
+        if row is None:
+            merged[key] = dict(delta)
+        else:
+            for name in STAT_COUNTERS:
+                row[name] += delta[name]
+
+    rows = [row for row in merged.values() if any(row[name] for name in STAT_COUNTERS)]
+    if not rows:
+        return
+    now = datetime.now()
+    for row in rows:
+        row['updated_at'] = now
+    execute(_upsert(dialect_name), rows)
+
+
+def output_counter_columns() -> None:
+    """SQL expressions summing every counter over outputs, labelled by name
+    Mirrors output_counters so the rollup and direct aggregates agree.
+    """
+    predicted = Output.predicted_count
+    corrected = Output.corrected_count
+    is_corrected = corrected.isnot(None)
+
+    # Per-output confusion components, NULL for uncorrected outputs
+    true_positives = case((is_corrected, case((predicted < corrected, predicted), else_=corrected)))
+    false_positives = case((and_(is_corrected, predicted > corrected), predicted - corrected), else_=0)
+    false_negatives = case((and_(is_corrected, corrected > predicted), corrected - predicted), else_=0)
+    # F1 = 2TP / (predicted + corrected), and 1 when both counts are zero
+    f1 = case(
+        (~is_corrected, None),
+        (predicted + corrected == 0, 1.0),
+        else_=2.0 * true_positives / (predicted + corrected)
+    )
+
+    return [
+        func.count(Output.id).label('predictions'),
+        func.count(corrected).label('corrections'),
+        func.coalesce(func.sum(Output.pred_confidence), 0).label('confidence_sum'),
+        func.coalesce(func.sum(predicted), 0).label('predicted_sum'),
+        func.coalesce(func.sum(func.abs(predicted - corrected)), 0).label('absolute_error_sum'),
+        func.coalesce(func.sum(case((predicted == corrected, 1), else_=0)), 0).label('exact_matches'),
+        func.coalesce(func.sum(true_positives), 0).label('true_positives'),
+        func.coalesce(func.sum(false_positives), 0).label('false_positives'),
+        func.coalesce(func.sum(false_negatives), 0).label('false_negatives'),
+        func.coalesce(func.sum(f1), 0).label('f1_sum'),
+        func.coalesce(func.sum(case((f1 >= 0.9, 1), else_=0)), 0).label('excellent_count'),
+        func.coalesce(func.sum(case((and_(f1 >= 0.7, f1 < 0.9), 1), else_=0)), 0).label('good_count')
+    ]
+
+
+def rebuild_daily_stats(connection) -> None:
+    """Recompute the whole rollup from outputs with one INSERT ... SELECT
+    Args:
+        connection: SQLAlchemy connection inside a transaction
+    Return: number of rollup rows written
+    """
+    table = DailyOutputStats.__table__
+    day = func.date(Output.created_at)
+    summary = select(
+        day.label('day'),
+        Output.object_type_id,
+        *output_counter_columns(),
+        literal(datetime.now(), DateTime()).label('updated_at')
+    ).group_by(day, Output.object_type_id)
+
+    connection.execute(delete(table))
+    result = connection.execute(table.insert().from_select(
+        ['day', 'object_type_id'] + STAT_COUNTERS + ['updated_at'], summary
+    ))
+    return result.rowcount
@@ -3,9 +3,15 @@
 Migrated functions that work with our new MySQL models using UUID primary keys
 """
 from typing import Optional, List, Dict, Any, Union
+import base64
+import json
 import os
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
+from uuid import uuid4
+from typing import Optional, List, Dict, Any, Union
+from sqlalchemy import Date, and_, delete, func, insert, or_, select
+from sqlalchemy.orm import joinedload
 from typing import Optional, List, Dict, Any, Union
 from . import database
 from typing import Optional, List, Dict, Any, Union
@@ -14,6 +20,13 @@ from typing import Optional, List, Dict, Any, Union
 from .inputs import Input
 from typing import Optional, List, Dict, Any, Union
 from .outputs import Output
+from typing import Optional, List, Dict, Any, Union
+from .object_type_registry import object_types
+from typing import Optional, List, Dict, Any, Union
+from .daily_stats import (
+    DailyOutputStats, STAT_COUNTERS, apply_daily_deltas, correction_delta,
+    output_counter_columns, output_counters, output_delta
+)
 
 
 def init_database() -> None:
@@ -27,7 +40,7 @@ def init_database() -> None:
         if not existing_types:
             print("SUCCESS: Initializing object types...")
             
-            object_types = [
+            default_types = [
                 {'name': 'car', 'description': 'Automobiles and vehicles'},
                 {'name': 'cat', 'description': 'Domestic cats'},
                 {'name': 'tree', 'description': 'Trees and large plants'},
@@ -45,14 +58,14 @@ def init_database() -> None:
                 {'name': 'airplane', 'description': 'Aircraft and planes'}
             ]
             
-            for obj_type in object_types:
+            for obj_type in default_types:
                 new_type = ObjectType()
                 new_type.name = obj_type['name']
                 new_type.description = obj_type['description']
                 database.new(new_type)
             
             database.save()
-            print(f"SUCCESS: Created {len(object_types)} object types")
+            print(f"SUCCESS: Created {len(default_types)} object types")
         else:
             print(f"SUCCESS: Database already initialized with {len(existing_types)} object types")
             
@@ -73,12 +86,52 @@ def get_object_type_by_name(name) -> None:
         return None
 
 
+def get_object_type_id(name) -> None:
+    """Get the id of an object type from the in-memory registry (no SELECT)"""
+    try:
+        return object_types.get_id(name)
+    except Exception as e:
+        print(f"ERROR: Failed to get object type '{name}': {e}")
+        return None
+
+
+def get_object_type_names() -> None:
+    """Get the names of all object types from the in-memory registry"""
+    try:
+        return object_types.names()
+    except Exception as e:
+        print(f"ERROR: Failed to get object types: {e}")
+        return []
+
+
+def get_cached_object_types() -> None:
+    """Get all object types as dicts from the in-memory registry"""
+    try:
+        return object_types.entries()
+    except Exception as e:
+        print(f"ERROR: Failed to get object types: {e}")
+        return []
+
+
+def invalidate_object_types() -> None:
+    """Force the object type registry to reload on next use
+    Needed only for changes the ORM does not see, e.g. rows written by
+    another process or raw SQL.
+    """
+    object_types.invalidate()
+
+
+def _record_daily_stats(deltas) -> None:
+    """Add rollup deltas in the current transaction (committed with the outputs)"""
+    apply_daily_deltas(database.execute, database.get_engine().dialect.name, deltas)
+
+
 def save_prediction_result(image_path, object_type_name, predicted_count, description=None, pred_confidence=0.85) -> None:
     """Save a prediction result to MySQL database using UUID models"""
     try:
         # Get object type
-        object_type = get_object_type_by_name(object_type_name)
-        if not object_type:
+        object_type_id = get_object_type_id(object_type_name)
+        if not object_type_id:
             raise ValueError(f"Object type '{object_type_name}' not found")
         
         # Create input record
@@ -90,18 +143,16 @@ def save_prediction_result(image_path, object_type_name, predicted_count, descri
         output_record = Output()
         output_record.predicted_count = predicted_count
         output_record.pred_confidence = pred_confidence
-        output_record.object_type_id = object_type.id
-        output_record.input_id = input_record.id  # This will be set after input is saved
+        output_record.object_type_id = object_type_id
+        output_record.input_id = input_record.id  # UUIDs are assigned in Python, no flush needed
         
-        # Save input first to get UUID
+        # Save both rows and the rollup in one transaction; the flush inserts the input first
         database.new(input_record)
-        database.save()
-        
-        # Now set the input_id for output
-        output_record.input_id = input_record.id
-        
-        # Save output
         database.new(output_record)
+        _record_daily_stats([output_delta(
+            output_record.created_at, object_type_id,
+            output_counters(predicted_count, None, pred_confidence)
+        )])
         database.save()
         
         print(f"SUCCESS: Saved prediction result - {object_type_name}: {predicted_count} objects")
@@ -113,6 +164,135 @@ def save_prediction_result(image_path, object_type_name, predicted_count, descri
         raise e
 
 
+def save_prediction_results(image_path, predicted_counts, description=None, pred_confidence=0.85) -> None:
+    """Save predictions for several object types of one image in a single transaction
+    Args:
+        image_path: stored filename of the uploaded image
+        predicted_counts: dict mapping object type name -> predicted count
+        description: optional description of the input
+        pred_confidence: confidence stored on every output
+    Return: list of Output records in the order of predicted_counts
+    """
+    try:
+        # Resolve every object type before writing anything
+        object_type_ids = {}
+        for object_type_name in predicted_counts:
+            object_type_id = get_object_type_id(object_type_name)
+            if not object_type_id:
+                raise ValueError(f"Object type '{object_type_name}' not found")
+            object_type_ids[object_type_name] = object_type_id
+        
+        # Create input record shared by all outputs
+        input_record = Input()
+        input_record.image_path = image_path
+        input_record.description = description or ""
+        database.new(input_record)
+        
+        # Create one output record per object type
+        output_records = []
+        for object_type_name, predicted_count in predicted_counts.items():
+            output_record = Output()
+            output_record.predicted_count = predicted_count
+            output_record.pred_confidence = pred_confidence
+            output_record.object_type_id = object_type_ids[object_type_name]
+            output_record.input_id = input_record.id
+            database.new(output_record)
+            output_records.append(output_record)
+        
+        _record_daily_stats([
+            output_delta(record.created_at, record.object_type_id,
+                         output_counters(record.predicted_count, None, pred_confidence))
+            for record in output_records
+        ])
+        database.save()
+        
+        print(f"SUCCESS: Saved {len(output_records)} prediction results for {image_path}")
+        return output_records
+        
+    except Exception as e:
+        print(f"ERROR: Failed to save prediction results: {e}")
+        database.rollback()
+        raise e
+
+
+def save_prediction_results_bulk(predictions) -> None:
+    """Save predictions for many images with two executemany INSERTs and one commit
+    Rows are written with Core INSERT statements (one for inputs, one for
+    outputs) instead of ORM objects, so batch ingestion and backfills skip
+    per-object bookkeeping. Backfilled rows may carry their original
+    timestamps and corrections.
+    Args:
+        predictions: list of dicts with image_path, predicted_counts (object type
+            name -> predicted count) and optional description, pred_confidence,
+            created_at (datetime) and corrected_counts (object type name -> count)
+    Return: list per prediction of output dicts (id, input_id, object_type,
+        predicted_count, corrected_count, created_at), in input order
+    """
+    try:
+        # Resolve every object type once before writing anything
+        object_type_ids = {}
+        for prediction in predictions:
+            for object_type_name in prediction['predicted_counts']:
+                if object_type_name in object_type_ids:
+                    continue
+                object_type_id = get_object_type_id(object_type_name)
+                if not object_type_id:
+                    raise ValueError(f"Object type '{object_type_name}' not found")
+                object_type_ids[object_type_name] = object_type_id
+        
+        now = datetime.now()
+        input_rows = []
+        output_rows = []
+        saved = []
+        for prediction in predictions:
+            created_at = prediction.get('created_at') or now
+            corrected_counts = prediction.get('corrected_counts') or {}
+            input_id = str(uuid4())
+            input_rows.append({
+                'id': input_id,
+                'created_at': created_at,
+                'updated_at': created_at,
+                'image_path': prediction['image_path'],
+                'description': prediction.get('description') or ""
+            })
+            
+            outputs = []
+            for object_type_name, predicted_count in prediction['predicted_counts'].items():
+                output_row = {
+                    'id': str(uuid4()),
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'predicted_count': predicted_count,
+                    'corrected_count': corrected_counts.get(object_type_name),
+                    'pred_confidence': prediction.get('pred_confidence', 0.85),
+                    'object_type_id': object_type_ids[object_type_name],
+                    'input_id': input_id
+                }
+                output_rows.append(output_row)
+                outputs.append(dict(output_row, object_type=object_type_name))
+            saved.append(outputs)
+        
+        if input_rows:
+            database.execute(insert(Input), input_rows)
+        if output_rows:
+            database.execute(insert(Output), output_rows)
+        _record_daily_stats([
+            output_delta(row['created_at'], row['object_type_id'], output_counters(
+                row['predicted_count'], row['corrected_count'], row['pred_confidence']
+            ))
+            for row in output_rows
+        ])
+        database.save()
+        
+        print(f"SUCCESS: Saved {len(output_rows)} prediction results for {len(input_rows)} images")
+        return saved
+        
+    except Exception as e:
+        print(f"ERROR: Failed to save prediction results: {e}")
+        database.rollback()
+        raise e
+
+
 def update_correction(output_id, corrected_count) -> None:
     """Update a prediction with user correction using MySQL engine"""
     try:
@@ -121,6 +301,9 @@ def update_correction(output_id, corrected_count) -> None:
         if not output:
             raise ValueError(f"Output with ID {output_id} not found")
         
+        # Move the output's rollup contribution to the new count
+        _record_daily_stats([correction_delta(output, corrected_count)])
+        
         # Update corrected count
         output.corrected_count = corrected_count
         output.updated_at = datetime.now()
@@ -164,47 +347,136 @@ def get_all_inputs() -> None:
         return []
 
 
-def get_all_results(page=1, per_page=10, object_type_filter=None):
-    """Get all results with pagination and filtering from MySQL database"""
+def _results_query(object_type_filter=None):
+    """Build the SELECT behind result listings
+    Projects only the columns a result row needs, with the object type name
+    and input joined in, so a page is a single query.
+    Args:
+        object_type_filter: object type name to filter on, None or 'all' for every type
+    Return: Query of result rows
+    """
+    query = database.query(
+        Output.id, Output.predicted_count, Output.corrected_count, Output.pred_confidence,
+        Output.created_at, Output.updated_at,
+        ObjectType.name.label('object_type_name'), Input.image_path, Input.description
+    ).\
+        outerjoin(ObjectType, Output.object_type_id == ObjectType.id).\
+        outerjoin(Input, Output.input_id == Input.id)
+    if object_type_filter and object_type_filter != 'all':
+        query = query.filter(ObjectType.name == object_type_filter)
+    return query
+
+
+def _format_result_row(row):
+    """Format a row of _results_query for the API"""
+    return {
+        'id': row.id,
+        'predicted_count': row.predicted_count,
+        'corrected_count': row.corrected_count,
+        'object_type': row.object_type_name or 'Unknown',
+        'image_path': row.image_path or '',
+        'description': row.description or '',
+        'created_at': row.created_at.isoformat(),
+        'updated_at': row.updated_at.isoformat(),
+        'pred_confidence': row.pred_confidence
+    }
+
+
+def encode_results_cursor(created_at, output_id):
+    """Encode the position after a result row as an opaque cursor
+    Args:
+        created_at: created_at of the last row returned
+        output_id: id of the last row returned
+    Return: URL-safe cursor string
+    """
+    payload = json.dumps({'created_at': created_at.isoformat(), 'id': output_id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_results_cursor(cursor):
+    """Decode a cursor made by encode_results_cursor
+    Args:
+        cursor: cursor string from a previous page
+    Return: tuple (created_at, output_id)
+    Raises: ValueError if the cursor is malformed
+    """
     try:
-        # Get all outputs first
-        all_outputs = database.get_all(Output)
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(payload['created_at']), str(payload['id'])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def get_results_after_cursor(cursor=None, per_page=10, object_type_filter=None):
+    """Get a page of results with keyset (cursor) pagination
+    Rows are ordered by (created_at, id) newest first and the page starts
+    strictly after the cursor position, so the database seeks through the
+    (created_at, id) index instead of scanning and discarding an OFFSET.
+    Args:
+        cursor: next_cursor of the previous page, None or '' for the first page
+        per_page: number of results per page
+        object_type_filter: object type name to filter on
+    Return: dict with results and pagination (per_page, next_cursor, has_more)
+    Raises: ValueError if the cursor is malformed
+    """
+    try:
+        query = _results_query(object_type_filter)
+        if cursor:
+            created_at, output_id = decode_results_cursor(cursor)
+            query = query.filter(or_(
+                Output.created_at < created_at,
+                and_(Output.created_at == created_at, Output.id < output_id)
+            ))
+        
+        # Fetch one extra row to know whether another page exists
+        rows = query.\
+            order_by(Output.created_at.desc(), Output.id.desc()).\
+            limit(per_page + 1).\
+            all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
         
-        # Filter by object type if specified
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_results_cursor(rows[-1].created_at, rows[-1].id)
+        
+        return {
+            'results': [_format_result_row(row) for row in rows],
+            'pagination': {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_more': has_more
+            }
+        }
+        
+    except Exception as e:
+        print(f"ERROR: Failed to get results after cursor: {e}")
+        raise e
+
+
+def get_all_results(page=1, per_page=10, object_type_filter=None):
+    """Get all results with pagination and filtering from MySQL database
+    Filtering, ordering (newest first) and paging run in the database, and
+    the total comes from a separate COUNT query, so a page costs the same
+    regardless of table size.
+    """
+    try:
+        page_query = _results_query(object_type_filter)
+        count_query = database.query(func.count(Output.id))
         if object_type_filter and object_type_filter != 'all':
-            filtered_outputs = []
-            for output in all_outputs:
-                if output.object_type and output.object_type.name == object_type_filter:
-                    filtered_outputs.append(output)
-            all_outputs = filtered_outputs
-        
-        # Sort by creation date (newest first)
-        all_outputs.sort(key=lambda x: x.created_at, reverse=True)
-        
-        # Apply pagination
-        total_count = len(all_outputs)
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_outputs = all_outputs[start_idx:end_idx]
-        
-        # Format results
-        formatted_results = []
-        for output in paginated_outputs:
-            # Get related data
-            input_record = database.get(Input, output.input_id) if output.input_id else None
-            object_type = database.get(ObjectType, output.object_type_id) if output.object_type_id else None
-            
-            formatted_results.append({
-                'id': output.id,
-                'predicted_count': output.predicted_count,
-                'corrected_count': output.corrected_count,
-                'object_type': object_type.name if object_type else 'Unknown',
-                'image_path': input_record.image_path if input_record else '',
-                'description': input_record.description if input_record else '',
-                'created_at': output.created_at.isoformat(),
-                'updated_at': output.updated_at.isoformat(),
-                'pred_confidence': output.pred_confidence
-            })
+            count_query = count_query.join(ObjectType, Output.object_type_id == ObjectType.id).\
+                filter(ObjectType.name == object_type_filter)
+        
+        total_count = count_query.scalar()
+        
+        # Sort by creation date (newest first) and apply pagination
+        rows = page_query.\
+            order_by(Output.created_at.desc(), Output.id.desc()).\
+            limit(per_page).\
+            offset((page - 1) * per_page).\
+            all()
+        
+        formatted_results = [_format_result_row(row) for row in rows]
         
         return {
             'results': formatted_results,
@@ -229,6 +501,142 @@ def get_all_results(page=1, per_page=10, object_type_filter=None):
         }
 
 
+def _stats_from_sums(sums) -> None:
+    """Derive rates and F1 statistics from summed counters
+    Precision, recall and F1 are micro-averaged over all corrected outputs
+    (summed TP/FP/FN); avg_f1_score is the mean of the per-output F1 Scores,
+    matching calculate_overall_f1_stats. Percentages are 0-100.
+    """
+    total = sums['predictions']
+    corrected = sums['corrections']
+    true_positives = sums['true_positives']
+    predicted_objects = true_positives + sums['false_positives']
+    actual_objects = true_positives + sums['false_negatives']
+    
+    # Same conventions as calculate_f1_metrics when nothing was predicted or present
+    if predicted_objects > 0:
+        precision = true_positives / predicted_objects
+    else:
+        precision = 1.0 if actual_objects == 0 else 0.0
+    if actual_objects > 0:
+        recall = true_positives / actual_objects
+    else:
+        recall = 1.0 if predicted_objects == 0 else 0.0
+    f1_score = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    
+    return {
+        'total_predictions': total,
+        'corrected_predictions': corrected,
+        'correction_rate': corrected / total * 100 if total else 0,
+        'avg_confidence': sums['confidence_sum'] / total if total else 0,
+        'total_predicted_count': sums['predicted_sum'],
+        'mean_absolute_error': sums['absolute_error_sum'] / corrected if corrected else None,
+        'exact_matches': sums['exact_matches'],
+        'true_positives': true_positives,
+        'false_positives': sums['false_positives'],
+        'false_negatives': sums['false_negatives'],
+        'precision': precision * 100 if corrected else None,
+        'recall': recall * 100 if corrected else None,
+        'f1_score': f1_score * 100 if corrected else None,
+        'avg_f1_score': sums['f1_sum'] / corrected * 100 if corrected else None,
+        'excellent_count': sums['excellent_count'],
+        'good_count': sums['good_count'],
+        'needs_review_count': corrected - sums['excellent_count'] - sums['good_count']
+    }
+
+
+def get_result_stats(start_date=None, end_date=None, object_type_filter=None) -> None:
+    """Aggregate prediction and accuracy statistics per object type in SQL
+    A single GROUP BY query returns per-type sums (counts, confidence, absolute
+    error, TP/FP/FN, per-output F1); totals are derived from those sums, so no
+    output rows are loaded into Python.
+    Args:
+        start_date: only outputs created at or after this datetime
+        end_date: only outputs created before this datetime
+        object_type_filter: object type name, None or 'all' for every type
+    Return: dict with totals and by_object_type statistics
+    """
+    try:
+        query = database.query(
+            ObjectType.name.label('object_type'),
+            *output_counter_columns()
+        ).join(ObjectType, Output.object_type_id == ObjectType.id)
+        
+        if start_date:
+            query = query.filter(Output.created_at >= start_date)
+        if end_date:
+            query = query.filter(Output.created_at < end_date)
+        if object_type_filter and object_type_filter != 'all':
+            query = query.filter(ObjectType.name == object_type_filter)
+        
+        rows = query.group_by(ObjectType.name).order_by(ObjectType.name).all()
+        
+        totals = dict.fromkeys(STAT_COUNTERS, 0)
+        by_object_type = []
+        for row in rows:
+            sums = {name: getattr(row, name) for name in STAT_COUNTERS}
+            for name in STAT_COUNTERS:
+                totals[name] += sums[name]
+            by_object_type.append(dict(_stats_from_sums(sums), object_type=row.object_type))
+        
+        return {
+            'totals': _stats_from_sums(totals),
+            'by_object_type': by_object_type
+        }
+        
+    except Exception as e:
+        print(f"ERROR: Failed to get result stats: {e}")
+        raise e
+
+
+def _as_day(value):
+    """Truncate a datetime to its date; dates are returned unchanged"""
+    return value.date() if isinstance(value, datetime) else value
+
+
+def get_accuracy_trends(start_date=None, end_date=None, object_type_filter=None, by_object_type=False) -> None:
+    """Daily accuracy statistics read from the daily_output_stats rollup
+    Reads one row per day and object type instead of scanning outputs.
+    Args:
+        start_date: first day included (date or datetime, time is ignored)
+        end_date: first day excluded (date or datetime, time is ignored)
+        object_type_filter: object type name, None or 'all' for every type
+        by_object_type: return one entry per day and object type instead of per day
+    Return: list of dicts with day (YYYY-MM-DD) and the get_result_stats fields
+    """
+    try:
+        group_columns = [DailyOutputStats.day]
+        if by_object_type:
+            group_columns.append(ObjectType.name.label('object_type'))
+        
+        query = database.query(
+            *group_columns,
+            *[func.sum(getattr(DailyOutputStats, name)).label(name) for name in STAT_COUNTERS]
+        ).join(ObjectType, DailyOutputStats.object_type_id == ObjectType.id)
+        
+        if start_date:
+            query = query.filter(DailyOutputStats.day >= _as_day(start_date))
+        if end_date:
+            query = query.filter(DailyOutputStats.day < _as_day(end_date))
+        if object_type_filter and object_type_filter != 'all':
+            query = query.filter(ObjectType.name == object_type_filter)
+        
+        rows = query.group_by(*group_columns).order_by(*group_columns).all()
+        
+        trends = []
+        for row in rows:
+            entry = {'day': row.day.isoformat()}
+            if by_object_type:
+                entry['object_type'] = row.object_type
+            entry.update(_stats_from_sums({name: getattr(row, name) for name in STAT_COUNTERS}))
+            trends.append(entry)
+        return trends
+        
+    except Exception as e:
+        print(f"ERROR: Failed to get accuracy trends: {e}")
+        raise e
+
+
 def get_results_by_object_type(object_type_name, page=1, per_page=10):
     """Get results filtered by object type with pagination"""
     return get_all_results(page, per_page, object_type_name)
@@ -253,7 +661,7 @@ def get_input_by_id(input_id) -> None:
 
 
 def delete_output(output_id) -> None:
-    """Delete output and associated input by UUID"""
+    """Delete output by UUID, and its input once no other output uses it"""
     try:
         # Get output record
         output = database.get(Output, output_id)
@@ -263,14 +671,19 @@ def delete_output(output_id) -> None:
         # Get associated input
         input_record = database.get(Input, output.input_id)
         
-        # Delete output first (due to foreign key constraints)
-        database.delete(output)
+        _record_daily_stats([output_delta(output.created_at, output.object_type_id, output_counters(
+            output.predicted_count, output.corrected_count, output.pred_confidence
+        ), sign=-1)])
         
-        # Delete input if it exists
-        if input_record:
+        # Inputs are shared by every object type counted in one image, so only
+        # drop the input with its last output
+        siblings = [record for record in input_record.outputs if record.id != output.id] if input_record else []
+        if input_record and not siblings:
             database.delete(input_record)
-        
-        print(f"SUCCESS: Deleted output {output_id} and associated input")
+            print(f"SUCCESS: Deleted output {output_id} and associated input")
+        else:
+            database.delete(output)
+            print(f"SUCCESS: Deleted output {output_id}")
         return True
         
     except Exception as e:
@@ -279,25 +692,100 @@ def delete_output(output_id) -> None:
         raise e
 
 
-def get_outputs_with_relationships() -> None:
-    """Get all outputs with their related object types and inputs"""
+def _chunks(values, size):
+    """Split a list into consecutive slices of at most size items"""
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def delete_outputs(output_ids, chunk_size=500) -> None:
+    """Delete many outputs, and inputs left without outputs, in one transaction
+    Like delete_output, only the requested outputs are removed; an input is
+    deleted once none of its outputs remain. The daily rollup is decremented
+    from one GROUP BY over the deleted outputs instead of per row.
+    Args:
+        output_ids: output UUIDs; unknown ids are reported, not fatal
+        chunk_size: ids per IN (...) list, to stay under bound-parameter limits
+    Return: dict with deleted_result_ids, missing_ids, deleted_outputs,
+        deleted_inputs and image_paths of the deleted inputs
+    """
     try:
-        # This is a more complex query that joins the tables
-        # For now, we'll get all outputs and their relationships separately
-        outputs = database.get_all(Output)
-        results = []
-        
-        for output in outputs:
-            object_type = database.get(ObjectType, output.object_type_id)
-            input_record = database.get(Input, output.input_id)
+        output_ids = list(dict.fromkeys(output_ids))
+        
+        # Resolve which requested outputs exist and the inputs they belong to
+        input_by_output = {}
+        for chunk in _chunks(output_ids, chunk_size):
+            input_by_output.update(database.execute(
+                select(Output.id, Output.input_id).where(Output.id.in_(chunk))
+            ).all())
+        found_ids = [output_id for output_id in output_ids if output_id in input_by_output]
+        input_ids = list(dict.fromkeys(input_by_output.values()))
+        
+        deltas = []
+        deleted_outputs = 0
+        day = func.date(Output.created_at, type_=Date)
+        for chunk in _chunks(found_ids, chunk_size):
+            # Subtract the outputs about to be deleted from the rollup
+            for row in database.execute(
+                select(day.label('day'), Output.object_type_id, *output_counter_columns())
+                .where(Output.id.in_(chunk))
+                .group_by(day, Output.object_type_id)
+            ):
+                delta = {name: -getattr(row, name) for name in STAT_COUNTERS}
+                delta.update(day=row.day, object_type_id=row.object_type_id)
+                deltas.append(delta)
             
-            results.append({
-                'output': output,
-                'object_type': object_type,
-                'input': input_record
-            })
+            deleted_outputs += database.execute(
+                delete(Output).where(Output.id.in_(chunk))
+            ).rowcount
+        
+        # Inputs still holding other object types' outputs are kept
+        image_paths = []
+        deleted_inputs = 0
+        for chunk in _chunks(input_ids, chunk_size):
+            orphans = database.execute(
+                select(Input.id, Input.image_path)
+                .where(Input.id.in_(chunk), ~select(Output.id).where(Output.input_id == Input.id).exists())
+            ).all()
+            if orphans:
+                database.execute(delete(Input).where(Input.id.in_([row.id for row in orphans])))
+                deleted_inputs += len(orphans)
+                image_paths.extend(row.image_path for row in orphans)
+        
+        _record_daily_stats(deltas)
+        database.save()
+        
+        print(f"SUCCESS: Deleted {deleted_outputs} outputs and {deleted_inputs} inputs")
+        return {
+            'deleted_result_ids': found_ids,
+            'missing_ids': [output_id for output_id in output_ids if output_id not in input_by_output],
+            'deleted_outputs': deleted_outputs,
+            'deleted_inputs': deleted_inputs,
+            'image_paths': [path for path in image_paths if path]
+        }
+        
+    except Exception as e:
+        print(f"ERROR: Failed to delete outputs: {e}")
+        database.rollback()
+        raise e
+
+
+def get_outputs_with_relationships() -> None:
+    """Get all outputs with their related object types and inputs
+    Object types and inputs are joined into the same SELECT instead of being
+    loaded one row at a time.
+    """
+    try:
+        outputs = database.query(Output).\
+            options(joinedload(Output.object_type), joinedload(Output.input)).\
+            all()
         
-        return results
+        return [
+            {
+                'output': output,
+                'object_type': output.object_type,
+                'input': output.input
+            } for output in outputs
+        ]
         
     except Exception as e:
         print(f"ERROR: Failed to get outputs with relationships: {e}")
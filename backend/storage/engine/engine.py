@@ -7,6 +7,8 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from typing import Optional, List, Dict, Any, Union
 from ..base_model import Base
 from typing import Optional, List, Dict, Any, Union
+from ..migrations import run_migrations
+from typing import Optional, List, Dict, Any, Union
 from os import getenv
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
@@ -32,7 +34,13 @@ class Engine:
         else:  # Configure an SQLITE DB instance for testing
             exec_db = f'sqlite:///{OBJ_DETECT_MYSQL_DB}'
         # Create the engine
+        self.__url = exec_db
         self.__engine = create_engine(exec_db, pool_pre_ping=True)
+        # One session registry for the life of the engine: every thread (one
+        # per request under a threaded server) works in its own session, and
+        # replacing the registry would strand sessions other threads are using
+        session_db = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        self.__session = scoped_session(session_db)
 
         if OBJ_DETECT_ENV == 'test':
             # Drop all tables to ensure a clean slate for testing
@@ -91,6 +99,23 @@ class Engine:
         """
         return self.__session.query(cls).filter_by(name=name).one_or_none()
     
+    def execute(self, statement, parameters=None) -> None:
+        """Execute a Core statement in the current session's transaction
+        Args:
+            statement: SQLAlchemy statement, e.g. insert(Output)
+            parameters: dict, or list of dicts to run as one executemany
+        Return: Result of the statement
+        """
+        return self.__session.execute(statement, parameters)
+    
+    def query(self, *entities) -> None:
+        """Start a query on the current session
+        Args:
+            entities: mapped classes, columns or SQL expressions to select
+        Return: Query object for further filtering, ordering and paging
+        """
+        return self.__session.query(*entities)
+    
     def count(self, cls) -> None:
         """Count objects of a specific class
         Args:
@@ -117,11 +142,37 @@ class Engine:
     def reload(self) -> None:
         """
             create table in database
+            Safe to call while other threads use their sessions: sessions
+            come from the registry created with the engine, so call remove()
+            when a request or job is done with its session.
         """
         Base.metadata.create_all(self.__engine)
-        session_db = sessionmaker(bind=self.__engine, expire_on_commit=False)
-        Session = scoped_session(session_db)
-        self.__session = Session()
+        # Bring tables created by older versions up to date
+        run_migrations(self.__engine)
+
+    def configure(self, **engine_options) -> None:
+        """Recreate the engine with connection pool options
+        Args:
+            engine_options: create_engine keyword arguments such as
+                pool_size, max_overflow, pool_recycle and pool_timeout
+        """
+        self.__session.remove()
+        self.__engine.dispose()
+        self.__engine = create_engine(self.__url, pool_pre_ping=True, **engine_options)
+        self.__session.configure(bind=self.__engine)
+        self.reload()
+
+    def remove(self) -> None:
+        """
+            Close the current thread's session and discard it, returning
+            its connection to the pool
+        """
+        if self.__session:
+            self.__session.remove()
+
+    def get_engine(self) -> None:
+        """Get the underlying SQLAlchemy engine"""
+        return self.__engine
 
     def close(self) -> None:
         """
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+"""Migrations - Module
+Versioned schema changes for databases created before a model changed.
+Base.metadata.create_all only creates missing tables, so indexes and other
+changes to existing tables are applied here. Each migration runs once and is
+recorded in the schema_migrations table; migrations are written with
+SQLAlchemy DDL so they work on both MySQL and SQLite. Workers starting
+together are serialized with an advisory lock on MySQL; elsewhere a
+duplicate version row means another process applied the migration first.
+"""
+from typing import Optional, List, Dict, Any, Union
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Column, DateTime, String, Table, inspect, text
+from sqlalchemy.exc import IntegrityError
+from .base_model import Base
+from .outputs import Output
+from .daily_stats import rebuild_daily_stats
+
+
+schema_migrations = Table(
+    'schema_migrations', Base.metadata,
+    Column('version', String(32), primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime(), nullable=False)
+)
+
+
+# MySQL advisory lock held while migrations run, and seconds to wait for it
+MIGRATION_LOCK_NAME = 'obj_detect_schema_migrations'
+MIGRATION_LOCK_TIMEOUT = 300
+
+
+def _create_indexes(connection, table, names) -> None:
+    """Create the named indexes declared on a table if they are missing"""
+    existing = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in names and index.name not in existing:
+            index.create(connection)
+
+
+def create_output_listing_indexes(connection) -> None:
+    """Indexes used by result listings, filters and keyset pagination"""
+    _create_indexes(connection, Output.__table__, {
+        'ix_outputs_created_at_id',
+        'ix_outputs_object_type_id_created_at',
+        'ix_outputs_input_id'
+    })
+
+
+def backfill_daily_output_stats(connection) -> None:
+    """Fill the daily rollup (created empty by create_all) from existing outputs"""
+    rebuild_daily_stats(connection)
+
+
+# Ordered (version, description, function) tuples; never reorder or renumber
+MIGRATIONS = [
+    ('0001', 'Composite indexes for output listings', create_output_listing_indexes),
+    ('0002', 'Backfill daily output stats rollup', backfill_daily_output_stats),
+]
+
+
+def applied_migrations(engine) -> None:
+    """Get the versions already applied to a database
+    Args:
+        engine: SQLAlchemy engine
+    Return: set of version strings
+    """
+    with engine.connect() as connection:
+        if not inspect(connection).has_table(schema_migrations.name):
+            return set()
+        return {row.version for row in connection.execute(schema_migrations.select())}
+
+
+@contextmanager
+def migration_lock(engine) -> None:
+    """Hold a MySQL advisory lock so only one process migrates at a time
+    Other dialects have no advisory locks; run_migrations handles their
+    races through the schema_migrations primary key instead.
+    Args:
+        engine: SQLAlchemy engine
+    """
+    if engine.dialect.name != 'mysql':
+        yield
+        return
+
+    with engine.connect() as connection:
+        acquired = connection.execute(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {'name': MIGRATION_LOCK_NAME, 'timeout': MIGRATION_LOCK_TIMEOUT}
+        ).scalar()
+        if acquired != 1:
+            raise RuntimeError(f"Timed out waiting for migration lock {MIGRATION_LOCK_NAME}")
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT RELEASE_LOCK(:name)"), {'name': MIGRATION_LOCK_NAME})
+
+
+def run_migrations(engine) -> None:
+    """Apply pending migrations in order, each in its own transaction
+    Args:
+        engine: SQLAlchemy engine
+    Return: list of versions applied by this call
+    """
+    with migration_lock(engine):
+        try:
+            schema_migrations.create(engine, checkfirst=True)
+        except Exception:
+            # Another process created it between the check and the CREATE
+            if not inspect(engine).has_table(schema_migrations.name):
+                raise
+        done = applied_migrations(engine)
+
+        applied = []
+        for version, description, migrate in MIGRATIONS:
+            if version in done:
+                continue
+            try:
+                with engine.begin() as connection:
+                    migrate(connection)
+                    connection.execute(schema_migrations.insert().values(
+                        version=version,
+                        description=description,
+                        applied_at=datetime.now()
+                    ))
+            except IntegrityError as e:
+                # The insert rolled the migration back; fine if another process recorded it
+                if version not in applied_migrations(engine):
+                    print(f"ERROR: Migration {version} ({description}) failed: {e}")
+                    raise e
+                print(f"SUCCESS: Migration {version} was applied by another process")
+                continue
+            except Exception as e:
+                print(f"ERROR: Migration {version} ({description}) failed: {e}")
+                raise e
+            print(f"SUCCESS: Applied migration {version} - {description}")
+            applied.append(version)
+
+        return applied
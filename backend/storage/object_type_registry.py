@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""Object Type Registry - Module
+Process-local cache of the object_types table. Object types almost never
+change, so counting requests resolve names to ids here instead of issuing
+SELECTs. The cache is dropped whenever a session commits an insert, update
+or delete of an ObjectType, and can be dropped explicitly with invalidate().
+"""
+from typing import Optional, List, Dict, Any, Union
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from .object_types import ObjectType
+
+
+class ObjectTypeRegistry:
+    """Name -> object type snapshot map, loaded on first use
+    Attrs:
+        loads: number of times the table has been read (for diagnostics)
+    """
+
+    def __init__(self, loader) -> None:
+        """Initializes the registry
+        Args:
+            loader: callable returning every ObjectType row
+        """
+        self.__loader = loader
+        self.__by_name = None
+        self.__lock = threading.Lock()
+        self.loads = 0
+
+    def _snapshot(self) -> None:
+        """Get the current name map, loading it if needed"""
+        by_name = self.__by_name
+        if by_name is not None:
+            return by_name
+
+        with self.__lock:
+            if self.__by_name is None:
+                self.__by_name = {
+                    object_type.name: {
+                        'id': object_type.id,
+                        'name': object_type.name,
+                        'description': object_type.description,
+                        'created_at': object_type.created_at,
+                        'updated_at': object_type.updated_at
+                    } for object_type in self.__loader()
+                }
+                self.loads += 1
+            return self.__by_name
+
+    def get_id(self, name) -> None:
+        """Get the id of an object type
+        Args:
+            name: object type name
+        Return: id string, or None if there is no such type
+        """
+        entry = self._snapshot().get(name)
+        return entry['id'] if entry else None
+
+    def names(self) -> None:
+        """Get every registered object type name"""
+        return list(self._snapshot())
+
+    def entries(self) -> None:
+        """Get copies of every object type as dicts"""
+        return [dict(entry) for entry in self._snapshot().values()]
+
+    def invalidate(self) -> None:
+        """Drop the cached table so the next lookup reloads it"""
+        with self.__lock:
+            self.__by_name = None
+
+
+def _load_object_types() -> None:
+    """Read every object type through the shared engine"""
+    from . import database
+    return database.get_all(ObjectType)
+
+
+object_types = ObjectTypeRegistry(_load_object_types)
+
+
+def _mark_changed(mapper, connection, target) -> None:
+    """Remember that the flushing session changed the object_types table"""
+    session = object_session(target)
+    if session is not None:
+        session.info['object_types_changed'] = True
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(ObjectType, _event_name, _mark_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session) -> None:
+    """Reload the registry once the change is visible to other sessions"""
+    if session.info.pop('object_types_changed', False):
+        object_types.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session) -> None:
+    """Changes that were rolled back do not affect the registry"""
+    session.info.pop('object_types_changed', None)
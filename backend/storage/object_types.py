@@ -17,6 +17,8 @@ class ObjectType(BaseModel, Base):
     name = Column(String(128), nullable=False, unique=True)
     description = Column(String(128), nullable=False)
     outputs = relationship("Output", back_populates="object_type", cascade="all, delete-orphan")
+    # Rollup rows reference the type too, so deleting it must remove them
+    daily_stats = relationship("DailyOutputStats", cascade="all, delete-orphan")
 
     def __init__(self) -> None:
         """initializes Object_type class"""
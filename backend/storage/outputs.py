@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Output Model - Module"""
 from typing import Optional, List, Dict, Any, Union
-from sqlalchemy import String, Column, Integer, Float, ForeignKey
+from sqlalchemy import String, Column, Integer, Float, ForeignKey, Index
 from typing import Optional, List, Dict, Any, Union
 from sqlalchemy.orm import relationship
 from typing import Optional, List, Dict, Any, Union
@@ -17,6 +17,14 @@ class Output(BaseModel, Base):
         input_id: Foreign key to associate outputs with inputs
     """
     __tablename__ = 'outputs'
+    __table_args__ = (
+        # Newest-first listing and keyset pagination on (created_at, id)
+        Index('ix_outputs_created_at_id', 'created_at', 'id'),
+        # Listing filtered by object type
+        Index('ix_outputs_object_type_id_created_at', 'object_type_id', 'created_at'),
+        # Joins to inputs and deletes by input (SQLite does not index foreign keys)
+        Index('ix_outputs_input_id', 'input_id'),
+    )
     predicted_count = Column(Integer, nullable=False)
     corrected_count = Column(Integer)
     pred_confidence = Column(Float(), nullable=False)
@@ -16,6 +16,7 @@ os.environ['OBJ_DETECT_MYSQL_PWD'] = 'obj_detect_dev_pwd'
 os.environ['OBJ_DETECT_MYSQL_HOST'] = 'localhost'
 os.environ['OBJ_DETECT_MYSQL_DB'] = 'obj_detect_test_db'  # Use test database
 os.environ['OBJ_DETECT_ENV'] = 'test'
+os.environ['PIPELINE_PRELOAD'] = 'false'  # Build the AI pipeline only when a test needs it
 
 # Test configuration
 TEST_CONFIG = {
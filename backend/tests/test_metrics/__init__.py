@@ -0,0 +1,4 @@
+#!/usr/bin/python3
+"""Metrics Tests Package
+Tests for the evaluation metrics in performance_metrics
+"""
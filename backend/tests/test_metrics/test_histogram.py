@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+"""Histogram Tests
+Test the per-thread counters and histograms in metrics
+"""
+import unittest
+import os
+import sys
+import threading
+
+from sqlalchemy import create_engine, text
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from metrics import Counter, Histogram, db_query_latency, instrument_database_queries, render_metrics
+
+
+class TestHistogram(unittest.TestCase):
+    """Test Histogram"""
+
+    def setUp(self):
+        """Set up a histogram with a few round buckets"""
+        self.histogram = Histogram('test_seconds', 'Test latencies', buckets=(0.1, 1.0, 10.0))
+
+    def test_observations_fall_into_buckets(self):
+        """Values land in the first bucket whose bound is >= the value, the rest in +Inf"""
+        for value in (0.05, 0.1, 0.5, 2.0, 20.0):
+            self.histogram.observe('decode', value)
+
+        series = self.histogram.snapshot()['decode']
+        self.assertEqual(series['counts'], [2, 1, 1, 1])
+        self.assertEqual(series['count'], 5)
+        self.assertAlmostEqual(series['sum'], 22.65)
+
+    def test_threads_are_merged(self):
+        """Observations from several threads are summed in the snapshot"""
+        def record():
+            for _ in range(100):
+                self.histogram.observe_many({'decode': 0.05, 'resnet': 0.5})
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = self.histogram.snapshot()
+        self.assertEqual(snapshot['decode']['counts'], [400, 0, 0, 0])
+        self.assertEqual(snapshot['resnet']['counts'], [0, 400, 0, 0])
+
+    def test_summary_and_reset(self):
+        """summary() estimates percentiles inside the right bucket; reset() clears everything"""
+        for _ in range(90):
+            self.histogram.observe('sam_generate', 0.5)
+        for _ in range(10):
+            self.histogram.observe('sam_generate', 5.0)
+
+        summary = self.histogram.summary()['sam_generate']
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['mean'], 0.95)
+        self.assertTrue(0.1 <= summary['p50'] <= 1.0)
+        self.assertTrue(1.0 <= summary['p99'] <= 10.0)
+
+        self.histogram.reset()
+        self.assertEqual(self.histogram.summary(), {})
+
+    def test_render_prometheus_text(self):
+        """Buckets are cumulative and end with +Inf, followed by _sum and _count"""
+        histogram = Histogram('stage_seconds', 'Stage latency', buckets=(0.1, 1.0), label_names=('stage',))
+        histogram.observe('crop', 0.05)
+        histogram.observe('crop', 0.5)
+
+        self.assertEqual(histogram.render(), [
+            '# HELP stage_seconds Stage latency',
+            '# TYPE stage_seconds histogram',
+            'stage_seconds_bucket{stage="crop",le="0.1"} 1',
+            'stage_seconds_bucket{stage="crop",le="1.0"} 2',
+            'stage_seconds_bucket{stage="crop",le="+Inf"} 2',
+            'stage_seconds_sum{stage="crop"} 0.55',
+            'stage_seconds_count{stage="crop"} 2'
+        ])
+
+
+class TestCounter(unittest.TestCase):
+    """Test Counter"""
+
+    def test_counts_from_finished_threads_are_kept(self):
+        """Shards of threads that exited are folded into the total, not lost"""
+        counter = Counter('requests_total', 'Requests', label_names=('endpoint', 'status'))
+        for _ in range(20):
+            thread = threading.Thread(target=counter.inc, args=(('/api/count', 200),))
+            thread.start()
+            thread.join()
+        counter.inc(('/api/count', 200), amount=2)
+
+        self.assertEqual(counter.snapshot(), {('/api/count', 200): 22})
+        self.assertEqual(len(counter._shards), 1)
+        self.assertEqual(
+            render_metrics(counter.render()),
+            '# HELP requests_total Requests\n'
+            '# TYPE requests_total counter\n'
+            'requests_total{endpoint="/api/count",status="200"} 22\n'
+        )
+
+
+class TestQueryTiming(unittest.TestCase):
+    """Test instrument_database_queries"""
+
+    def test_statements_are_timed_by_kind(self):
+        """Each executed statement is observed once, labelled by its leading keyword"""
+        engine = create_engine('sqlite://')
+        instrument_database_queries(engine)
+        instrument_database_queries(engine)
+        before = {kind: series['count'] for kind, series in db_query_latency.snapshot().items()}
+
+        with engine.connect() as connection:
+            connection.execute(text('CREATE TABLE t (x INTEGER)'))
+            connection.execute(text('INSERT INTO t VALUES (1)'))
+            connection.execute(text('SELECT x FROM t'))
+
+        after = {kind: series['count'] for kind, series in db_query_latency.snapshot().items()}
+        for kind in ('select', 'insert', 'other'):
+            self.assertEqual(after.get(kind, 0) - before.get(kind, 0), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""Performance Metrics Tests
+Test that the vectorized F1 metrics agree with the scalar implementation
+"""
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from performance_metrics import (
+    calculate_f1_metrics, calculate_f1_metrics_batch, calculate_overall_f1_stats
+)
+
+
+class TestF1MetricsBatch(unittest.TestCase):
+    """Test calculate_f1_metrics_batch"""
+    
+    PREDICTED = [0, 0, 3, 5, 4, 9, 2, 7, 1]
+    CORRECTED = [0, 4, 0, 5, 6, 2, 1, None, 1]
+    
+    def test_rows_match_scalar_metrics(self):
+        """Every corrected row equals calculate_f1_metrics, uncorrected rows are NaN"""
+        batch = calculate_f1_metrics_batch(self.PREDICTED, self.CORRECTED, include_explanations=True)
+        
+        for i, (predicted, corrected) in enumerate(zip(self.PREDICTED, self.CORRECTED)):
+            if corrected is None:
+                self.assertFalse(batch['corrected'][i])
+                self.assertTrue(np.isnan(batch['f1_score'][i]))
+                self.assertIsNone(batch['explanations'][i])
+                continue
+            expected = calculate_f1_metrics(predicted, corrected)
+            for name in ('f1_score', 'precision', 'recall', 'true_positives', 'false_positives', 'false_negatives'):
+                self.assertAlmostEqual(batch[name][i], expected[name], msg=f"row {i} {name}")
+            self.assertEqual(batch['explanations'][i], expected['explanation'])
+    
+    def test_overall_stats(self):
+        """Aggregates match averaging the scalar metrics"""
+        pairs = [(p, c) for p, c in zip(self.PREDICTED, self.CORRECTED) if c is not None]
+        per_row = [calculate_f1_metrics(p, c) for p, c in pairs]
+        
+        overall = calculate_f1_metrics_batch(self.PREDICTED, self.CORRECTED)['overall']
+        
+        self.assertEqual(overall['count'], len(pairs))
+        self.assertAlmostEqual(overall['avg_f1_score'], sum(m['f1_score'] for m in per_row) / len(pairs))
+        self.assertAlmostEqual(overall['avg_recall'], sum(m['recall'] for m in per_row) / len(pairs))
+        self.assertEqual(overall['excellent_count'], sum(m['f1_score'] >= 90 for m in per_row))
+        self.assertEqual(overall['good_count'], sum(70 <= m['f1_score'] < 90 for m in per_row))
+        self.assertEqual(overall['true_positives'], sum(m['true_positives'] for m in per_row))
+        self.assertAlmostEqual(overall['micro_f1_score'], 2 * 13 / (24 + 19) * 100)
+    
+    def test_explanations_only_on_request(self):
+        """No explanation strings are built by default"""
+        self.assertNotIn('explanations', calculate_f1_metrics_batch([1, 2], [1, 3]))
+    
+    def test_overall_f1_stats_uses_batch(self):
+        """calculate_overall_f1_stats skips uncorrected results and handles empty input"""
+        results = [{'predicted_count': p, 'corrected_count': c} for p, c in zip(self.PREDICTED, self.CORRECTED)]
+        
+        self.assertEqual(calculate_overall_f1_stats(results)['count'], 8)
+        self.assertEqual(calculate_overall_f1_stats([])['count'], 0)
+        self.assertEqual(calculate_overall_f1_stats([])['avg_f1_score'], 0)
+    
+    def test_mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            calculate_f1_metrics_batch([1, 2], [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
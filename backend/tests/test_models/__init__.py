@@ -0,0 +1,4 @@
+#!/usr/bin/python3
+"""Model Tests Package
+Tests for pipeline helpers that do not need the AI models loaded
+"""
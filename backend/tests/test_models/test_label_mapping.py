@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""Label Mapping Tests
+Test the LRU cache and the zero-shot label mapping cache
+"""
+import unittest
+import os
+import sys
+import tempfile
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models.cache import LRUCache
+from models.label_mapping import LabelMappingCache, LabelMappingTable
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test the bounded LRU cache"""
+    
+    def test_eviction_order(self):
+        """Least recently used entries are evicted first"""
+        cache = LRUCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')  # 'a' is now most recently used
+        cache.put('c', 3)
+        
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(len(cache), 2)
+    
+    def test_hit_miss_counters(self):
+        """Lookups update hit and miss counters"""
+        cache = LRUCache(max_size=4)
+        cache.put('a', 1)
+        
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('missing'))
+        
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+
+class TestLabelMappingCache(unittest.TestCase):
+    """Test the zero-shot label mapping cache"""
+    
+    def test_key_ignores_candidate_order(self):
+        """Candidate labels are treated as a set"""
+        key1 = LabelMappingCache.make_key('tabby', ['cat', 'dog'])
+        key2 = LabelMappingCache.make_key('tabby', ['dog', 'cat'])
+        self.assertEqual(key1, key2)
+    
+    def test_warm_file_round_trip(self):
+        """Entries saved to disk are loaded back by a new cache"""
+        cache = LabelMappingCache(max_size=8)
+        cache.put(cache.make_key('tabby', ['cat', 'dog']), ('cat', 0.93))
+        cache.put(cache.make_key('sports car', ['car', 'bus']), ('car', 0.88))
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'label_cache.json')
+            cache.save(path)
+            
+            warmed = LabelMappingCache(max_size=8)
+            self.assertEqual(warmed.load(path), 2)
+        
+        self.assertEqual(warmed.get(warmed.make_key('tabby', ['dog', 'cat'])), ('cat', 0.93))
+        self.assertEqual(warmed.get(warmed.make_key('sports car', ['car', 'bus'])), ('car', 0.88))
+    
+    def test_unsaved_count_and_concurrent_saves(self):
+        """Saves reset the unsaved count, and concurrent saves never leave a partial file"""
+        import json
+        import threading
+        
+        cache = LabelMappingCache(max_size=64)
+        for i in range(40):
+            cache.put(cache.make_key(f'class {i}', ['cat', 'dog']), ('cat', 0.5))
+        self.assertEqual(cache.unsaved, 40)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'label_cache.json')
+            threads = [threading.Thread(target=cache.save, args=(path,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            self.assertEqual(cache.unsaved, 0)
+            self.assertEqual(os.listdir(tmp_dir), ['label_cache.json'])
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(len(json.load(f)), 40)
+            
+            warmed = LabelMappingCache(max_size=64)
+            warmed.load(path)
+            self.assertEqual(warmed.unsaved, 0)
+    
+    def test_load_missing_file(self):
+        """A missing warm file loads nothing"""
+        cache = LabelMappingCache()
+        self.assertEqual(cache.load('/nonexistent/label_cache.json'), 0)
+
+
+class TestLabelMappingTable(unittest.TestCase):
+    """Test the precomputed ImageNet-to-category table"""
+    
+    ID2LABEL = {0: 'tabby', 1: 'sports car', 2: 'crane', 3: 'crane'}
+    CANDIDATES = ['car', 'cat', 'bird']
+    
+    def _fake_classifier(self, sequences, candidate_labels, batch_size=None):
+        """Stand-in for the zero-shot pipeline"""
+        best = {'tabby': 'cat', 'sports car': 'car', 'crane': 'bird'}
+        return [
+            {'labels': [best[seq]] + [l for l in candidate_labels if l != best[seq]],
+             'scores': [0.9, 0.06, 0.04]}
+            for seq in sequences
+        ]
+    
+    def test_build_and_lookup(self):
+        """Built table maps class names to best label and score"""
+        table = LabelMappingTable.build(self._fake_classifier, self.ID2LABEL, self.CANDIDATES)
+        
+        labels, scores = table.lookup(['sports car', 'tabby', 'crane', 'tabby'])
+        self.assertEqual(labels, ['car', 'cat', 'bird', 'cat'])
+        self.assertEqual(len(scores), 4)
+        self.assertAlmostEqual(float(scores[0]), 0.9, places=5)
+    
+    def test_save_load_round_trip(self):
+        """Tables survive a save/load cycle and validate against the model"""
+        table = LabelMappingTable.build(self._fake_classifier, self.ID2LABEL, self.CANDIDATES)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'label_table.npz')
+            table.save(path)
+            loaded = LabelMappingTable.load(path)
+        
+        self.assertTrue(loaded.matches(['bird', 'cat', 'car'], self.ID2LABEL))
+        self.assertFalse(loaded.matches(['cat', 'car'], self.ID2LABEL))
+        self.assertEqual(loaded.lookup(['tabby'])[0], ['cat'])
+
+
+if __name__ == '__main__':
+    unittest.main()
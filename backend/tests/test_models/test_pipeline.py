@@ -0,0 +1,277 @@
+#!/usr/bin/python3
+"""Pipeline Tests
+Test ObjectCountingPipeline orchestration with stand-in models
+"""
+import unittest
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+from PIL import Image
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models.label_mapping import LabelMappingTable
+from models.pipeline import ObjectCountingPipeline
+
+
+class FakeMaskGenerator:
+    """Returns two rectangular masks and tracks how many callers run at once"""
+
+    def __init__(self):
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._guard = threading.Lock()
+
+    def generate(self, sam_input):
+        with self._guard:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._guard:
+            self.active -= 1
+
+        height, width = sam_input.shape[:2]
+        masks = []
+        for y0, y1, x0, x1 in ((0, height // 2, 0, width // 2), (height // 2, height, width // 2, width)):
+            segmentation = np.zeros((height, width), dtype=bool)
+            segmentation[y0:y1, x0:x1] = True
+            masks.append({'segmentation': segmentation, 'area': int(segmentation.sum()),
+                          'bbox': [x0, y0, x1 - 1 - x0, y1 - 1 - y0]})
+        return masks
+
+
+class FakeClassModel:
+    """ResNet-50 stand-in that predicts 'tabby' for every segment"""
+    config = SimpleNamespace(id2label={0: 'tabby', 1: 'sports car'})
+
+    def __call__(self, pixel_values):
+        return SimpleNamespace(logits=torch.tensor([[2.0, 0.0]] * len(pixel_values)))
+
+
+class RedClassModel(FakeClassModel):
+    """ResNet-50 stand-in that predicts 'tabby' for red segments and 'sports car' otherwise"""
+
+    def __call__(self, pixel_values):
+        red = pixel_values[:, 0]
+        return SimpleNamespace(logits=torch.stack([red, 1 - red], dim=1))
+
+
+class StubPipeline(ObjectCountingPipeline):
+    """Pipeline whose models are replaced by cheap fakes"""
+
+    def _setup_device(self):
+        self.device = "cpu"
+
+    def _setup_models(self):
+        self.mask_generator = FakeMaskGenerator()
+        self.image_processor = lambda images, return_tensors: {'pixel_values': torch.zeros(len(images), 1)}
+        self.class_model = FakeClassModel()
+        self.label_classifier = lambda text, candidate_labels: {'labels': ['cat'], 'scores': [0.8]}
+
+
+class ColorPipeline(StubPipeline):
+    """Stub pipeline that labels red segments 'cat' and other segments 'car'"""
+
+    def _setup_models(self):
+        super()._setup_models()
+        self.batch_sizes = []
+        self.image_processor = self._process
+        self.class_model = RedClassModel()
+        self.label_classifier = lambda text, candidate_labels: {
+            'labels': ['cat' if text == 'tabby' else 'car'], 'scores': [0.8]}
+
+    def _process(self, images, return_tensors):
+        self.batch_sizes.append(len(images))
+        red = [float(np.asarray(image)[0].max() > 128) for image in images]
+        return {'pixel_values': torch.tensor(red).unsqueeze(1)}
+
+
+def _image_bytes(color, size=(64, 48)):
+    """Encode a solid-color PNG"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class TestResultCache(unittest.TestCase):
+    """Test the per-image analysis cache in analyze_image"""
+
+    def setUp(self):
+        self.pipeline = StubPipeline()
+        self.image = _image_bytes((200, 30, 30))
+
+    def analyze(self):
+        """Analyze the test image and return the result"""
+        return self.pipeline.analyze_image(io.BytesIO(self.image))
+
+    def test_repeated_image_skips_models(self):
+        """The second analysis of the same bytes is served from the cache without SAM"""
+        first = self.analyze()
+        second = self.analyze()
+
+        self.assertFalse(first['cache_hit'])
+        self.assertTrue(second['cache_hit'])
+        self.assertEqual(self.pipeline.mask_generator.calls, 1)
+        self.assertEqual(second['labels'], first['labels'])
+        self.assertEqual(list(second['stage_timings']), ['decode'])
+
+    def test_settings_are_part_of_the_key(self):
+        """Changing TOP_N, SAM_MAX_SIDE, mapping mode or candidate labels misses the cache"""
+        table = LabelMappingTable(self.pipeline.candidate_labels, ['tabby', 'sports car'], [6, 1], [0.9, 0.8])
+        changes = [
+            ('TOP_N', lambda pipeline: setattr(pipeline, 'TOP_N', 1)),
+            ('SAM_MAX_SIDE', lambda pipeline: setattr(pipeline, 'SAM_MAX_SIDE', 32)),
+            ('mapping mode', lambda pipeline: setattr(pipeline, 'label_table', table)),
+            ('candidate labels', lambda pipeline: pipeline.candidate_labels.append('horse')),
+        ]
+
+        self.analyze()
+        for calls, (name, change) in enumerate(changes, start=2):
+            change(self.pipeline)
+            result = self.analyze()
+            self.assertFalse(result['cache_hit'], name)
+            self.assertEqual(self.pipeline.mask_generator.calls, calls, name)
+            self.assertTrue(self.analyze()['cache_hit'], name)
+
+        self.assertEqual(self.analyze()['total_segments'], 1)
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    """Test the pipelined multi-image path in analyze_images"""
+
+    def setUp(self):
+        self.pipeline = ColorPipeline()
+        self.red = _image_bytes((200, 30, 30))
+        self.blue = _image_bytes((30, 30, 200))
+
+    def analyze(self, *images):
+        """Analyze encoded images as one batch"""
+        return self.pipeline.analyze_images([io.BytesIO(image) for image in images])
+
+    def test_results_stay_in_input_order(self):
+        """Segments split across classification batches are returned to their own image"""
+        self.pipeline.CLASSIFICATION_BATCH_SIZE = 3
+        colors = [(200 if i % 2 == 0 else 30, 30, 30 + i) for i in range(5)]
+
+        analyses = self.analyze(*(_image_bytes(color) for color in colors))
+
+        self.assertEqual(self.pipeline.batch_sizes, [3, 3, 3, 1])
+        self.assertEqual([analysis['labels'] for analysis in analyses],
+                         [['cat', 'cat'], ['car', 'car'], ['cat', 'cat'], ['car', 'car'], ['cat', 'cat']])
+        for analysis in analyses:
+            self.assertFalse(analysis['cache_hit'])
+            self.assertGreater(analysis['stage_timings']['resnet'], 0)
+
+    def test_identical_images_are_analyzed_once(self):
+        """An image repeated within the batch reuses the first analysis"""
+        analyses = self.analyze(self.red, self.blue, self.red)
+
+        self.assertEqual(self.pipeline.mask_generator.calls, 2)
+        self.assertFalse(analyses[0]['cache_hit'])
+        self.assertTrue(analyses[2]['cache_hit'])
+        self.assertEqual(analyses[2]['labels'], analyses[0]['labels'])
+        self.assertNotIn('sam_generate', analyses[2]['stage_timings'])
+
+    def test_cached_images_skip_sam(self):
+        """Images analyzed earlier are served from the result cache"""
+        self.pipeline.analyze_image(io.BytesIO(self.red))
+
+        analyses = self.analyze(self.red, self.blue)
+
+        self.assertEqual(self.pipeline.mask_generator.calls, 2)
+        self.assertTrue(analyses[0]['cache_hit'])
+        self.assertEqual(analyses[0]['labels'], ['cat', 'cat'])
+        self.assertEqual(analyses[1]['labels'], ['car', 'car'])
+
+    def test_undecodable_image_does_not_fail_the_batch(self):
+        """A corrupt image gets an error entry; the other images are still counted"""
+        results = self.pipeline.count_all_objects_batch(
+            [io.BytesIO(image) for image in (self.red, b'not an image', self.blue)])
+
+        self.assertEqual(results[1], {'error': 'Could not decode image: unrecognized image format'})
+        self.assertEqual(results[0]['objects'], [{'type': 'cat', 'count': 2}])
+        self.assertEqual(results[2]['objects'], [{'type': 'car', 'count': 2}])
+
+
+class TestWarmUp(unittest.TestCase):
+    """Test warm_up on stand-in models"""
+
+    def test_warm_up_reports_stage_timings(self):
+        """warm_up() times every model stage and keeps the timings for /health/ready"""
+        pipeline = StubPipeline()
+
+        timings = pipeline.warm_up()
+
+        self.assertEqual(set(timings), {'decode', 'sam', 'resnet50', 'label_mapping', 'total'})
+        self.assertEqual(pipeline.warm_up_times, timings)
+        self.assertEqual(pipeline.mask_generator.calls, 1)
+        self.assertGreaterEqual(timings['total'], timings['sam'])
+
+    def test_warm_up_leaves_result_cache_empty(self):
+        """The synthetic image is never cached, so real requests cannot be served from it"""
+        pipeline = StubPipeline()
+
+        pipeline.warm_up()
+
+        self.assertEqual(len(pipeline.result_cache), 0)
+        self.assertFalse(pipeline.analyze_image(io.BytesIO(_image_bytes((200, 30, 30))))['cache_hit'])
+
+
+class TestPipelineConcurrency(unittest.TestCase):
+    """Test that shared models are never used by two threads at once"""
+
+    def test_concurrent_requests_serialize_sam(self):
+        """Requests on different threads analyze correctly without overlapping in SAM"""
+        pipeline = StubPipeline()
+        results = []
+
+        def analyze(color):
+            results.append(pipeline.analyze_image(io.BytesIO(_image_bytes(color))))
+
+        threads = [threading.Thread(target=analyze, args=((i * 40, 0, 0),)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(pipeline.mask_generator.calls, 4)
+        self.assertEqual(pipeline.mask_generator.max_active, 1)
+        self.assertTrue(all(result['labels'] == ['cat', 'cat'] for result in results))
+
+
+class TestLabelCachePersistence(unittest.TestCase):
+    """Test that the label mapping warm file is written in batches"""
+
+    def test_warm_file_written_every_n_new_mappings(self):
+        """Misses below LABEL_CACHE_SAVE_EVERY stay in memory until the threshold or save_label_cache"""
+        pipeline = StubPipeline()
+        pipeline.LABEL_CACHE_SAVE_EVERY = 3
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pipeline.LABEL_CACHE_PATH = os.path.join(tmp_dir, 'label_cache.json')
+
+            pipeline.map_to_categories(['tabby', 'beagle'], [0.9, 0.8])
+            self.assertFalse(os.path.exists(pipeline.LABEL_CACHE_PATH))
+
+            pipeline.map_to_categories(['tabby', 'sports car'], [0.9, 0.7])
+            self.assertTrue(os.path.exists(pipeline.LABEL_CACHE_PATH))
+            self.assertEqual(pipeline.label_cache.unsaved, 0)
+
+            pipeline.map_to_categories(['golden retriever'], [0.6])
+            self.assertEqual(pipeline.label_cache.unsaved, 1)
+            pipeline.save_label_cache()
+            self.assertEqual(pipeline.label_cache.unsaved, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
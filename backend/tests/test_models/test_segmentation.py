@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""Segmentation Tests
+Test window-based segment extraction from SAM mask records
+"""
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models.segmentation import (
+    BACKGROUND_VALUE, build_panoptic_map, extract_segments, mask_window,
+    segmentation_scale, select_top_masks
+)
+
+
+def _mask(height, width, y0, y1, x0, x1):
+    """Rectangular SAM-like mask record with an XYWH bbox"""
+    segmentation = np.zeros((height, width), dtype=bool)
+    segmentation[y0:y1, x0:x1] = True
+    return {
+        'segmentation': segmentation,
+        'area': int(segmentation.sum()),
+        'bbox': [x0, y0, x1 - 1 - x0, y1 - 1 - y0]
+    }
+
+
+class TestSegmentExtraction(unittest.TestCase):
+    """Test segment extraction against the panoptic map"""
+    
+    def setUp(self):
+        self.height, self.width = 20, 30
+        self.image = np.arange(self.height * self.width * 3, dtype=np.uint32).reshape(
+            self.height, self.width, 3).astype(np.uint8)
+    
+    def test_select_top_masks(self):
+        """Heap selection matches a full sort, including ties"""
+        masks = [{'area': area, 'name': i} for i, area in enumerate([5, 9, 5, 1, 9, 7])]
+        
+        selected = select_top_masks(masks, 4)
+        expected = sorted(masks, key=lambda x: x['area'], reverse=True)[:4]
+        
+        self.assertEqual([m['name'] for m in selected], [m['name'] for m in expected])
+    
+    def test_windowed_painting_matches_full_painting(self):
+        """Painting inside SAM boxes gives the same map as painting whole masks"""
+        masks = [_mask(20, 30, 2, 12, 3, 18), _mask(20, 30, 5, 9, 10, 25), _mask(20, 30, 0, 20, 29, 30)]
+        windows = [mask_window(m, self.height, self.width) for m in masks]
+        
+        expected = np.zeros((self.height, self.width), dtype=np.int32)
+        for idx, mask_data in enumerate(masks):
+            expected[mask_data['segmentation']] = idx + 1
+        
+        panoptic_map = build_panoptic_map(masks, windows, self.height, self.width)
+        self.assertTrue(np.array_equal(panoptic_map, expected))
+    
+    def test_overlapping_masks(self):
+        """Later masks cut into earlier ones and crops are tight"""
+        masks = [_mask(20, 30, 2, 12, 3, 18), _mask(20, 30, 5, 9, 10, 25)]
+        windows = [mask_window(m, self.height, self.width) for m in masks]
+        panoptic_map = build_panoptic_map(masks, windows, self.height, self.width)
+        
+        segments = extract_segments(self.image, panoptic_map, windows)
+        
+        self.assertEqual(len(segments), 2)
+        self.assertEqual(tuple(segments[0].shape), (3, 10, 15))
+        self.assertEqual(tuple(segments[1].shape), (3, 4, 15))
+        # Pixels taken by the second mask are gray in the first segment
+        self.assertTrue((segments[0][:, 3, 7:] == BACKGROUND_VALUE).all())
+        self.assertTrue(np.array_equal(segments[1].numpy().transpose(1, 2, 0),
+                                       self.image[5:9, 10:25]))
+    
+    def test_fully_covered_mask_is_skipped(self):
+        """A label painted over completely yields no segment"""
+        masks = [_mask(20, 30, 4, 8, 4, 8), _mask(20, 30, 2, 10, 2, 10)]
+        windows = [mask_window(m, self.height, self.width) for m in masks]
+        panoptic_map = build_panoptic_map(masks, windows, self.height, self.width)
+        
+        segments = extract_segments(self.image, panoptic_map, windows)
+        
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(tuple(segments[0].shape), (3, 8, 8))
+    
+    def test_segmentation_scale(self):
+        """Only images larger than the limit are downscaled"""
+        self.assertEqual(segmentation_scale(800, 600, 1024), 1.0)
+        self.assertEqual(segmentation_scale(4000, 3000, 1000), 0.25)
+        self.assertEqual(segmentation_scale(4000, 3000, 0), 1.0)
+    
+    def test_downscaled_masks_map_to_full_resolution(self):
+        """Masks from a half-size SAM input are painted back at full size"""
+        small_masks = [_mask(10, 15, 1, 6, 2, 9), _mask(10, 15, 3, 5, 5, 12)]
+        windows = [mask_window(m, self.height, self.width) for m in small_masks]
+        
+        expected = np.zeros((self.height, self.width), dtype=np.int32)
+        for idx, mask_data in enumerate(small_masks):
+            upsampled = mask_data['segmentation'].repeat(2, axis=0).repeat(2, axis=1)
+            expected[upsampled] = idx + 1
+        
+        panoptic_map = build_panoptic_map(small_masks, windows, self.height, self.width)
+        self.assertTrue(np.array_equal(panoptic_map, expected))
+        
+        segments = extract_segments(self.image, panoptic_map, windows)
+        self.assertEqual(tuple(segments[1].shape), (3, 4, 14))
+    
+    def test_window_without_bbox(self):
+        """Records without a bbox fall back to the segmentation extent"""
+        mask_data = _mask(20, 30, 3, 7, 11, 16)
+        expected = mask_window(mask_data, self.height, self.width)
+        del mask_data['bbox']
+        
+        self.assertEqual(mask_window(mask_data, self.height, self.width), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
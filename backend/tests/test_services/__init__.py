@@ -0,0 +1,4 @@
+#!/usr/bin/python3
+"""Services Tests Package
+Tests for the background job queue and the pipeline loader
+"""
@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+"""Job Queue Tests
+Test the bounded JobQueue with handlers that block until released
+"""
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from job_queue import JobQueue, QueueFullError
+
+
+def wait_for(condition, timeout=5):
+    """Poll until condition() is true, failing after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for job state")
+        time.sleep(0.01)
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test JobQueue"""
+
+    def setUp(self):
+        """Set up a handler that blocks until the test releases it"""
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def handler(self, value, fail=False):
+        """Wait for release, then return value or raise"""
+        self.release.wait(5)
+        if fail:
+            raise ValueError(f"bad value {value}")
+        return value * 2
+
+    def status(self, job_queue, job_id):
+        """Current status of a job"""
+        return job_queue.get(job_id)['status']
+
+    def test_submit_raises_when_full(self):
+        """Once max_size jobs are waiting, submit raises QueueFullError"""
+        job_queue = JobQueue(self.handler, workers=1, max_size=2)
+        running = job_queue.submit(value=1)
+        wait_for(lambda: self.status(job_queue, running) == 'running')
+
+        job_queue.submit(value=2)
+        job_queue.submit(value=3)
+        with self.assertRaises(QueueFullError):
+            job_queue.submit(value=4)
+        self.assertEqual(job_queue.stats()['queued'], 2)
+
+        self.release.set()
+        wait_for(lambda: job_queue.stats() == {'queued': 0, 'running': 0, 'workers': 1, 'max_size': 2})
+        job_queue.submit(value=5)
+
+    def test_status_moves_from_queued_to_finished(self):
+        """Jobs go queued -> running -> completed, or failed with the error message"""
+        job_queue = JobQueue(self.handler, workers=1)
+        first = job_queue.submit(value=1)
+        second = job_queue.submit(value=2, fail=True)
+
+        wait_for(lambda: self.status(job_queue, first) == 'running')
+        self.assertEqual(self.status(job_queue, second), 'queued')
+        self.assertIsNotNone(job_queue.get(first)['started_at'])
+
+        self.release.set()
+        wait_for(lambda: job_queue.get(second)['finished_at'] is not None)
+
+        completed = job_queue.get(first)
+        self.assertEqual(completed['status'], 'completed')
+        self.assertEqual(completed['result'], 2)
+        failed = job_queue.get(second)
+        self.assertEqual(failed['status'], 'failed')
+        self.assertEqual(failed['error'], 'bad value 2')
+        self.assertIsNone(failed['result'])
+
+    def test_old_finished_jobs_are_dropped(self):
+        """Only the last max_finished finished jobs can be polled"""
+        self.release.set()
+        job_queue = JobQueue(self.handler, workers=1, max_finished=2)
+        job_ids = [job_queue.submit(value=value) for value in range(3)]
+        wait_for(lambda: job_queue.get(job_ids[-1])['finished_at'] is not None)
+
+        self.assertIsNone(job_queue.get(job_ids[0]))
+        self.assertEqual([job_queue.get(job_id)['result'] for job_id in job_ids[1:]], [2, 4])
+        self.assertIsNone(job_queue.get('unknown'))
+
+    def test_teardown_runs_after_failed_job(self):
+        """The teardown hook runs after every job, including ones that raise"""
+        self.release.set()
+        teardowns = []
+        job_queue = JobQueue(self.handler, workers=1, teardown=lambda: teardowns.append(
+            threading.current_thread().name), name='test')
+        job_id = job_queue.submit(value=1, fail=True)
+        wait_for(lambda: job_queue.get(job_id)['finished_at'] is not None)
+
+        self.assertEqual(self.status(job_queue, job_id), 'failed')
+        self.assertEqual(teardowns, ['test-worker-0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
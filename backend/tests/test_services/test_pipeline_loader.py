@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+"""Pipeline Loader Tests
+Test PipelineLoader with a fake pipeline factory
+"""
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pipeline_loader import PipelineLoader
+
+
+class FakeFactory:
+    """Builds plain objects, optionally waiting for release or raising"""
+
+    def __init__(self, delay=0.0, error=None, blocking=False):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+        self.release = threading.Event()
+        if not blocking:
+            self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        time.sleep(self.delay)
+        if self.error:
+            raise RuntimeError(self.error)
+        return object()
+
+
+class TestPipelineLoader(unittest.TestCase):
+    """Test PipelineLoader"""
+
+    def test_concurrent_gets_build_once(self):
+        """Threads calling get() while the pipeline loads all receive the one built pipeline"""
+        factory = FakeFactory(delay=0.05)
+        loader = PipelineLoader(factory)
+        results = []
+
+        threads = [threading.Thread(target=lambda: results.append(loader.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(factory.calls, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result == (loader.pipeline, None) for result in results))
+        self.assertIsNotNone(loader.pipeline)
+
+    def test_start_background_is_idempotent(self):
+        """start_background() reports loading at once and never starts a second load"""
+        factory = FakeFactory(blocking=True)
+        loader = PipelineLoader(factory)
+
+        loader.start_background()
+        self.assertEqual(loader.state, PipelineLoader.LOADING)
+        self.assertFalse(loader.ready)
+        self.assertIsNone(loader.pipeline)
+        thread = loader._thread
+        loader.start_background()
+        self.assertIs(loader._thread, thread)
+
+        factory.release.set()
+        thread.join(5)
+        loader.start_background()
+
+        self.assertEqual(factory.calls, 1)
+        self.assertTrue(loader.ready)
+        self.assertIsNotNone(loader.get()[0])
+
+    def test_factory_error_leaves_loader_failed(self):
+        """A failed build is reported with its error and not retried"""
+        factory = FakeFactory(error='SAM checkpoint missing')
+        loader = PipelineLoader(factory)
+
+        self.assertEqual(loader.get(), (None, 'SAM checkpoint missing'))
+        self.assertEqual(loader.get(), (None, 'SAM checkpoint missing'))
+        self.assertEqual(factory.calls, 1)
+        self.assertEqual(loader.state, PipelineLoader.FAILED)
+        status = loader.status()
+        self.assertFalse(status['ready'])
+        self.assertEqual(status['error'], 'SAM checkpoint missing')
+
+    def test_status_reports_load_time(self):
+        """status() reports how long the build took and when it started"""
+        loader = PipelineLoader(FakeFactory(delay=0.05))
+        self.assertEqual(loader.status()['state'], PipelineLoader.NOT_LOADED)
+        self.assertIsNone(loader.status()['load_time'])
+
+        loader.get()
+
+        status = loader.status()
+        self.assertEqual(status['state'], PipelineLoader.READY)
+        self.assertTrue(status['ready'])
+        self.assertGreaterEqual(status['load_time'], 0.05)
+        self.assertIsNotNone(status['started_at'])
+
+
+
+class WarmingPipeline:
+    """Pipeline stand-in whose warm_up() waits for release, optionally raising"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.warming = threading.Event()
+        self.release = threading.Event()
+
+    def warm_up(self):
+        self.warming.set()
+        self.release.wait(5)
+        if self.error:
+            raise RuntimeError(self.error)
+        return {'total': 0.0}
+
+
+class TestPipelineWarmUp(unittest.TestCase):
+    """Test readiness reporting around the pipeline warm-up"""
+
+    def test_not_ready_while_warming_up(self):
+        """The loader reports warming_up and not ready until warm_up() returns"""
+        pipeline = WarmingPipeline()
+        loader = PipelineLoader(lambda: pipeline, warm_up=True)
+
+        loader.start_background()
+        self.assertTrue(pipeline.warming.wait(5))
+        self.assertEqual(loader.state, PipelineLoader.WARMING_UP)
+        self.assertFalse(loader.ready)
+        self.assertFalse(loader.status()['ready'])
+        self.assertIsNone(loader.pipeline)
+
+        # Readiness probes call start_background() and must not wait for the warm-up
+        start_time = time.perf_counter()
+        loader.start_background()
+        self.assertLess(time.perf_counter() - start_time, 1)
+        self.assertEqual(loader.status()['state'], PipelineLoader.WARMING_UP)
+
+        pipeline.release.set()
+        loader._thread.join(5)
+        self.assertTrue(loader.ready)
+        self.assertIs(loader.pipeline, pipeline)
+
+    def test_warm_up_error_does_not_block_readiness(self):
+        """A failed warm-up is reported in the detailed status, but the pipeline is still used"""
+        pipeline = WarmingPipeline(error='out of memory')
+        pipeline.release.set()
+        loader = PipelineLoader(lambda: pipeline, warm_up=True)
+
+        self.assertEqual(loader.get(), (pipeline, None))
+
+        status = loader.status(details=True)
+        self.assertTrue(status['ready'])
+        self.assertIsNone(status['error'])
+        self.assertEqual(status['warm_up_error'], 'out of memory')
+
+
+if __name__ == '__main__':
+    unittest.main()
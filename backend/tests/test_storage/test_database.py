@@ -558,5 +558,86 @@ class TestModelRelationships(unittest.TestCase):
         database.delete(obj_type)
 
 
+class TestSessionScoping(unittest.TestCase):
+    """Test that each thread works in its own database session"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test class"""
+        from storage import database
+        from storage.database_functions import init_database
+        
+        cls.database = database
+        cls.database.reload()
+        init_database()
+    
+    def test_threads_get_separate_sessions(self):
+        """Uncommitted objects in one thread are invisible to another"""
+        import threading
+        from storage.object_types import ObjectType
+        
+        pending = ObjectType()
+        pending.name = f"test_scoped_{uuid.uuid4().hex[:8]}"
+        pending.description = 'Never committed'
+        self.database.new(pending)
+        
+        seen = {}
+        
+        def lookup():
+            seen['found'] = self.database.get_by_name(ObjectType, pending.name)
+            self.database.remove()
+        
+        thread = threading.Thread(target=lookup)
+        thread.start()
+        thread.join()
+        
+        self.assertIsNone(seen['found'])
+        self.database.rollback()
+    
+    def test_remove_discards_session_state(self):
+        """remove() drops pending work and the next call starts a fresh session"""
+        from storage.object_types import ObjectType
+        
+        pending = ObjectType()
+        pending.name = f"test_removed_{uuid.uuid4().hex[:8]}"
+        pending.description = 'Discarded'
+        self.database.new(pending)
+        self.database.remove()
+        self.database.save()
+        
+        self.assertIsNone(self.database.get_by_name(ObjectType, pending.name))
+        self.assertGreater(self.database.count(ObjectType), 0)
+    
+    def test_reload_keeps_sessions_in_use(self):
+        """A reload on another thread (POST /api/init-db) does not switch a thread's session mid-transaction"""
+        import threading
+        from storage.object_types import ObjectType
+        
+        name = f"test_reloaded_{uuid.uuid4().hex[:8]}"
+        added = threading.Event()
+        reloaded = threading.Event()
+        
+        def add_then_commit():
+            pending = ObjectType()
+            pending.name = name
+            pending.description = 'Committed after a reload'
+            self.database.new(pending)
+            added.set()
+            reloaded.wait(5)
+            self.database.save()
+            self.database.remove()
+        
+        thread = threading.Thread(target=add_then_commit)
+        thread.start()
+        added.wait(5)
+        self.database.reload()
+        reloaded.set()
+        thread.join()
+        
+        found = self.database.get_by_name(ObjectType, name)
+        self.assertIsNotNone(found)
+        self.database.delete(found)
+
+
 if __name__ == '__main__':
     unittest.main()
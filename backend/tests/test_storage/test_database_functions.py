@@ -0,0 +1,759 @@
+#!/usr/bin/python3
+"""Storage Tests for Database Functions
+Test the higher-level helpers in storage.database_functions
+"""
+import unittest
+import os
+import sys
+import uuid
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tests import TEST_CONFIG
+
+
+class TestSavePredictionResults(unittest.TestCase):
+    """Test saving predictions for several object types at once"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test class"""
+        from storage import database
+        from storage.database_functions import init_database
+        
+        cls.database = database
+        cls.database.reload()
+        init_database()
+    
+    def setUp(self):
+        """Set up each test"""
+        self.created_inputs = []
+    
+    def tearDown(self):
+        """Remove inputs (and their outputs) created by the test"""
+        from storage.inputs import Input
+        
+        for input_id in self.created_inputs:
+            input_record = self.database.get(Input, input_id)
+            if input_record:
+                self.database.delete(input_record)
+    
+    def test_save_multiple_object_types(self):
+        """One input and one output per object type are saved together"""
+        from storage.database_functions import save_prediction_results
+        from storage.outputs import Output
+        
+        image_path = f"test_multi_{uuid.uuid4().hex[:8]}.jpg"
+        outputs = save_prediction_results(
+            image_path=image_path,
+            predicted_counts={'car': 3, 'person': 0, 'dog': 1},
+            description='Test multi-type save',
+            pred_confidence=0.8
+        )
+        self.created_inputs.append(outputs[0].input_id)
+        
+        self.assertEqual(len(outputs), 3)
+        self.assertEqual(len({output.input_id for output in outputs}), 1)
+        
+        saved = [self.database.get(Output, output.id) for output in outputs]
+        self.assertEqual([output.object_type.name for output in saved], ['car', 'person', 'dog'])
+        self.assertEqual([output.predicted_count for output in saved], [3, 0, 1])
+        self.assertEqual(saved[0].input.image_path, image_path)
+    
+    def test_delete_one_of_several_results_keeps_siblings(self):
+        """Deleting one result of a shared input keeps the input and the other results"""
+        from storage.database_functions import save_prediction_results, delete_output
+        from storage.inputs import Input
+        from storage.outputs import Output
+        
+        car, person = save_prediction_results(
+            image_path=f"test_sibling_{uuid.uuid4().hex[:8]}.jpg",
+            predicted_counts={'car': 2, 'person': 3}
+        )
+        car_id, person_id, input_id = car.id, person.id, car.input_id
+        self.created_inputs.append(input_id)
+        
+        delete_output(car_id)
+        self.database.close()
+        self.assertIsNone(self.database.get(Output, car_id))
+        self.assertEqual(self.database.get(Output, person_id).predicted_count, 3)
+        self.assertIsNotNone(self.database.get(Input, input_id))
+        
+        delete_output(person_id)
+        self.database.close()
+        self.assertIsNone(self.database.get(Output, person_id))
+        self.assertIsNone(self.database.get(Input, input_id))
+    
+    def test_invalid_object_type_saves_nothing(self):
+        """An unknown object type aborts the whole save"""
+        from storage.database_functions import save_prediction_results, count_inputs, count_outputs
+        
+        inputs_before = count_inputs()
+        outputs_before = count_outputs()
+        
+        with self.assertRaises(ValueError):
+            save_prediction_results(
+                image_path=f"test_invalid_{uuid.uuid4().hex[:8]}.jpg",
+                predicted_counts={'car': 2, 'not_a_type': 1}
+            )
+        
+        self.assertEqual(count_inputs(), inputs_before)
+        self.assertEqual(count_outputs(), outputs_before)
+
+
+if __name__ == '__main__':
+    unittest.main()
+    
+    def test_bulk_save_many_images(self):
+        """Predictions for several images are saved with one input each"""
+        from storage.database_functions import save_prediction_results_bulk
+        from storage.outputs import Output
+        
+        image_paths = [f"test_bulk_{uuid.uuid4().hex[:8]}.jpg" for _ in range(3)]
+        records = save_prediction_results_bulk([
+            {'image_path': image_paths[0], 'predicted_counts': {'car': 1}},
+            {'image_path': image_paths[1], 'predicted_counts': {'car': 2, 'dog': 0},
+             'description': 'frame 2', 'pred_confidence': 0.6},
+            {'image_path': image_paths[2], 'predicted_counts': {'person': 5}}
+        ])
+        self.created_inputs.extend(outputs[0]['input_id'] for outputs in records)
+        
+        self.assertEqual([len(outputs) for outputs in records], [1, 2, 1])
+        self.assertEqual(len(set(self.created_inputs)), 3)
+        
+        saved = self.database.get(Output, records[1][1]['id'])
+        self.assertEqual(saved.object_type.name, 'dog')
+        self.assertEqual(saved.input.image_path, image_paths[1])
+        self.assertEqual(saved.input.description, 'frame 2')
+        self.assertAlmostEqual(saved.pred_confidence, 0.6)
+    
+    def test_bulk_backfill_keeps_history(self):
+        """Backfilled rows keep their timestamps and corrections"""
+        from datetime import datetime
+        from storage.database_functions import save_prediction_results_bulk
+        from storage.outputs import Output
+        
+        created_at = datetime(2024, 3, 1, 12, 30)
+        records = save_prediction_results_bulk([{
+            'image_path': f"test_backfill_{uuid.uuid4().hex[:8]}.jpg",
+            'predicted_counts': {'car': 4, 'bus': 1},
+            'corrected_counts': {'car': 3},
+            'created_at': created_at
+        }])
+        self.created_inputs.append(records[0][0]['input_id'])
+        
+        car = self.database.get(Output, records[0][0]['id'])
+        bus = self.database.get(Output, records[0][1]['id'])
+        self.assertEqual(car.created_at, created_at)
+        self.assertEqual(car.input.created_at, created_at)
+        self.assertEqual(car.corrected_count, 3)
+        self.assertIsNone(bus.corrected_count)
+    
+    def test_single_save_commits_once(self):
+        """save_prediction_result writes the input and output in one transaction"""
+        from sqlalchemy import event
+        from storage.database_functions import save_prediction_result
+        
+        engine = self.database.get_engine()
+        commits = []
+        
+        def on_commit(conn):
+            commits.append(conn)
+        
+        event.listen(engine, 'commit', on_commit)
+        try:
+            output = save_prediction_result(f"test_single_{uuid.uuid4().hex[:8]}.jpg", 'cat', 2)
+        finally:
+            event.remove(engine, 'commit', on_commit)
+        self.created_inputs.append(output.input_id)
+        
+        self.assertEqual(len(commits), 1)
+        self.assertEqual(output.input.outputs[0].id, output.id)
+
+
+class TestGetAllResults(unittest.TestCase):
+    """Test database-side filtering, ordering and paging of results"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test class"""
+        from storage import database
+        from storage.database_functions import init_database
+        
+        cls.database = database
+        cls.database.reload()
+        init_database()
+    
+    def setUp(self):
+        """Save outputs with known timestamps, newest last"""
+        from datetime import datetime, timedelta
+        from storage.database_functions import save_prediction_results_bulk
+        
+        base_time = datetime(2100, 1, 1)
+        records = save_prediction_results_bulk([
+            {'image_path': f"test_page_{uuid.uuid4().hex[:8]}.jpg",
+             'predicted_counts': {'airplane': i, 'boat': i},
+             'created_at': base_time + timedelta(minutes=i)}
+            for i in range(5)
+        ])
+        self.created_inputs = [outputs[0]['input_id'] for outputs in records]
+        self.airplane_ids = [outputs[0]['id'] for outputs in records]
+    
+    def tearDown(self):
+        """Remove inputs (and their outputs) created by the test"""
+        from storage.inputs import Input
+        
+        for input_id in self.created_inputs:
+            input_record = self.database.get(Input, input_id)
+            if input_record:
+                self.database.delete(input_record)
+    
+    def test_filter_order_and_pages(self):
+        """Filtered results come newest first and are split into pages"""
+        from storage.database_functions import get_all_results
+        
+        first = get_all_results(page=1, per_page=2, object_type_filter='airplane')
+        second = get_all_results(page=2, per_page=2, object_type_filter='airplane')
+        
+        self.assertEqual(first['pagination']['total'], 5)
+        self.assertEqual(first['pagination']['pages'], 3)
+        self.assertEqual([r['id'] for r in first['results']], [self.airplane_ids[4], self.airplane_ids[3]])
+        self.assertEqual([r['id'] for r in second['results']], [self.airplane_ids[2], self.airplane_ids[1]])
+        self.assertTrue(all(r['object_type'] == 'airplane' for r in first['results'] + second['results']))
+    
+    def test_unfiltered_total_counts_every_output(self):
+        """Without a filter the total covers all object types"""
+        from storage.database_functions import get_all_results, count_outputs
+        
+        result = get_all_results(page=1, per_page=3, object_type_filter='all')
+        
+        self.assertEqual(result['pagination']['total'], count_outputs())
+        self.assertEqual(len(result['results']), 3)
+        self.assertEqual({r['object_type'] for r in result['results']}, {'airplane', 'boat'})
+    
+    def test_cursor_pages_through_filtered_results(self):
+        """Following next_cursor visits every filtered result once, newest first"""
+        from storage.database_functions import get_results_after_cursor
+        
+        seen = []
+        cursor = None
+        for _ in range(5):
+            page = get_results_after_cursor(cursor, per_page=2, object_type_filter='airplane')
+            seen.extend(r['id'] for r in page['results'])
+            cursor = page['pagination']['next_cursor']
+            if not page['pagination']['has_more']:
+                break
+        
+        self.assertEqual(seen, self.airplane_ids[::-1])
+        self.assertIsNone(cursor)
+    
+    def test_cursor_breaks_created_at_ties_by_id(self):
+        """Rows sharing a timestamp are split across pages without loss"""
+        from storage.database_functions import get_results_after_cursor
+        
+        first = get_results_after_cursor('', per_page=1)
+        second = get_results_after_cursor(first['pagination']['next_cursor'], per_page=1)
+        
+        # The newest image has an airplane and a boat output with the same created_at
+        ids = [first['results'][0]['id'], second['results'][0]['id']]
+        self.assertEqual(len(set(ids)), 2)
+        self.assertEqual(first['results'][0]['created_at'], second['results'][0]['created_at'])
+    
+    def test_invalid_cursor(self):
+        """A malformed cursor is rejected"""
+        from storage.database_functions import get_results_after_cursor
+        
+        with self.assertRaises(ValueError):
+            get_results_after_cursor('not-a-cursor')
+    
+    def test_listing_indexes_exist(self):
+        """Outputs carry the composite indexes used by result listings"""
+        from sqlalchemy import inspect
+        
+        indexes = inspect(self.database._Engine__engine).get_indexes('outputs')
+        columns = {index['name']: index['column_names'] for index in indexes}
+        
+        self.assertEqual(columns.get('ix_outputs_created_at_id'), ['created_at', 'id'])
+        self.assertEqual(columns.get('ix_outputs_object_type_id_created_at'), ['object_type_id', 'created_at'])
+
+
+class TestResultQueryCount(unittest.TestCase):
+    """Guard against per-row (N+1) queries when listing results"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test class"""
+        from storage import database
+        from storage.database_functions import init_database
+        
+        cls.database = database
+        cls.database.reload()
+        init_database()
+    
+    def setUp(self):
+        """Save a page worth of outputs"""
+        from storage.database_functions import save_prediction_results_bulk
+        
+        records = save_prediction_results_bulk([
+            {'image_path': f"test_queries_{uuid.uuid4().hex[:8]}.jpg",
+             'predicted_counts': {'truck': i, 'bus': i}}
+            for i in range(6)
+        ])
+        self.created_inputs = [outputs[0]['input_id'] for outputs in records]
+        # Start from an empty identity map so relationships are really loaded
+        self.database.close()
+    
+    def tearDown(self):
+        """Remove inputs (and their outputs) created by the test"""
+        from storage.inputs import Input
+        
+        for input_id in self.created_inputs:
+            input_record = self.database.get(Input, input_id)
+            if input_record:
+                self.database.delete(input_record)
+    
+    def count_queries(self, func, *args, **kwargs):
+        """Run func and return (result, number of SQL statements executed)"""
+        from sqlalchemy import event
+        
+        engine = self.database._Engine__engine
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        return result, len(statements)
+    
+    def test_results_page_query_count(self):
+        """A page costs one COUNT and one SELECT however many rows it holds"""
+        from storage.database_functions import get_all_results
+        
+        small, small_queries = self.count_queries(get_all_results, 1, 2, 'truck')
+        large, large_queries = self.count_queries(get_all_results, 1, 12, None)
+        
+        self.assertEqual(len(small['results']), 2)
+        self.assertEqual(len(large['results']), 12)
+        self.assertEqual(small_queries, 2)
+        self.assertEqual(large_queries, 2)
+    
+    def test_outputs_with_relationships_query_count(self):
+        """Related object types and inputs are loaded in the same query"""
+        from storage.database_functions import get_outputs_with_relationships
+        
+        def load_and_read():
+            # Touch the relationships inside the counted block so lazy loads would show up
+            return [
+                (r['output'].input_id, r['object_type'].name, r['input'].image_path)
+                for r in get_outputs_with_relationships()
+                if r['output'].input_id in self.created_inputs
+            ]
+        
+        own, queries = self.count_queries(load_and_read)
+        
+        self.assertEqual(queries, 1)
+        self.assertEqual(len(own), 12)
+        self.assertEqual({name for _, name, _ in own}, {'truck', 'bus'})
+        self.assertTrue(all(path.startswith('test_queries_') for _, _, path in own))
+
+
+class TestResultStats(unittest.TestCase):
+    """Test statistics aggregated in SQL against the Python metrics"""
+    
+    PAIRS = {
+        'airplane': [(3, 5), (4, 4), (0, 0), (9, 2), (6, None)],
+        'boat': [(2, 1), (7, None)]
+    }
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test class"""
+        from storage import database
+        from storage.database_functions import init_database
+        
+        cls.database = database
+        cls.database.reload()
+        init_database()
+    
+    def setUp(self):
+        """Save outputs on one day far from other tests' data"""
+        from datetime import datetime, timedelta
+        from storage.database_functions import save_prediction_results_bulk
+        
+        self.day = datetime(2101, 6, 1)
+        predictions = []
+        for object_type, pairs in self.PAIRS.items():
+            for i, (predicted, corrected) in enumerate(pairs):
+                predictions.append({
+                    'image_path': f"test_stats_{uuid.uuid4().hex[:8]}.jpg",
+                    'predicted_counts': {object_type: predicted},
+                    'corrected_counts': {object_type: corrected} if corrected is not None else {},
+                    'pred_confidence': 0.5,
+                    'created_at': self.day + timedelta(hours=i)
+                })
+        # One output the next day, outside the filtered range
+        predictions.append({
+            'image_path': f"test_stats_{uuid.uuid4().hex[:8]}.jpg",
+            'predicted_counts': {'airplane': 50},
+            'corrected_counts': {'airplane': 1},
+            'created_at': self.day + timedelta(days=1)
+        })
+        records = save_prediction_results_bulk(predictions)
+        self.created_inputs = [outputs[0]['input_id'] for outputs in records]
+    
+    def tearDown(self):
+        """Remove inputs (and their outputs) created by the test"""
+        from storage.inputs import Input
+        
+        for input_id in self.created_inputs:
+            input_record = self.database.get(Input, input_id)
+            if input_record:
+                self.database.delete(input_record)
+    
+    def get_day_stats(self, object_type_filter=None):
+        from datetime import timedelta
+        from storage.database_functions import get_result_stats
+        
+        return get_result_stats(self.day, self.day + timedelta(days=1), object_type_filter)
+    
+    def test_totals_match_python_metrics(self):
+        """Summed TP/FP/FN and F1 buckets match calculate_f1_metrics"""
+        from performance_metrics import calculate_f1_metrics, calculate_overall_f1_stats
+        
+        corrected = [pair for pairs in self.PAIRS.values() for pair in pairs if pair[1] is not None]
+        per_output = [calculate_f1_metrics(p, c) for p, c in corrected]
+        overall = calculate_overall_f1_stats([
+            {'predicted_count': p, 'corrected_count': c} for p, c in corrected
+        ])
+        
+        totals = self.get_day_stats()['totals']
+        
+        self.assertEqual(totals['total_predictions'], 7)
+        self.assertEqual(totals['corrected_predictions'], 5)
+        self.assertAlmostEqual(totals['correction_rate'], 5 / 7 * 100)
+        self.assertAlmostEqual(totals['avg_confidence'], 0.5)
+        self.assertEqual(totals['total_predicted_count'], 31)
+        self.assertAlmostEqual(totals['mean_absolute_error'], (2 + 0 + 0 + 7 + 1) / 5)
+        self.assertEqual(totals['exact_matches'], 2)
+        self.assertEqual(totals['true_positives'], sum(m['true_positives'] for m in per_output))
+        self.assertEqual(totals['false_positives'], sum(m['false_positives'] for m in per_output))
+        self.assertEqual(totals['false_negatives'], sum(m['false_negatives'] for m in per_output))
+        self.assertAlmostEqual(totals['avg_f1_score'], overall['avg_f1_score'])
+        self.assertEqual(totals['excellent_count'], overall['excellent_count'])
+        self.assertEqual(totals['good_count'], overall['good_count'])
+        self.assertEqual(totals['needs_review_count'], overall['needs_review_count'])
+        
+        # Micro-averaged over the summed counts
+        self.assertAlmostEqual(totals['precision'], 10 / 18 * 100)
+        self.assertAlmostEqual(totals['recall'], 10 / 12 * 100)
+        self.assertAlmostEqual(totals['f1_score'], 2 * 10 / (18 + 12) * 100)
+    
+    def test_grouped_by_object_type(self):
+        """Each object type gets its own row and the filter restricts them"""
+        stats = self.get_day_stats()
+        by_type = {row['object_type']: row for row in stats['by_object_type']}
+        
+        self.assertEqual(set(by_type), {'airplane', 'boat'})
+        self.assertEqual(by_type['airplane']['total_predictions'], 5)
+        self.assertEqual(by_type['boat']['corrected_predictions'], 1)
+        self.assertAlmostEqual(by_type['boat']['precision'], 50.0)
+        self.assertAlmostEqual(by_type['boat']['recall'], 100.0)
+        
+        boat_only = self.get_day_stats('boat')
+        self.assertEqual([row['object_type'] for row in boat_only['by_object_type']], ['boat'])
+        self.assertEqual(boat_only['totals']['total_predictions'], 2)
+    
+    def test_empty_range(self):
+        """A range without outputs returns zero counts and no F1"""
+        from datetime import datetime
+        from storage.database_functions import get_result_stats
+        
+        stats = get_result_stats(datetime(1990, 1, 1), datetime(1990, 1, 2))
+        
+        self.assertEqual(stats['by_object_type'], [])
+        self.assertEqual(stats['totals']['total_predictions'], 0)
+        self.assertIsNone(stats['totals']['f1_score'])
+
+
+class TestDailyOutputStats(unittest.TestCase):
+    """Test the incrementally maintained daily rollup"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test class"""
+        from storage import database
+        from storage.database_functions import init_database
+        
+        cls.database = database
+        cls.database.reload()
+        init_database()
+    
+    def setUp(self):
+        self.created_inputs = []
+    
+    def tearDown(self):
+        """Remove inputs created by the test through delete_output"""
+        from storage.inputs import Input
+        from storage.database_functions import delete_output
+        
+        for input_id in self.created_inputs:
+            input_record = self.database.get(Input, input_id)
+            if input_record:
+                for output_id in [output.id for output in input_record.outputs]:
+                    delete_output(output_id)
+    
+    def rollup(self, day, object_type):
+        """Counters of one rollup row as a dict (zeros if missing)"""
+        from storage.daily_stats import DailyOutputStats, STAT_COUNTERS
+        from storage.database_functions import get_object_type_id
+        
+        self.database.close()
+        row = self.database.query(DailyOutputStats).filter_by(
+            day=day, object_type_id=get_object_type_id(object_type)
+        ).one_or_none()
+        return {name: getattr(row, name) if row else 0 for name in STAT_COUNTERS}
+    
+    def test_writes_update_rollup(self):
+        """Saving, correcting and deleting outputs keep today's row in step"""
+        from datetime import date
+        from storage.database_functions import save_prediction_result, update_correction, delete_output
+        
+        before = self.rollup(date.today(), 'boat')
+        output = save_prediction_result(f"test_rollup_{uuid.uuid4().hex[:8]}.jpg", 'boat', 4, pred_confidence=0.5)
+        self.created_inputs.append(output.input_id)
+        update_correction(output.id, 6)
+        update_correction(output.id, 5)
+        after = self.rollup(date.today(), 'boat')
+        
+        delta = {name: after[name] - before[name] for name in after}
+        self.assertEqual(delta['predictions'], 1)
+        self.assertEqual(delta['corrections'], 1)
+        self.assertEqual(delta['predicted_sum'], 4)
+        self.assertAlmostEqual(delta['confidence_sum'], 0.5)
+        self.assertEqual(delta['true_positives'], 4)
+        self.assertEqual(delta['false_positives'], 0)
+        self.assertEqual(delta['false_negatives'], 1)
+        self.assertEqual(delta['absolute_error_sum'], 1)
+        self.assertAlmostEqual(delta['f1_sum'], 8 / 9)
+        self.assertEqual(delta['good_count'], 1)
+        
+        delete_output(output.id)
+        restored = self.rollup(date.today(), 'boat')
+        self.assertEqual(restored['predictions'], before['predictions'])
+        self.assertEqual(restored['true_positives'], before['true_positives'])
+    
+    def test_deleting_object_type_removes_rollup_rows(self):
+        """Rollup rows of a deleted object type go with it instead of violating the foreign key"""
+        from datetime import date
+        from storage.daily_stats import DailyOutputStats
+        from storage.object_types import ObjectType
+        from storage.database_functions import save_prediction_result, get_object_type_id
+        
+        object_type = ObjectType()
+        object_type.name = f"test_rollup_type_{uuid.uuid4().hex[:8]}"
+        object_type.description = 'Temporary type'
+        self.database.new(object_type)
+        self.database.save()
+        
+        output = save_prediction_result(f"test_rollup_{uuid.uuid4().hex[:8]}.jpg", object_type.name, 2)
+        self.created_inputs.append(output.input_id)
+        type_id = get_object_type_id(object_type.name)
+        self.assertEqual(self.rollup(date.today(), object_type.name)['predictions'], 1)
+        
+        self.database.delete(self.database.get(ObjectType, type_id))
+        self.database.close()
+        self.assertEqual(self.database.query(DailyOutputStats).filter_by(object_type_id=type_id).count(), 0)
+    
+    def test_bulk_rollup_matches_outputs_and_rebuild(self):
+        """Rollup rows equal direct aggregates, and a rebuild reproduces them"""
+        from datetime import datetime, date, timedelta
+        from storage.daily_stats import rebuild_daily_stats
+        from storage.database_functions import save_prediction_results_bulk, get_result_stats, get_accuracy_trends
+        
+        day = datetime(2102, 3, 1)
+        records = save_prediction_results_bulk([
+            {'image_path': f"test_rollup_{uuid.uuid4().hex[:8]}.jpg",
+             'predicted_counts': {'airplane': i, 'boat': 3},
+             'corrected_counts': {'airplane': 2} if i % 2 else {},
+             'created_at': day + timedelta(hours=i, days=i // 3)}
+            for i in range(6)
+        ])
+        self.created_inputs = [outputs[0]['input_id'] for outputs in records]
+        
+        trends = get_accuracy_trends(day, day + timedelta(days=2))
+        direct = [get_result_stats(day + timedelta(days=n), day + timedelta(days=n + 1))['totals'] for n in range(2)]
+        self.assertEqual([entry['day'] for entry in trends], ['2102-03-01', '2102-03-02'])
+        for entry, totals in zip(trends, direct):
+            for name, value in totals.items():
+                self.assertAlmostEqual(entry[name], value, msg=name)
+        
+        incremental = self.rollup(date(2102, 3, 1), 'airplane')
+        with self.database.get_engine().begin() as connection:
+            rebuild_daily_stats(connection)
+        rebuilt = self.rollup(date(2102, 3, 1), 'airplane')
+        for name, value in incremental.items():
+            self.assertAlmostEqual(rebuilt[name], value, msg=name)
+        
+        by_type = get_accuracy_trends(day, day + timedelta(days=1), 'boat', by_object_type=True)
+        self.assertEqual([(entry['day'], entry['object_type']) for entry in by_type], [('2102-03-01', 'boat')])
+        self.assertEqual(by_type[0]['total_predictions'], 3)
+
+    def test_bulk_delete_is_set_based(self):
+        """delete_outputs removes only the selected outputs, then inputs left empty, and updates the rollup"""
+        from datetime import datetime, date
+        from sqlalchemy import event
+        from storage.inputs import Input
+        from storage.outputs import Output
+        from storage.database_functions import save_prediction_results_bulk, delete_outputs
+        
+        day = datetime(2102, 4, 1)
+        records = save_prediction_results_bulk([
+            {'image_path': f"test_rollup_{uuid.uuid4().hex[:8]}.jpg",
+             'predicted_counts': {'airplane': 2, 'boat': 1},
+             'corrected_counts': {'airplane': 3},
+             'created_at': day}
+            for _ in range(4)
+        ])
+        self.created_inputs = [outputs[0]['input_id'] for outputs in records]
+        airplane_ids = [outputs[0]['id'] for outputs in records[:3]]
+        boat_ids = [outputs[1]['id'] for outputs in records[:2]]
+        
+        statements = []
+        engine = self.database.get_engine()
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            deleted = delete_outputs(airplane_ids + ['missing-id'])
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        
+        self.assertEqual(deleted['deleted_result_ids'], airplane_ids)
+        self.assertEqual(deleted['missing_ids'], ['missing-id'])
+        self.assertEqual(deleted['deleted_outputs'], 3)
+        self.assertEqual(deleted['deleted_inputs'], 0)
+        self.assertEqual(deleted['image_paths'], [])
+        self.assertEqual(len([s for s in statements if s.startswith('DELETE')]), 1)
+        
+        self.database.close()
+        self.assertTrue(all(self.database.get(Input, input_id) for input_id in self.created_inputs))
+        self.assertIsNone(self.database.get(Output, airplane_ids[0]))
+        self.assertIsNotNone(self.database.get(Output, boat_ids[0]))
+        
+        airplane = self.rollup(date(2102, 4, 1), 'airplane')
+        self.assertEqual(airplane['predictions'], 1)
+        self.assertEqual(airplane['false_negatives'], 1)
+        self.assertEqual(self.rollup(date(2102, 4, 1), 'boat')['predictions'], 4)
+        
+        # Removing the last outputs of two inputs removes those inputs too
+        deleted = delete_outputs(boat_ids)
+        self.assertEqual(deleted['deleted_outputs'], 2)
+        self.assertEqual(deleted['deleted_inputs'], 2)
+        self.assertEqual(len(deleted['image_paths']), 2)
+        
+        self.database.close()
+        remaining = [self.database.get(Input, input_id) for input_id in self.created_inputs]
+        self.assertEqual([record is not None for record in remaining], [False, False, True, True])
+        self.assertEqual(self.rollup(date(2102, 4, 1), 'boat')['predictions'], 2)
+
+
+class TestObjectTypeRegistry(unittest.TestCase):
+    """Test the in-memory object type registry and its invalidation"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Set up test class"""
+        from storage import database
+        from storage.database_functions import init_database
+        
+        cls.database = database
+        cls.database.reload()
+        init_database()
+    
+    def setUp(self):
+        """Track object types created by the test"""
+        self.created_names = []
+    
+    def tearDown(self):
+        """Remove object types created by the test"""
+        from storage.object_types import ObjectType
+        
+        self.database.rollback()
+        for name in self.created_names:
+            object_type = self.database.get_by_name(ObjectType, name)
+            if object_type:
+                self.database.delete(object_type)
+    
+    def add_object_type(self, name):
+        """Create an object type through the ORM"""
+        from storage.object_types import ObjectType
+        
+        object_type = ObjectType()
+        object_type.name = name
+        object_type.description = 'Registry test'
+        self.database.new(object_type)
+        self.created_names.append(name)
+        return object_type
+    
+    def test_lookups_do_not_query(self):
+        """Once loaded, resolving names issues no SQL"""
+        from sqlalchemy import event
+        from storage.database_functions import get_object_type_id, get_object_type_names, get_object_type_by_name
+        
+        get_object_type_names()
+        engine = self.database.get_engine()
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            car_id = get_object_type_id('car')
+            names = get_object_type_names()
+            missing = get_object_type_id('not_a_type')
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        
+        self.assertEqual(statements, [])
+        self.assertEqual(car_id, get_object_type_by_name('car').id)
+        self.assertIn('person', names)
+        self.assertIsNone(missing)
+    
+    def test_commit_invalidates(self):
+        """A committed new type is visible on the next lookup"""
+        from storage.database_functions import get_object_type_id
+        
+        name = f"test_registry_{uuid.uuid4().hex[:8]}"
+        self.assertIsNone(get_object_type_id(name))
+        
+        object_type = self.add_object_type(name)
+        self.database.save()
+        
+        self.assertEqual(get_object_type_id(name), object_type.id)
+        
+        self.database.delete(object_type)
+        self.assertIsNone(get_object_type_id(name))
+    
+    def test_rollback_keeps_registry(self):
+        """Rolled back changes neither appear nor force a reload"""
+        from storage.database_functions import get_object_type_id
+        from storage.object_type_registry import object_types
+        from storage.object_types import ObjectType
+        
+        get_object_type_id('car')
+        loads = object_types.loads
+        
+        name = f"test_rolled_back_{uuid.uuid4().hex[:8]}"
+        self.add_object_type(name)
+        # Autoflush the insert so the ORM events fire before rolling back
+        self.assertEqual(self.database.count(ObjectType), len(object_types.names()) + 1)
+        self.database.rollback()
+        
+        self.assertIsNone(get_object_type_id(name))
+        self.assertEqual(object_types.loads, loads)
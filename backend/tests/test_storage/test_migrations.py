@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""Storage Tests for Schema Migrations
+Test that migrations bring databases created by older versions up to date
+"""
+import unittest
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from tests import TEST_CONFIG
+
+
+LISTING_INDEXES = {
+    'ix_outputs_created_at_id',
+    'ix_outputs_object_type_id_created_at',
+    'ix_outputs_input_id'
+}
+
+
+class TestMigrations(unittest.TestCase):
+    """Test the versioned migration runner"""
+
+    def setUp(self):
+        """Create a database shaped like one made before the indexes existed"""
+        from sqlalchemy import create_engine, text
+        from storage.base_model import Base
+
+        self.engine = create_engine('sqlite://')
+        Base.metadata.create_all(self.engine)
+        with self.engine.begin() as connection:
+            for name in LISTING_INDEXES:
+                connection.execute(text(f"DROP INDEX {name}"))
+            connection.execute(text("DROP TABLE schema_migrations"))
+
+    def tearDown(self):
+        """Dispose of the in-memory database"""
+        self.engine.dispose()
+
+    def index_names(self):
+        """Names of the indexes currently on the outputs table"""
+        from sqlalchemy import inspect
+
+        return {index['name'] for index in inspect(self.engine).get_indexes('outputs')}
+
+    def test_creates_missing_indexes(self):
+        """Pending migrations add the listing indexes and are recorded"""
+        from storage.migrations import run_migrations, applied_migrations
+
+        self.assertFalse(LISTING_INDEXES & self.index_names())
+
+        applied = run_migrations(self.engine)
+
+        self.assertEqual(applied, ['0001', '0002'])
+        self.assertTrue(LISTING_INDEXES <= self.index_names())
+        self.assertEqual(applied_migrations(self.engine), {'0001', '0002'})
+
+    def test_migrations_run_once(self):
+        """Applied migrations are skipped on later runs"""
+        from storage.migrations import run_migrations
+
+        run_migrations(self.engine)
+
+        self.assertEqual(run_migrations(self.engine), [])
+
+    def test_concurrent_run_is_skipped(self):
+        """A version recorded by another process after this one checked is skipped, not fatal"""
+        from unittest import mock
+        from storage import migrations
+
+        migrations.run_migrations(self.engine)
+        real_applied = migrations.applied_migrations
+        calls = []
+
+        def stale_then_real(engine):
+            calls.append(engine)
+            return set() if len(calls) == 1 else real_applied(engine)
+
+        with mock.patch.object(migrations, 'applied_migrations', side_effect=stale_then_real):
+            self.assertEqual(migrations.run_migrations(self.engine), [])
+        self.assertEqual(real_applied(self.engine), {'0001', '0002'})
+
+    def test_fresh_database_is_recorded(self):
+        """On a database that already has the indexes the migration only records itself"""
+        from sqlalchemy import create_engine
+        from storage.base_model import Base
+        from storage.migrations import run_migrations, applied_migrations
+
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+
+        self.assertEqual(run_migrations(engine), ['0001', '0002'])
+        self.assertEqual(applied_migrations(engine), {'0001', '0002'})
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()